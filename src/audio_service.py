@@ -0,0 +1,99 @@
+# File: audio_service.py
+# Process-wide sound bank: the mixer is started lazily and every sound is decoded only once
+
+import os
+from data_models import Config
+
+
+class NullAudioBackend:
+    """Backend used when no audio is available (pygame missing, no audio device): plays nothing"""
+
+    def load(self, path):
+        return None
+
+    def play(self, sound):
+        pass
+
+
+class PygameAudioBackend:
+    """Backend on top of pygame.mixer"""
+
+    def __init__(self):
+        # Import hier, damit pygame nur geladen wird, wenn wirklich ein Sound gebraucht wird
+        import pygame
+        pygame.mixer.init()
+        self.mixer = pygame.mixer
+
+    def load(self, path):
+        return self.mixer.Sound(path)
+
+    def play(self, sound):
+        # Sound.play() kehrt sofort zurück, der Mixer spielt auf seinem eigenen Thread
+        sound.play()
+
+
+class AudioService:
+    """
+    Process-wide sound bank.
+
+    The mixer is only initialized when the first sound is played, so widgets
+    that never play sounds (e.g. the weekly goal circles) cost nothing. At
+    that point all sounds/*.wav files are decoded once and kept in memory;
+    later plays do not touch the disk. If audio cannot be initialized, a null
+    backend is used and playing a sound does nothing.
+    """
+
+    _instance = None
+
+    @classmethod
+    def instance(cls):
+        """Returns the sound bank shared by all widgets"""
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    def __init__(self, sound_dir=None):
+        self.sound_dir = sound_dir or os.path.join(Config.get_base_dir(), "sounds")
+        self.backend = None
+        self.sounds = {}  # name (without .wav) -> decoded sound or None
+
+    def get_backend(self):
+        """Initializes the mixer on first use and decodes all sounds"""
+        if self.backend is None:
+            try:
+                self.backend = PygameAudioBackend()
+            except Exception as e:
+                print(f"Audio nicht verfügbar, Sounds werden deaktiviert: {e}")
+                self.backend = NullAudioBackend()
+            self.preload()
+        return self.backend
+
+    def preload(self):
+        """Decodes every sounds/*.wav file into the cache"""
+        if not os.path.isdir(self.sound_dir):
+            return
+        for file_name in sorted(os.listdir(self.sound_dir)):
+            name, extension = os.path.splitext(file_name)
+            if extension.lower() == ".wav" and name not in self.sounds:
+                self.load_sound(name)
+
+    def load_sound(self, name):
+        """Decodes sounds/<name>.wav; a file that cannot be decoded is cached as None"""
+        path = os.path.join(self.sound_dir, f"{name}.wav")
+        try:
+            self.sounds[name] = self.backend.load(path)
+        except Exception as e:
+            print(f"Fehler beim Laden des Sounds {path}: {e}")
+            self.sounds[name] = None
+        return self.sounds[name]
+
+    def play(self, name):
+        """Plays sounds/<name>.wav without blocking the caller"""
+        backend = self.get_backend()
+        sound = self.sounds[name] if name in self.sounds else self.load_sound(name)
+        if sound is None:
+            return
+        try:
+            backend.play(sound)
+        except Exception as e:
+            print(f"Fehler beim Abspielen des Sounds {name}: {e}")
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+Idempotentes Schreiben von Kalenderterminen in die Tages-CSVs (DD-MM-YY.csv).
+
+Jeder Termin wird als Start-/Endzeile in die CSV seines Tages geschrieben.
+Ein Index (data/calendar_materialized.json) merkt sich pro Event-ID, welche
+Zeilen in welcher Datei stehen und zu welchem Stand (updated) des Termins.
+Erneute Importe schreiben unveränderte Termine daher nicht noch einmal,
+ersetzen die Zeilen geänderter Termine und entfernen die gelöschter Termine.
+Zeilen, die schon vor dem Index geschrieben wurden (oder deren Index nach einem
+Abbruch fehlt), werden übernommen statt ein zweites Mal angehängt.
+Jede betroffene Tagesdatei wird pro Import genau einmal geschrieben.
+"""
+
+import csv
+import datetime
+import json
+import os
+import tempfile
+from collections import Counter
+from data_models import Config
+from todo_store import write_json_atomic, preserve_mode
+from csv_logger import DAY_FILE_LOCK
+
+CSV_HEADER = ['Mode', 'Status', 'Work', 'Block', 'Task', 'Subtask', 'Timer', 'Time']
+
+# Versuche, eine Tagesdatei neu zu schreiben, wenn sie währenddessen verändert wurde
+REWRITE_ATTEMPTS = 5
+
+# Timer-Werte der Terminzeilen; der Tracker schreibt nie '00:00:00' (str(timedelta) ergibt '0:00:00'),
+# daran erkennt DataProcessor.read_csv die Zeilen eines Termins
+START_TIMER = '00:00:00'
+END_TIMER = '0:00:00'
+
+
+def event_log_rows(event):
+    """
+    Berechnet Tagesdatei und Zeilen eines Termins.
+
+    Args:
+        event: Event-Dictionary mit Termindaten
+
+    Returns:
+        tuple: (Datum im Format DD-MM-YY, [Startzeile, Endzeile]), None ohne Start- oder Endzeit
+    """
+    # Verarbeite nur Ereignisse mit einer Start- und Endzeit
+    if not event['start_time'] or not event['end_time']:
+        return None
+
+    # Parse Startzeit
+    if event['is_all_day']:
+        # Bei ganztägigen Terminen setzen wir Standardzeiten
+        start_date = datetime.date.fromisoformat(event['start_time'])
+        start_datetime = datetime.datetime.combine(start_date, datetime.time(9, 0))  # 09:00 Uhr
+        end_datetime = datetime.datetime.combine(start_date, datetime.time(17, 0))  # 17:00 Uhr
+    else:
+        # Bei zeitgebundenen Terminen verwenden wir die exakten Zeiten
+        start_datetime = datetime.datetime.fromisoformat(event['start_time'].replace('Z', '+00:00')).astimezone()
+        end_datetime = datetime.datetime.fromisoformat(event['end_time'].replace('Z', '+00:00')).astimezone()
+
+    # Startzeile: Termin beginnt, Endzeile: Termin endet
+    rows = [
+        ['1', '1', '1', '1', event['summary'], '', START_TIMER, start_datetime.strftime("%H:%M:%S")],
+        ['0', '0', '0', '0', event['summary'], '', END_TIMER, end_datetime.strftime("%H:%M:%S")],
+    ]
+    return start_datetime.strftime("%d-%m-%y"), rows
+
+
+class EventMaterializer:
+    """
+    Sammelt die Änderungen eines Imports (upsert/remove) und schreibt sie mit
+    flush() gebündelt: pro betroffener Tagesdatei ein Schreibvorgang.
+    """
+
+    def __init__(self, data_dir=None, index_path=None):
+        self.data_dir = data_dir or os.path.join(Config.get_base_dir(), "data")
+        self.index_path = index_path or os.path.join(self.data_dir, "calendar_materialized.json")
+        self.index = None
+        self.additions = {}  # Tag -> neue Zeilen
+        self.removals = {}   # Tag -> zu entfernende Zeilen
+        self.adoptions = {}  # Tag -> Zeilen noch nicht erfasster Termine, die schon in der Datei stehen können
+
+    def load_index(self):
+        """Event-ID -> {"updated", "day", "rows"} (fehlende oder defekte Datei = leerer Index)"""
+        if self.index is None:
+            try:
+                with open(self.index_path, "r", encoding="utf-8") as file:
+                    self.index = json.load(file)
+            except (OSError, ValueError):
+                self.index = {}
+        return self.index
+
+    def upsert(self, event):
+        """Merkt einen Termin zum Schreiben vor, falls er neu ist oder sich geändert hat; True dann"""
+        day_rows = event_log_rows(event)
+        if day_rows is None:
+            self.remove(event['id'])
+            return False
+        day, rows = day_rows
+
+        index = self.load_index()
+        entry = index.get(event['id'])
+        if entry is not None and entry["updated"] == event.get('updated') and entry["day"] == day \
+                and entry["rows"] == rows:
+            return False
+        if entry is not None:
+            self.removals.setdefault(entry["day"], []).extend(entry["rows"])
+        else:
+            self.adoptions.setdefault(day, []).extend(rows)
+        self.additions.setdefault(day, []).extend(rows)
+        index[event['id']] = {"updated": event.get('updated'), "day": day, "rows": rows}
+        return True
+
+    def remove(self, event_id):
+        """Merkt die Zeilen eines gelöschten Termins zum Entfernen vor"""
+        entry = self.load_index().pop(event_id, None)
+        if entry is not None:
+            self.removals.setdefault(entry["day"], []).extend(entry["rows"])
+
+    def flush(self):
+        """Schreibt alle vorgemerkten Änderungen und den Index; gibt die Zahl der geschriebenen Tage zurück"""
+        days = set(self.additions) | set(self.removals)
+        for day in days:
+            self.write_day(day, self.removals.get(day, []), self.additions.get(day, []),
+                           self.adoptions.get(day, []))
+        if days:
+            write_json_atomic(self.index_path, self.load_index(), indent=None)
+        self.additions = {}
+        self.removals = {}
+        self.adoptions = {}
+        return len(days)
+
+    def write_day(self, day, removals, additions, adoptions=()):
+        """
+        Entfernt je Zeile in removals ein Vorkommen, jedes Vorkommen der Zeilen in
+        adoptions (ältere Kopien des Termins) und hängt additions an.
+        """
+        os.makedirs(self.data_dir, exist_ok=True)
+        csv_path = os.path.join(self.data_dir, f"{day}.csv")
+        legacy = {tuple(row) for row in adoptions}
+
+        # Der Tracker hängt gleichzeitig Zeilen an dieselbe Datei an (CSVLogger.log)
+        with DAY_FILE_LOCK:
+            if not removals and not (legacy and contains_any(csv_path, legacy)):
+                # Nur neue Zeilen: anhängen, die Zeilen des Trackers bleiben unberührt
+                file_exists = os.path.exists(csv_path)
+                with open(csv_path, 'a', newline='') as csvfile:
+                    csv_writer = csv.writer(csvfile)
+                    if not file_exists:
+                        csv_writer.writerow(CSV_HEADER)
+                    csv_writer.writerows(additions)
+                return
+
+            for _ in range(REWRITE_ATTEMPTS):
+                stamp = file_stamp(csv_path)
+                rows = []
+                if stamp is not None:
+                    with open(csv_path, 'r', newline='') as csvfile:
+                        rows = list(csv.reader(csvfile))
+                if not rows:
+                    rows = [CSV_HEADER]
+
+                # Je vorgemerkter Zeile genau ein Vorkommen entfernen
+                pending = Counter(tuple(row) for row in removals)
+                kept = [rows[0]]
+                for row in rows[1:]:
+                    key = tuple(row)
+                    if pending[key] > 0:
+                        pending[key] -= 1
+                        continue
+                    if key in legacy:
+                        continue
+                    kept.append(row)
+                kept.extend(additions)
+
+                # Atomar ersetzen, damit Leser nie eine halb geschriebene Datei sehen
+                fd, tmp_path = tempfile.mkstemp(prefix=".day-", suffix=".tmp", dir=self.data_dir)
+                try:
+                    with os.fdopen(fd, "w", newline="") as csvfile:
+                        csv.writer(csvfile).writerows(kept)
+                    preserve_mode(tmp_path, csv_path)
+                    # Hat ein anderer Prozess inzwischen angehängt, neu einlesen statt seine Zeilen zu verlieren
+                    if file_stamp(csv_path) != stamp:
+                        os.unlink(tmp_path)
+                        continue
+                    os.replace(tmp_path, csv_path)
+                    return
+                except BaseException:
+                    os.unlink(tmp_path)
+                    raise
+            raise OSError(f"{csv_path} changed during every rewrite attempt")
+
+
+def contains_any(csv_path, rows):
+    """True, wenn eine der Zeilen (Tupel) in der Tagesdatei steht"""
+    try:
+        with open(csv_path, 'r', newline='') as csvfile:
+            return any(tuple(row) in rows for row in csv.reader(csvfile))
+    except OSError:
+        return False
+
+
+def file_stamp(path):
+    """(Inode, mtime_ns, Größe) einer Datei, None wenn sie nicht existiert"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
@@ -0,0 +1,424 @@
+#!/usr/bin/env python3
+"""
+Inkrementelle Synchronisation von Google Calendar-Terminen.
+
+Pro Kalender wird der nextSyncToken der Calendar API zusammen mit einem
+lokalen Cache der Termine (nach Event-ID, mit etag) gespeichert. Spätere
+Importe fragen mit dem Token nur noch geänderte und gelöschte Termine ab;
+Aufwand und API-Kontingent richten sich damit nach den Änderungen statt
+nach der Größe des Zeitraums.
+
+Der Service wird nur über service.events().list(...).execute() benutzt,
+damit lässt sich die Synchronisation auch gegen eine lokale Attrappe
+(StubCalendarService) ohne Netzwerk testen.
+"""
+
+import datetime
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from data_models import Config
+from todo_store import write_json_atomic
+
+# Status-Code der Calendar API, wenn ein Sync-Token abgelaufen ist
+SYNC_TOKEN_GONE = 410
+
+# Termine pro events().list-Anfrage (die API erlaubt höchstens 2500)
+DEFAULT_PAGE_SIZE = 250
+
+# Höchstzahl der Kalender, die gleichzeitig abgerufen werden
+MAX_PARALLEL_CALENDARS = 8
+
+
+def normalize_event(event):
+    """
+    Wandelt ein Event der Calendar API in das Termin-Dict der Anwendung um.
+
+    Args:
+        event: Event-Ressource, wie sie events().list() liefert
+
+    Returns:
+        dict: Termin mit den für Todo-Liste und CSV benötigten Feldern
+    """
+    # Start- und Endzeit des Termins abholen
+    start_time = event.get('start', {})
+    end_time = event.get('end', {})
+
+    # Überprüfen, ob es sich um einen Ganztagestermin handelt
+    is_all_day = 'date' in start_time and 'date' in end_time
+
+    return {
+        'id': event.get('id', ''),
+        'ical_uid': event.get('iCalUID', ''),
+        'etag': event.get('etag', ''),
+        'updated': event.get('updated', ''),
+        'summary': event.get('summary', '(Kein Titel)'),
+        'description': event.get('description', ''),
+        'location': event.get('location', ''),
+        'is_all_day': is_all_day,
+        'start_time': start_time.get('dateTime', start_time.get('date', '')),
+        'end_time': end_time.get('dateTime', end_time.get('date', '')),
+        'creator': event.get('creator', {}).get('email', ''),
+        'attendees': [attendee.get('email', '') for attendee in event.get('attendees', [])]
+    }
+
+
+def event_start_date(event):
+    """Gibt das (lokale) Startdatum eines normalisierten Termins zurück, None wenn unbekannt"""
+    start = event.get('start_time')
+    if not start:
+        return None
+    if event.get('is_all_day'):
+        return datetime.date.fromisoformat(start)
+    return datetime.datetime.fromisoformat(start.replace('Z', '+00:00')).astimezone().date()
+
+
+def starts_before(event, time_min):
+    """True, wenn ein Termin vor time_min (datetime, UTC ohne Zeitzone) beginnt"""
+    start = event.get('start_time')
+    if not start or time_min is None:
+        return False
+    if event.get('is_all_day'):
+        # Ganztägige Termine beginnen um Mitternacht Ortszeit
+        start_datetime = datetime.datetime.combine(datetime.date.fromisoformat(start), datetime.time()).astimezone()
+    else:
+        start_datetime = datetime.datetime.fromisoformat(start.replace('Z', '+00:00'))
+        if start_datetime.tzinfo is None:
+            start_datetime = start_datetime.astimezone()
+    return start_datetime < time_min.replace(tzinfo=datetime.timezone.utc)
+
+
+class SyncCancelled(Exception):
+    """Die Synchronisation wurde über is_cancelled abgebrochen"""
+
+
+def iter_pages(service, request, page_size=DEFAULT_PAGE_SIZE, is_cancelled=None):
+    """
+    Ruft events().list seitenweise über nextPageToken ab und liefert jede
+    Antwort, sobald sie da ist; es liegt immer nur eine Seite im Speicher.
+
+    Args:
+        service: Calendar-Service (oder eine Attrappe mit events().list().execute())
+        request: Parameter für events().list (ohne pageToken)
+        page_size: Termine pro Seite (maxResults)
+        is_cancelled: Funktion, die vor jeder Seite gefragt wird; True bricht mit SyncCancelled ab
+    """
+    request = dict(request, maxResults=page_size)
+    page = 0
+    while True:
+        if is_cancelled and is_cancelled():
+            raise SyncCancelled()
+        started = time.perf_counter()
+        response = service.events().list(**request).execute()
+        page += 1
+        print(f"Kalender {request.get('calendarId')}: Seite {page} mit {len(response.get('items', []))} "
+              f"Terminen in {(time.perf_counter() - started) * 1000:.0f} ms")
+        yield response
+
+        page_token = response.get('nextPageToken')
+        if not page_token:
+            return
+        request['pageToken'] = page_token
+
+
+def iter_events(service, request, page_size=DEFAULT_PAGE_SIZE):
+    """Liefert die normalisierten Termine aller Seiten einer Abfrage (ohne gelöschte)"""
+    for response in iter_pages(service, request, page_size):
+        for item in response.get('items', []):
+            if item.get('status') != 'cancelled':
+                yield normalize_event(item)
+
+
+def merge_events(event_lists):
+    """
+    Führt die Terminlisten mehrerer Kalender zu einer nach Startzeit sortierten
+    Liste zusammen. Ein Termin, der in mehreren Kalendern steht, kommt nur
+    einmal vor (der aus der ersten Liste). Schlüssel ist die iCalUID zusammen
+    mit der Startzeit, weil alle Instanzen einer Terminserie dieselbe iCalUID haben.
+    """
+    merged = {}
+    for events in event_lists:
+        for event in events:
+            merged.setdefault((event.get('ical_uid') or event['id'], event['start_time']), event)
+    return sorted(merged.values(), key=lambda event: event['start_time'])
+
+
+def is_sync_token_gone(error):
+    """True, wenn die API den Sync-Token verworfen hat (HTTP 410 Gone)"""
+    status = getattr(getattr(error, 'resp', None), 'status', None)
+    return str(status) == str(SYNC_TOKEN_GONE)
+
+
+class EventCache:
+    """
+    Lokaler Cache der synchronisierten Termine in data/calendar_cache.json.
+
+    Aufbau: {Kalender-ID: {"sync_token": ..., "events": {Event-ID: Termin}, "imported": [Event-IDs]}}
+
+    "imported" enthält die Termine, die schon einmal als Task übernommen
+    wurden; ein später gelöschter oder archivierter Task wird nicht neu angelegt.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or os.path.join(Config.get_base_dir(), "data", "calendar_cache.json")
+        self.calendars = None
+
+    def load(self):
+        """Lädt den Cache einmal von der Platte (fehlende oder defekte Datei = leerer Cache)"""
+        if self.calendars is None:
+            try:
+                with open(self.path, "r", encoding="utf-8") as file:
+                    self.calendars = json.load(file)
+            except (OSError, ValueError):
+                self.calendars = {}
+        return self.calendars
+
+    def save(self):
+        write_json_atomic(self.path, self.load(), indent=None)
+
+    def calendar(self, calendar_id):
+        return self.load().setdefault(calendar_id, {"sync_token": None, "events": {}})
+
+    def events(self, calendar_id):
+        return self.calendar(calendar_id)["events"]
+
+    def imported_ids(self, calendar_id):
+        return set(self.calendar(calendar_id).get("imported", []))
+
+    def mark_imported(self, calendar_id, event_ids):
+        """Merkt Termine als übernommen; IDs, die nicht mehr im Cache stehen, fallen heraus"""
+        entry = self.calendar(calendar_id)
+        entry["imported"] = sorted((set(entry.get("imported", [])) | set(event_ids)) & set(entry["events"]))
+
+    def events_in_range(self, calendar_id, start_date, end_date):
+        """Termine eines Kalenders, deren Startdatum im Zeitraum liegt, nach Startzeit sortiert"""
+        events = [event for event in self.events(calendar_id).values()
+                  if (day := event_start_date(event)) is not None and start_date <= day <= end_date]
+        events.sort(key=lambda event: event['start_time'])
+        return events
+
+
+class SyncResult:
+    """Ergebnis einer Synchronisation: geänderte Termine und IDs gelöschter Termine"""
+
+    def __init__(self, full=False):
+        self.full = full
+        self.changed = []
+        self.deleted = []
+        self.requests = 0
+
+    def summary(self):
+        kind = "voll" if self.full else "inkrementell"
+        return (f"Sync ({kind}): {len(self.changed)} geändert, {len(self.deleted)} gelöscht, "
+                f"{self.requests} Anfragen")
+
+
+class CalendarSync:
+    """
+    Synchronisiert Kalender mit dem EventCache.
+
+    Die erste Synchronisation eines Kalenders listet alle Termine ab time_min,
+    jede weitere nur die Änderungen seit dem gespeicherten nextSyncToken.
+    Verwirft die API den Token (410), wird einmal voll synchronisiert.
+    """
+
+    def __init__(self, service, cache=None, page_size=DEFAULT_PAGE_SIZE, is_cancelled=None):
+        self.service = service
+        self.cache = cache or EventCache()
+        self.page_size = page_size
+        self.is_cancelled = is_cancelled
+
+    def sync(self, calendar_id='primary', time_min=None, save=True):
+        """
+        Gleicht den Cache eines Kalenders mit der API ab und speichert ihn.
+
+        Args:
+            calendar_id: ID des Kalenders
+            time_min: Beginn des Zeitraums für die erste, volle Synchronisation (datetime, UTC)
+            save: Ob der Cache danach gespeichert werden soll
+
+        Returns:
+            SyncResult: geänderte und gelöschte Termine
+        """
+        token = self.cache.calendar(calendar_id)["sync_token"]
+        try:
+            result = self.run(calendar_id, token, time_min)
+        except Exception as e:
+            if token is None or not is_sync_token_gone(e):
+                raise
+            # Token abgelaufen: alles neu holen und mit dem Cache vergleichen
+            result = self.run(calendar_id, None, time_min)
+        if save:
+            self.cache.save()
+        return result
+
+    def run(self, calendar_id, token, time_min):
+        request = {'calendarId': calendar_id, 'singleEvents': True}
+        if token:
+            request['syncToken'] = token
+        elif time_min is not None:
+            request['timeMin'] = time_min.isoformat() + 'Z'  # 'Z' zeigt UTC-Zeit an
+
+        # Inkrementell wird der Cache fortgeschrieben, eine volle Synchronisation
+        # baut ihn neu auf und vergleicht dabei mit dem bisherigen Stand
+        result = SyncResult(full=not token)
+        previous = self.cache.events(calendar_id)
+        events = previous if token else {}
+        response = {}
+        for response in iter_pages(self.service, request, self.page_size, self.is_cancelled):
+            result.requests += 1
+
+            for item in response.get('items', []):
+                event_id = item.get('id', '')
+                if item.get('status') == 'cancelled':
+                    # Gelöschte Termine liefert die API nur mit ID und Status
+                    if events.pop(event_id, None) is not None:
+                        result.deleted.append(event_id)
+                    continue
+                cached = previous.get(event_id)
+                if cached is not None and cached.get('etag') == item.get('etag'):
+                    events[event_id] = cached
+                    continue
+                event = normalize_event(item)
+                events[event_id] = event
+                result.changed.append(event)
+
+        if not token:
+            # Termine, die bei der vollen Synchronisation fehlen, gelten als gelöscht. Die Liste
+            # beginnt erst bei time_min: ältere Termine bleiben unverändert im Cache, damit
+            # vergangene Kalenderzeit ein Zurücksetzen des Tokens übersteht
+            for event_id, event in previous.items():
+                if event_id in events:
+                    continue
+                if starts_before(event, time_min):
+                    events[event_id] = event
+                else:
+                    result.deleted.append(event_id)
+
+        # Der nextSyncToken steht erst auf der letzten Seite
+        entry = self.cache.calendar(calendar_id)
+        entry["sync_token"] = response.get('nextSyncToken')
+        entry["events"] = events
+        return result
+
+
+def sync_calendars(lease_service, calendar_ids, cache=None, time_min=None, page_size=DEFAULT_PAGE_SIZE,
+                   max_workers=MAX_PARALLEL_CALENDARS, save=True, on_result=None, is_cancelled=None):
+    """
+    Synchronisiert mehrere Kalender gleichzeitig in einem Thread-Pool; die
+    Gesamtdauer entspricht damit etwa der des langsamsten Kalenders.
+
+    Args:
+        lease_service: Funktion, die einen Kontextmanager liefert, der dem Thread
+                       einen eigenen Service leiht (der Service des API-Clients
+                       ist nicht threadsicher), z.B. GoogleCalendarAPI.lease_service
+        calendar_ids: IDs der Kalender
+        cache: EventCache (Standard: data/calendar_cache.json)
+        time_min: Beginn des Zeitraums für volle Synchronisationen (datetime, UTC)
+        page_size: Termine pro API-Anfrage
+        max_workers: Höchstzahl gleichzeitiger Kalender
+        save: Ob der Cache danach gespeichert werden soll
+        on_result: Funktion(Kalender-ID, SyncResult), aufgerufen sobald ein Kalender fertig ist
+        is_cancelled: Funktion, die vor jeder Seite gefragt wird; True bricht mit SyncCancelled ab
+                      (der Cache wird dann nicht gespeichert)
+
+    Returns:
+        dict: Kalender-ID -> SyncResult
+    """
+    cache = cache or EventCache()
+    # Einträge vorab anlegen: jeder Thread ändert danach nur noch seinen eigenen Kalender
+    for calendar_id in calendar_ids:
+        cache.calendar(calendar_id)
+
+    def sync_one(calendar_id):
+        with lease_service() as service:
+            return CalendarSync(service, cache, page_size, is_cancelled).sync(calendar_id, time_min, save=False)
+
+    results = {}
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(calendar_ids)))) as executor:
+        futures = {executor.submit(sync_one, calendar_id): calendar_id for calendar_id in calendar_ids}
+        for future in as_completed(futures):
+            results[futures[future]] = future.result()
+            if on_result:
+                on_result(futures[future], results[futures[future]])
+    if save:
+        cache.save()
+    return results
+
+
+class StubHttpError(Exception):
+    """HTTP-Fehler der Attrappe (wie googleapiclient.errors.HttpError mit resp.status)"""
+
+    def __init__(self, status):
+        super().__init__(f"HTTP {status}")
+        self.resp = type("Response", (), {"status": status})()
+
+
+class StubRequest:
+    def __init__(self, call):
+        self.call = call
+
+    def execute(self):
+        return self.call()
+
+
+class StubCalendarService:
+    """
+    Lokale Attrappe des Calendar-Service für Tests ohne Netzwerk.
+
+    Unterstützt events().list() mit Seiten (maxResults/pageToken) und
+    Sync-Tokens: ein Token liefert alle Events, die nach seiner Ausgabe über
+    change() geändert wurden. latency simuliert die Dauer jeder Anfrage.
+    """
+
+    def __init__(self, events=None, latency=0.0):
+        self.calendars = {calendar_id: {event['id']: event for event in items}
+                          for calendar_id, items in (events or {}).items()}
+        self.latency = latency
+        self.version = 0
+        self.oldest_token = 0
+        self.changed_at = {}  # (Kalender-ID, Event-ID) -> Version der Änderung
+        self.requests = 0
+        self.lock = threading.Lock()
+
+    def change(self, calendar_id, event):
+        """Fügt ein Event ein oder ändert es (status 'cancelled' = gelöscht)"""
+        with self.lock:
+            self.version += 1
+            self.calendars.setdefault(calendar_id, {})[event['id']] = event
+            self.changed_at[(calendar_id, event['id'])] = self.version
+
+    def expire_sync_tokens(self):
+        """Lässt alle bisher ausgegebenen Sync-Tokens ablaufen (die nächste Anfrage liefert 410)"""
+        with self.lock:
+            self.version += 1
+            self.oldest_token = self.version
+
+    def events(self):
+        return self
+
+    def list(self, **request):
+        return StubRequest(lambda: self.list_events(**request))
+
+    def list_events(self, calendarId, maxResults=DEFAULT_PAGE_SIZE, pageToken=None, syncToken=None, **_):
+        time.sleep(self.latency)
+        with self.lock:
+            self.requests += 1
+            events = self.calendars.get(calendarId, {})
+            if syncToken is not None:
+                if int(syncToken) < self.oldest_token:
+                    raise StubHttpError(SYNC_TOKEN_GONE)
+                items = [event for event_id, event in events.items()
+                         if self.changed_at.get((calendarId, event_id), 0) > int(syncToken)]
+            else:
+                items = [event for event in events.values() if event.get('status') != 'cancelled']
+
+            start = int(pageToken or 0)
+            response = {'items': items[start:start + maxResults]}
+            if start + maxResults < len(items):
+                response['nextPageToken'] = str(start + maxResults)
+            else:
+                response['nextSyncToken'] = str(self.version)
+            return response
@@ -6,24 +6,26 @@ Dieses Modul integriert Google Kalender-Termine in die Todo-Liste.
 import os
 import datetime
 import json
-from google_calendar_integration import GoogleCalendarAPI, create_csv_for_event
+from google_calendar_integration import GoogleCalendarAPI
+from calendar_sync import EventCache, SyncCancelled, merge_events
+from calendar_materializer import EventMaterializer
+from todo_store import TodoStore
 
-# Basisverzeichnis bestimmen (geht eine Ebene nach oben)
-base_dir = os.path.abspath(os.path.join(os.getcwd(), ".."))
-todo_path = os.path.join(base_dir, "data", "todo.json")
+# Gemeinsamer Speicher für todo.json (Basisverzeichnis unabhängig vom Arbeitsverzeichnis)
+todo_store = TodoStore.instance()
+todo_path = todo_store.path
 
 def load_todo():
-    """Lädt die aktuelle Todo-JSON-Datei"""
-    if os.path.exists(todo_path):
-        with open(todo_path, "r", encoding="utf-8") as file:
-            return json.load(file)
-    return {"tasks": []}
+    """Lädt die aktuelle Todo-JSON-Datei (aus dem Cache, falls unverändert)"""
+    return todo_store.get()
 
 def save_todo(data):
-    """Speichert die aktualisierte Todo-JSON-Datei"""
-    os.makedirs(os.path.dirname(todo_path), exist_ok=True)
-    with open(todo_path, "w", encoding="utf-8") as file:
-        json.dump(data, file, indent=4)
+    """Speichert die aktualisierte Todo-JSON-Datei atomar"""
+    todo_store.save(data)
+
+# Subtasks, die aus einem Termin entstehen: Teil -> Präfix der Bezeichnung
+# (über das Präfix werden auch Subtasks älterer Importe ohne source_part erkannt)
+SUBTASK_PARTS = {"time": "Termin: ", "location": "Ort: ", "description": "Details: "}
 
 def create_task_from_calendar_event(event, task_color="#3498db"):
     """
@@ -46,27 +48,33 @@ def create_task_from_calendar_event(event, task_color="#3498db"):
     time_str = format_event_time_for_subtask(event)
     subtasks.append({
         "subtask": f"Termin: {time_str}",
+        "source_event_id": event['id'],
+        "source_part": "time",
         "status": "Pending",
-        "estimated_time": "1.0h",  # Standardwert
-        "actual_time": "0.0"
+        "estimated_time": 1.0,  # Standardwert (Stunden)
+        "actual_time": 0.0
     })
     
     # Ort als Subtask hinzufügen, falls vorhanden
     if event['location']:
         subtasks.append({
             "subtask": f"Ort: {event['location']}",
+            "source_event_id": event['id'],
+            "source_part": "location",
             "status": "Pending",
-            "estimated_time": "0.0h",
-            "actual_time": "0.0"
+            "estimated_time": 0.0,
+            "actual_time": 0.0
         })
     
     # Beschreibung als Subtask hinzufügen, falls vorhanden
     if event['description']:
         subtasks.append({
             "subtask": f"Details: {event['description'][:100]}",  # Auf 100 Zeichen begrenzen
+            "source_event_id": event['id'],
+            "source_part": "description",
             "status": "Pending",
-            "estimated_time": "0.0h",
-            "actual_time": "0.0"
+            "estimated_time": 0.0,
+            "actual_time": 0.0
         })
     
     # Für die geschätzte Gesamtzeit berechnen wir die Termindauer in Stunden
@@ -74,14 +82,132 @@ def create_task_from_calendar_event(event, task_color="#3498db"):
     
     return {
         "task": task_name,
+        "source_event_id": event['id'],  # Schlüssel für spätere inkrementelle Importe
         "type": "Termin",
         "category": "Kalender",
-        "estimated_time": str(duration_hours),
-        "actual_time": "0.0",
+        "estimated_time": float(duration_hours),
+        "actual_time": 0.0,
         "color": task_color,
         "subtasks": subtasks
     }
 
+def subtask_part(subtask, event_id):
+    """Gibt den Teil (time/location/description) eines Termin-Subtasks zurück, None für eigene Subtasks"""
+    if subtask.get("source_event_id") == event_id and subtask.get("source_part"):
+        return subtask["source_part"]
+    if "source_event_id" not in subtask:
+        for part, prefix in SUBTASK_PARTS.items():
+            if subtask.get("subtask", "").startswith(prefix):
+                return part
+    return None
+
+class CalendarMerge:
+    """
+    Berechnet die minimalen Journal-Operationen, die Kalendertermine in das
+    Todo-Dokument übernehmen.
+
+    Tasks und Subtasks werden über source_event_id (und source_part) dem
+    Termin zugeordnet. Neue Termine werden als Task angehängt, Tasks
+    gelöschter Termine entfernt. Termine aus imported_ids ohne Task hat der
+    Benutzer gelöscht oder archiviert; sie werden nicht neu angelegt. Bei geänderten Terminen werden nur die vom
+    Kalender stammenden Felder (Task-Name, Bezeichnung der Subtasks)
+    angepasst; Status, Zeiten, Farbe und eigene Subtasks bleiben erhalten.
+
+    Die Positionen der Operationen gelten in der Reihenfolge, in der
+    TodoStore.apply sie anwendet: zuerst werden Tasks entfernt (von hinten),
+    dann vorhandene Tasks angepasst, zuletzt neue Tasks angehängt.
+    """
+
+    def __init__(self, document, window_events, changed_ids, deleted_ids, imported_ids=()):
+        self.ops = []
+        self.added = 0
+        self.changed = 0
+        self.removed = 0
+        self.dismissed = 0
+
+        tasks = document.get("tasks", [])
+        positions = {}  # Event-ID -> Position des Tasks
+        for position, task in enumerate(tasks):
+            if task.get("source_event_id"):
+                positions.setdefault(task["source_event_id"], position)
+
+        # Tasks gelöschter Termine entfernen, von hinten, damit die Positionen gültig bleiben
+        removed_positions = sorted((position for event_id, position in positions.items() if event_id in deleted_ids),
+                                   reverse=True)
+        for position in removed_positions:
+            self.ops.append({"op": "remove_task", "task": position, "value": tasks[position]})
+        self.removed = len(removed_positions)
+
+        new_events = []
+        for event in window_events:
+            position = positions.get(event['id'])
+            if position is None and event['id'] in imported_ids:
+                self.dismissed += 1
+            elif position is None or event['id'] in deleted_ids:
+                new_events.append(event)
+            elif event['id'] in changed_ids:
+                # Position nach dem Entfernen der davor liegenden Tasks
+                shift = sum(1 for removed in removed_positions if removed < position)
+                if self.update_task(tasks[position], position - shift, event):
+                    self.changed += 1
+
+        # Neue Termine anhängen
+        count = len(tasks) - self.removed
+        for event in new_events:
+            self.ops.append({"op": "insert_task", "task": count, "value": create_task_from_calendar_event(event)})
+            count += 1
+        self.added = len(new_events)
+
+    def update_task(self, task, position, event):
+        """Erzeugt die Operationen für einen geänderten Termin; True, wenn sich etwas ändert"""
+        desired = create_task_from_calendar_event(event)
+        ops = []
+
+        if task.get("task") != desired["task"]:
+            ops.append({"op": "set_task", "task": position,
+                        "values": {"task": desired["task"]}, "old": {"task": task.get("task")}})
+
+        wanted = {subtask["source_part"]: subtask for subtask in desired["subtasks"]}
+        subtasks = task.get("subtasks", [])
+        existing = {}
+        for index, subtask in enumerate(subtasks):
+            part = subtask_part(subtask, event['id'])
+            if part is not None:
+                existing.setdefault(part, index)
+
+        # Entfallene Teile (z.B. Ort gelöscht) von hinten entfernen
+        removed = sorted((index for part, index in existing.items() if part not in wanted), reverse=True)
+        for index in removed:
+            ops.append({"op": "remove_subtask", "task": position, "subtask": index, "value": subtasks[index]})
+
+        # Vorhandene Teile: nur Bezeichnung und Herkunft anpassen
+        for part, index in existing.items():
+            if part not in wanted:
+                continue
+            subtask = subtasks[index]
+            values = {field: wanted[part][field] for field in ("subtask", "source_event_id", "source_part")
+                      if subtask.get(field) != wanted[part][field]}
+            if values:
+                shift = sum(1 for removed_index in removed if removed_index < index)
+                ops.append({"op": "set_subtask", "task": position, "subtask": index - shift,
+                            "values": values, "old": {field: subtask.get(field) for field in values}})
+
+        # Neue Teile anhängen
+        count = len(subtasks) - len(removed)
+        for part, subtask in wanted.items():
+            if part not in existing:
+                ops.append({"op": "insert_subtask", "task": position, "subtask": count, "value": subtask})
+                count += 1
+
+        self.ops.extend(ops)
+        return bool(ops)
+
+    def summary(self):
+        summary = f"{self.added} neu, {self.changed} geändert, {self.removed} entfernt"
+        if self.dismissed:
+            summary += f", {self.dismissed} vom Benutzer entfernt (nicht neu angelegt)"
+        return summary
+
 def format_event_time_for_subtask(event):
     """
     Formatiert die Zeit eines Events für die Anzeige als Subtask.
@@ -128,59 +254,146 @@ def calculate_event_duration(event):
     
     return round(hours, 1)  # Auf eine Dezimalstelle runden
 
-def import_calendar_events_to_todo(calendar_id='primary', days_ahead=7):
+class CalendarImport:
     """
-    Importiert Google Calendar-Termine als Tasks in die Todo-Anwendung.
+    Synchronisierte Termine eines Imports, bereit zur Übernahme.
+
+    fetch_calendar_import() erzeugt das Objekt (Netzwerk, auf einem beliebigen
+    Thread). apply() übernimmt die Termine in die Todo-Liste und muss auf dem
+    Thread laufen, der auch das Todo-Modell liest (GUI-Thread); write() führt
+    danach die Tages-CSVs nach und speichert den Cache (beliebiger Thread).
+    """
+
+    def __init__(self, calendar_ids, cache, window_events, changed_ids, deleted_ids, imported_ids):
+        self.calendar_ids = calendar_ids
+        self.cache = cache
+        self.window_events = window_events
+        self.changed_ids = changed_ids
+        self.deleted_ids = deleted_ids
+        self.imported_ids = imported_ids
+        self.merge = None
+
+    def apply(self, store=None):
+        """
+        Berechnet die minimalen Änderungen und wendet sie als Journal-Operationen an.
+
+        Returns:
+            int: Anzahl der neuen oder geänderten Termine
+        """
+        store = store or todo_store
+        # Die Sperre verhindert, dass sich das Dokument dazwischen ändert (Positionen der Operationen)
+        with store.lock:
+            self.merge = CalendarMerge(store.get(), self.window_events, self.changed_ids, self.deleted_ids,
+                                       self.imported_ids)
+            store.apply(self.merge.ops, undoable=False)
+        return self.merge.added + self.merge.changed
+
+    def write(self):
+        """Führt die Tages-CSVs idempotent nach und speichert den Cache (nach apply())"""
+        for synced_id in self.calendar_ids:
+            self.cache.mark_imported(synced_id, (event['id'] for event in self.window_events))
+
+        # Neue und geänderte Termine schreiben, gelöschte entfernen, jede betroffene Datei einmal
+        materializer = EventMaterializer()
+        for event in self.window_events:
+            materializer.upsert(event)
+        # Aus dem Zeitraum verschobene Termine verlieren ihre alten Zeilen ebenso wie gelöschte
+        window_ids = {event['id'] for event in self.window_events}
+        for event_id in self.deleted_ids | (self.changed_ids - window_ids):
+            materializer.remove(event_id)
+        materializer.flush()
+        self.cache.save()
+
+def fetch_calendar_import(calendar_id='primary', days_ahead=7, cache=None, progress=None, is_cancelled=None):
+    """
+    Synchronisiert die Kalender gleichzeitig und inkrementell (siehe calendar_sync),
+    ohne etwas zu schreiben. Blockiert (Netzwerk) und kann auf einem
+    Hintergrund-Thread laufen.
     
     Args:
-        calendar_id: ID des zu importierenden Kalenders
+        calendar_id: ID des zu importierenden Kalenders oder Liste mehrerer IDs
         days_ahead: Anzahl der Tage in die Zukunft, für die Termine importiert werden
+        cache: EventCache (Standard: data/calendar_cache.json)
+        progress: Funktion(Nachricht) für Zwischenstände, z.B. pro fertigem Kalender (Standard: print)
+        is_cancelled: Funktion; True bricht die Synchronisation ab
         
     Returns:
-        int: Anzahl der importierten Termine
+        CalendarImport, 0 ohne Authentifizierung, None nach Abbruch
     """
+    report = progress or print
+    
     # Google Calendar API initialisieren
-    api = GoogleCalendarAPI()
+    api = GoogleCalendarAPI.instance()
     
+    report("Verbinde mit Google Calendar...")
     if not api.authenticate():
-        print("Fehler bei der Authentifizierung mit Google Calendar.")
+        report("Fehler bei der Authentifizierung mit Google Calendar.")
         return 0
     
     # Zeitraum festlegen: von heute bis X Tage in die Zukunft
     today = datetime.date.today()
     end_date = today + datetime.timedelta(days=days_ahead)
     
-    # Termine abrufen - hier setzen wir create_csv auf True, um CSV-Dateien zu erzeugen
-    events = api.get_events_by_date_range(today, end_date, calendar_id, create_csv=True)
-    
-    # Aktuelle Todo-Daten laden
-    todo_data = load_todo()
-    
-    # Kalender-Task-Gruppe erstellen oder finden
-    calendar_task_name = f"Kalendertermine ({today.strftime('%d.%m')} - {end_date.strftime('%d.%m')})"
+    # Nur die Änderungen seit dem letzten Import abholen, alle Kalender gleichzeitig
+    calendar_ids = [calendar_id] if isinstance(calendar_id, str) else list(calendar_id)
+    cache = cache or EventCache()
+    report(f"Synchronisiere {len(calendar_ids)} Kalender...")
+    try:
+        # Der Cache wird erst gespeichert, wenn todo.json und die Tages-CSVs nachgeführt sind
+        results = api.sync_calendars(calendar_ids, datetime.datetime.combine(today, datetime.time.min), cache,
+                                     save=False, is_cancelled=is_cancelled,
+                                     on_result=lambda synced_id, result: report(f"{synced_id}: {result.summary()}"))
+    except SyncCancelled:
+        report("Import abgebrochen.")
+        return None
+    if is_cancelled and is_cancelled():
+        report("Import abgebrochen.")
+        return None
+    
+    changed_ids = set()
+    deleted_ids = set()
+    for result in results.values():
+        changed_ids.update(event['id'] for event in result.changed)
+        deleted_ids.update(result.deleted)
+    window_events = merge_events(cache.events_in_range(synced_id, today, end_date) for synced_id in calendar_ids)
+    
+    imported_ids = set()
+    for synced_id in calendar_ids:
+        imported_ids.update(cache.imported_ids(synced_id))
+    # Archivierte Termin-Tasks (auch aus Importen vor der Erfassung in "imported") nicht neu anlegen
+    imported_ids.update(task["source_event_id"] for task in todo_store.archive.load_tasks()
+                        if task.get("source_event_id"))
+    return CalendarImport(calendar_ids, cache, window_events, changed_ids, deleted_ids, imported_ids)
+
+def import_calendar_events_to_todo(calendar_id='primary', days_ahead=7, cache=None, progress=None, is_cancelled=None):
+    """
+    Importiert Google Calendar-Termine als Tasks in die Todo-Anwendung.
     
-    # Prüfen, ob eine ähnliche Kalender-Task-Gruppe bereits existiert und diese entfernen
-    todo_data["tasks"] = [task for task in todo_data["tasks"] 
-                         if not task["task"].startswith("Kalendertermine")]
+    Die Kalender werden über fetch_calendar_import synchronisiert und über
+    CalendarMerge in die Todo-Liste übernommen: nur neue, geänderte und
+    gelöschte Termine erzeugen Journal-Operationen, Änderungen des Benutzers
+    an Status und Zeiten bleiben erhalten. Ein Termin, der in mehreren
+    Kalendern steht, wird nur einmal importiert. Ohne Änderungen wird
+    todo.json nicht geschrieben.
     
-    # Neue Kalender-Task-Gruppe erstellen
-    calendar_tasks = []
+    Alle Schritte laufen auf dem aufrufenden Thread; die Todo-App verteilt sie
+    stattdessen auf Hintergrund- und GUI-Thread (siehe CalendarImport).
     
-    # Konvertiere alle Events zu Tasks
-    for event in events:
-        task = create_task_from_calendar_event(event)
-        calendar_tasks.append(task)
+    Args:
+        wie fetch_calendar_import
         
-        # Zusätzlich die CSV-Datei für diesen Termin erstellen
-        create_csv_for_event(event)
-    
-    # Füge alle Kalender-Tasks zur Todo-Liste hinzu
-    todo_data["tasks"].extend(calendar_tasks)
-    
-    # Aktualisierte Daten speichern
-    save_todo(todo_data)
-    
-    return len(calendar_tasks)
+    Returns:
+        int: Anzahl der neuen oder geänderten Termine, None nach Abbruch
+    """
+    report = progress or print
+    calendar_import = fetch_calendar_import(calendar_id, days_ahead, cache, report, is_cancelled)
+    if not isinstance(calendar_import, CalendarImport):
+        return calendar_import
+    num_imported = calendar_import.apply()
+    calendar_import.write()
+    
+    report(f"Termine: {calendar_import.merge.summary()}.")
+    return num_imported
 
 def main():
     """
@@ -190,7 +403,7 @@ def main():
     print("=" * 50)
     
     # Google Calendar API initialisieren
-    api = GoogleCalendarAPI()
+    api = GoogleCalendarAPI.instance()
     
     if not api.authenticate():
         print("Fehler bei der Authentifizierung mit Google Calendar.")
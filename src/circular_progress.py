@@ -1,8 +1,8 @@
 from PyQt5.QtWidgets import QWidget
-from PyQt5.QtGui import QPainter, QColor, QPen, QFont, QBrush
-from PyQt5.QtCore import Qt, QRectF, QTimer, QPointF
-import pygame
-import os
+from PyQt5.QtGui import QPainter, QColor, QPen, QFont, QBrush, QPixmap, QRegion, QFontMetrics
+from PyQt5.QtCore import Qt, QRectF, QTimer
+import math
+from audio_service import AudioService
 
 class CircularProgressWidget(QWidget):
     """
@@ -32,16 +32,23 @@ class CircularProgressWidget(QWidget):
         # Aktuelle Zeit als Text
         self.time_text = "00:00"
         
-        # Timer für Test-Animation
-        self._test_timer = None
+        # Ob der Status-Text (ARBEIT/PAUSE) unter der Zeit gezeichnet wird
+        self.show_status_text = True
+        
+        # Schriften und Metriken einmalig erzeugen statt in jedem paintEvent
+        self.time_font = QFont("Arial", 24, QFont.Bold)
+        self.status_font = QFont("Arial", 14, QFont.Bold)
+        self.time_metrics = QFontMetrics(self.time_font)
         
-        # Sound-Initialisierung
-        pygame.mixer.init()
+        # Vorgerenderter statischer Hintergrund (Scheibe + innerer weißer Kreis)
+        self._background_pixmap = None
+        self._background_key = None
         
-        # Pfade zu den Sound-Dateien
-        self.sound_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'sounds')
-        self.start_sound_path = os.path.join(self.sound_dir, 'start.wav')
-        self.end_sound_path = os.path.join(self.sound_dir, 'end.wav')
+        # Zuletzt invalidierter Zustand (Fortschrittswinkel, Zeittext, Pause), für Teil-Updates
+        self._painted_state = None
+        
+        # Timer für Test-Animation
+        self._test_timer = None
         
         # Flag für den ersten Programmstart
         self._first_time_set = True
@@ -55,6 +62,7 @@ class CircularProgressWidget(QWidget):
         self.work_time_ratio = work_ratio
         self.work_time_max = int(self.total_time_max * self.work_time_ratio)
         self.break_time_max = self.total_time_max - self.work_time_max
+        self._painted_state = None
         self.update()
     
     def explicit_start(self):
@@ -79,22 +87,12 @@ class CircularProgressWidget(QWidget):
         self.update_display()
     
     def play_start_sound(self):
-        """Spielt den Start-Sound ab."""
-        try:
-            # Sound-Objekt jedes Mal neu erstellen, um Probleme mit der Wiederverwendung zu vermeiden
-            sound = pygame.mixer.Sound(self.start_sound_path)
-            sound.play()
-        except Exception as e:
-            print(f"Fehler beim Abspielen des Start-Sounds: {e}")
+        """Spielt den Start-Sound ab (Mixer und Sounds werden beim ersten Bedarf geladen)."""
+        AudioService.instance().play("start")
     
     def play_end_sound(self):
-        """Spielt den End-Sound ab."""
-        try:
-            # Sound-Objekt jedes Mal neu erstellen, um Probleme mit der Wiederverwendung zu vermeiden
-            sound = pygame.mixer.Sound(self.end_sound_path)
-            sound.play()
-        except Exception as e:
-            print(f"Fehler beim Abspielen des End-Sounds: {e}")
+        """Spielt den End-Sound ab (aus dem vorgeladenen Sound-Cache, ohne Dateizugriff)."""
+        AudioService.instance().play("end")
     
     def update_display(self):
         """Aktualisiert die Anzeige basierend auf der aktuellen Zeit."""
@@ -113,87 +111,166 @@ class CircularProgressWidget(QWidget):
             seconds = self.current_time % 60
         
         self.time_text = f"{minutes:02}:{seconds:02}"
-        self.update()
+        self.invalidate_changes()
     
-    def paintEvent(self, event):
-        """Malt das Widget mit dem kreisförmigen Fortschrittsbalken als Tortendiagramm."""
-        painter = QPainter(self)
-        painter.setRenderHint(QPainter.Antialiasing)
-        
-        # Zentrum und Radius bestimmen
+    def ring_geometry(self):
+        """Gibt Mittelpunkt, äußeren und inneren Radius des Rings zurück."""
         width = self.width()
         height = self.height()
         center_x = width / 2
         center_y = height / 2
         diameter = min(width, height) - 40  # Margin
         radius = diameter / 2
+        inner_radius = radius * 0.7  # 70% des äußeren Radius
+        return center_x, center_y, radius, inner_radius
+    
+    def progress_angle(self):
+        """Gefüllter Winkel des Rings in Grad (im Uhrzeigersinn ab 12 Uhr)."""
+        if self.total_time_max <= 0:
+            return 0.0
+        return min(self.current_time, self.total_time_max) / self.total_time_max * 360
+    
+    def time_text_rect(self, text):
+        """Bereich, den der zentrierte Zeittext belegt."""
+        text_width = self.time_metrics.horizontalAdvance(text) + 8
+        text_height = self.time_metrics.height() + 4
+        return QRectF((self.width() - text_width) / 2, (self.height() - text_height) / 2,
+                      text_width, text_height).toAlignedRect()
+    
+    def arc_rect(self, from_angle, to_angle):
+        """Begrenzungsrechteck des Ringabschnitts zwischen zwei Fortschrittswinkeln."""
+        center_x, center_y, radius, inner_radius = self.ring_geometry()
+        
+        # Eckpunkte des Abschnitts an innerem und äußerem Radius (mindestens alle 15 Grad)
+        steps = max(1, int(math.ceil((to_angle - from_angle) / 15)))
+        xs, ys = [], []
+        for i in range(steps + 1):
+            angle = math.radians(90 - (from_angle + (to_angle - from_angle) * i / steps))
+            for r in (radius, inner_radius):
+                xs.append(center_x + r * math.cos(angle))
+                ys.append(center_y - r * math.sin(angle))
         
-        # Hintergrundkreis zeichnen
-        painter.setPen(Qt.NoPen)
-        painter.setBrush(self.bg_color)
-        painter.drawEllipse(QRectF(center_x - radius, center_y - radius, diameter, diameter))
+        return QRectF(min(xs), min(ys), max(xs) - min(xs), max(ys) - min(ys)).toAlignedRect().adjusted(-2, -2, 2, 2)
+    
+    def invalidate_changes(self):
+        """
+        Fordert ein Neuzeichnen nur für die Bereiche an, die sich seit dem letzten
+        Mal geändert haben: der neu gefüllte Ringabschnitt und der Zeittext.
+        Ohne Änderung (z.B. im Leerlauf) wird gar nichts neu gezeichnet.
+        """
+        state = (self.progress_angle(), self.time_text, self.current_time > self.work_time_max)
+        previous = self._painted_state
+        if state == previous:
+            return
+        self._painted_state = state
+        
+        # Phasenwechsel, Zurücksetzen oder große Sprünge: alles neu zeichnen
+        if previous is None or state[2] != previous[2] or state[0] < previous[0] or state[0] - previous[0] > 90:
+            self.update()
+            return
+        
+        region = QRegion()
+        if state[0] != previous[0]:
+            region += self.arc_rect(previous[0], state[0])
+        if state[1] != previous[1]:
+            region += self.time_text_rect(previous[1])
+            region += self.time_text_rect(state[1])
+        self.update(region)
+    
+    def background_pixmap(self):
+        """
+        Gibt den vorgerenderten statischen Hintergrund zurück (Hintergrundscheibe
+        und innerer weißer Kreis). Er wird nur bei Größen- oder Farbänderung neu erzeugt.
+        """
+        ratio = self.devicePixelRatioF()
+        key = (self.width(), self.height(), ratio, self.bg_color.rgba())
+        if key != self._background_key:
+            pixmap = QPixmap(int(self.width() * ratio), int(self.height() * ratio))
+            pixmap.setDevicePixelRatio(ratio)
+            pixmap.fill(Qt.transparent)
+            
+            center_x, center_y, radius, inner_radius = self.ring_geometry()
+            painter = QPainter(pixmap)
+            painter.setRenderHint(QPainter.Antialiasing)
+            painter.setPen(Qt.NoPen)
+            
+            # Hintergrundkreis
+            painter.setBrush(self.bg_color)
+            painter.drawEllipse(QRectF(center_x - radius, center_y - radius, radius * 2, radius * 2))
+            
+            # Inneren weißen Kreis (für ein "Donut"-Erscheinungsbild)
+            painter.setBrush(QBrush(Qt.white))
+            painter.drawEllipse(QRectF(center_x - inner_radius, center_y - inner_radius, inner_radius * 2, inner_radius * 2))
+            painter.end()
+            
+            self._background_pixmap = pixmap
+            self._background_key = key
+        return self._background_pixmap
+    
+    def paintEvent(self, event):
+        """
+        Malt das Widget mit dem kreisförmigen Fortschrittsbalken.
+        Der statische Hintergrund kommt aus dem Pixmap-Cache; gezeichnet werden nur
+        die Ringabschnitte und die Texte, jeweils beschnitten auf den ungültigen Bereich.
+        """
+        painter = QPainter(self)
+        painter.drawPixmap(0, 0, self.background_pixmap())
+        painter.setRenderHint(QPainter.Antialiasing)
+        
+        width = self.width()
+        height = self.height()
         
         # Bestimme, ob wir in der Arbeits- oder Pausenzeit sind
         is_break_time = self.current_time > self.work_time_max
         
-        if self.current_time > 0:
-            # Kreisausschnitt für die Arbeitszeit zeichnen
-            work_time_to_draw = min(self.current_time, self.work_time_max)
-            if work_time_to_draw > 0:
-                # Winkel berechnen (in Grad)
-                angle = work_time_to_draw / self.total_time_max * 360
-                
-                # Zeichnen des Kreisausschnitts
-                painter.setPen(Qt.NoPen)
-                painter.setBrush(QBrush(self.work_color))
-                self.drawPieSlice(painter, center_x, center_y, radius, 90, -angle)
+        progress = self.progress_angle()
+        if progress > 0:
+            # Ringabschnitt für die Arbeitszeit zeichnen
+            work_angle = self.work_time_max / self.total_time_max * 360
+            work_angle_to_draw = min(progress, work_angle)
+            if work_angle_to_draw > 0:
+                self.drawRingSegment(painter, self.work_color, 90, -work_angle_to_draw)
             
-            # Kreisausschnitt für die Pausenzeit zeichnen
-            if is_break_time:
-                break_time = self.current_time - self.work_time_max
-                break_angle = break_time / self.total_time_max * 360
-                work_angle = self.work_time_max / self.total_time_max * 360
-                
-                # Zeichnen des Pausenzeit-Kreisausschnitts
-                painter.setPen(Qt.NoPen)
-                painter.setBrush(QBrush(self.break_color))
-                self.drawPieSlice(painter, center_x, center_y, radius, 90 - work_angle, -break_angle)
-        
-        # Inneren weißen Kreis zeichnen (für ein "Donut"-Erscheinungsbild)
-        inner_radius = radius * 0.7  # 70% des äußeren Radius
-        painter.setPen(Qt.NoPen)
-        painter.setBrush(QBrush(Qt.white))
-        painter.drawEllipse(QRectF(center_x - inner_radius, center_y - inner_radius, inner_radius * 2, inner_radius * 2))
+            # Ringabschnitt für die Pausenzeit zeichnen
+            if is_break_time and progress > work_angle:
+                self.drawRingSegment(painter, self.break_color, 90 - work_angle, -(progress - work_angle))
         
-        # Zeittext zeichnen
-        painter.setPen(Qt.black)
-        font = QFont("Arial", 24, QFont.Bold)
-        painter.setFont(font)
-        painter.drawText(QRectF(0, 0, width, height), Qt.AlignCenter, self.time_text)
+        # Zeittext zeichnen (nur wenn er im neu zu zeichnenden Bereich liegt)
+        if event.rect().intersects(self.time_text_rect(self.time_text)):
+            painter.setPen(Qt.black)
+            painter.setFont(self.time_font)
+            painter.drawText(QRectF(0, 0, width, height), Qt.AlignCenter, self.time_text)
         
         # Status-Text zeichnen (Arbeit oder Pause)
-        status_text = "PAUSE" if is_break_time else "ARBEIT"
-        status_color = self.break_color if is_break_time else self.work_color
-        painter.setPen(status_color)
-        font = QFont("Arial", 14, QFont.Bold)
-        painter.setFont(font)
-        painter.drawText(QRectF(0, height/2 + 30, width, 30), Qt.AlignCenter, status_text)
-    
-    def drawPieSlice(self, painter, center_x, center_y, radius, start_angle, span_angle):
+        status_rect = QRectF(0, height/2 + 30, width, 30)
+        if self.show_status_text and event.rect().intersects(status_rect.toAlignedRect()):
+            status_text = "PAUSE" if is_break_time else "ARBEIT"
+            status_color = self.break_color if is_break_time else self.work_color
+            painter.setPen(status_color)
+            painter.setFont(self.status_font)
+            painter.drawText(status_rect, Qt.AlignCenter, status_text)
+    
+    def drawRingSegment(self, painter, color, start_angle, span_angle):
         """
-        Zeichnet einen Kreisausschnitt (Pie Slice) mit dem angegebenen Mittelpunkt,
-        Radius, Startwinkel und Spanwinkel.
+        Zeichnet einen Abschnitt des Rings zwischen innerem und äußerem Radius
+        als Bogen mit breitem Stift, sodass der innere weiße Kreis nicht
+        übermalt wird und nicht jedes Mal neu gezeichnet werden muss.
         
         :param painter: QPainter-Objekt
-        :param center_x: x-Koordinate des Mittelpunkts
-        :param center_y: y-Koordinate des Mittelpunkts
-        :param radius: Radius des Kreises
+        :param color: Farbe des Abschnitts
         :param start_angle: Startwinkel in Grad (0 = rechts, 90 = oben)
         :param span_angle: Spanwinkel in Grad (positiv = gegen den Uhrzeigersinn)
         """
-        # Den Tortenausschnitt direkt mit drawPie zeichnen
-        rect = QRectF(center_x - radius, center_y - radius, radius * 2, radius * 2)
-        painter.drawPie(rect, int(start_angle * 16), int(span_angle * 16))
+        center_x, center_y, radius, inner_radius = self.ring_geometry()
+        ring_radius = (radius + inner_radius) / 2
+        
+        pen = QPen(color, radius - inner_radius)
+        pen.setCapStyle(Qt.FlatCap)
+        painter.setPen(pen)
+        painter.setBrush(Qt.NoBrush)
+        
+        rect = QRectF(center_x - ring_radius, center_y - ring_radius, ring_radius * 2, ring_radius * 2)
+        painter.drawArc(rect, int(start_angle * 16), int(span_angle * 16))
     
     def start_test_animation(self):
         """Startet eine Test-Animation (nur für Demonstrationszwecke)."""
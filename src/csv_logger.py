@@ -1,7 +1,12 @@
 import csv
 import os
+import threading
 from datetime import datetime
 
+# Serialisiert das Anhängen an Tagesdateien mit anderen Schreibern im Prozess
+# (z.B. dem Kalenderimport, der eine Tagesdatei neu schreibt)
+DAY_FILE_LOCK = threading.Lock()
+
 class CSVLogger:
     """Kümmert sich um das Speichern der Logs in einer CSV-Datei mit aktuellem Datum als Namen."""
     
@@ -17,7 +22,9 @@ class CSVLogger:
 
     def init_csv(self):
         """Erstellt die CSV-Datei mit Header, falls sie nicht existiert."""
-        if not os.path.exists(self.file_path):
+        with DAY_FILE_LOCK:
+            if os.path.exists(self.file_path):
+                return
             with open(self.file_path, "w", newline="") as file:
                 writer = csv.writer(file)
                 writer.writerow(["Mode", "Status", "Work", "Block", "Task", "Subtask", "Timer", "Time" ])  # Kopfzeile schreiben
@@ -27,7 +34,7 @@ class CSVLogger:
         current_time = datetime.now().strftime("%H:%M:%S")
         data = [mode, status, work, block, task, subtask, timer, current_time]
         
-        with open(self.file_path, "a", newline="") as file:
+        with DAY_FILE_LOCK, open(self.file_path, "a", newline="") as file:
             writer = csv.writer(file)
             writer.writerow(data)
 
@@ -6,9 +6,11 @@ import sys
 from PyQt5.QtWidgets import QApplication, QWidget, QHBoxLayout, QSplitter
 from PyQt5.QtCore import Qt
 
-from data_processing import DataManager
+from data_models import Config, TodoManager
+from data_processing import DataManager, DataProcessor
 from visualization import BarChartApp
 from visualization_weekly import WeeklyVisualizationWidget
+from week_loader import WeekLoader
 
 class IntegratedVisualizationApp(QWidget):
     """
@@ -18,15 +20,22 @@ class IntegratedVisualizationApp(QWidget):
     def __init__(self):
         super().__init__()
         
-        # Initialize DataManager and load data
-        self.data_manager = DataManager()
-        self.data_dict, self.total_actual_times, self.start_times = self.data_manager.load_all_data()
+        # Start with an empty week; the WeekLoader fills both charts in the background
+        self.data_dict, self.total_actual_times, self.start_times = DataManager.empty_week()
         
-        # Output enhanced statistics with Todo data
-        self.data_manager.print_enhanced_statistics()
+        # Output enhanced statistics with Todo data once the first week has been loaded
+        WeekLoader.instance().week_loaded.connect(self.print_statistics)
         
         # Setup UI
         self.init_ui()
+        self.bar_chart.refresh_data()
+    
+    def print_statistics(self, snapshot):
+        """Prints the enhanced statistics of the first loaded week"""
+        WeekLoader.instance().week_loaded.disconnect(self.print_statistics)
+        todo_manager = TodoManager(Config.get_base_dir())
+        DataProcessor.print_enhanced_task_statistics(snapshot["task_totals"], snapshot["subtask_totals"], todo_manager)
+        DataProcessor.print_hacken_hustle_summary(snapshot["hacken_hustle_data"])
         
     def init_ui(self):
         """Initialize the UI with a splitter for the two visualizations"""
@@ -75,9 +84,8 @@ class CsvVisualizerCombined(QWidget):
         # Create splitter for resizable panels
         self.splitter = QSplitter(Qt.Horizontal)
         
-        # Initialize DataManager and load data
-        data_manager = DataManager()
-        data_dict, total_actual_times, start_times = data_manager.load_all_data(verbose=False)
+        # Start with an empty week; the WeekLoader fills both charts in the background
+        data_dict, total_actual_times, start_times = DataManager.empty_week()
         
         # Create and add the bar chart visualization (left side)
         self.bar_chart = BarChartApp(data_dict, total_actual_times, start_times)
@@ -95,6 +103,8 @@ class CsvVisualizerCombined(QWidget):
         
         # Set the layout
         self.setLayout(self.layout)
+        
+        self.bar_chart.refresh_data()
     
     def closeEvent(self, event):
         """Wird aufgerufen, wenn das Fenster geschlossen wird"""
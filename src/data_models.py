@@ -7,9 +7,23 @@ from datetime import datetime, timedelta
 class Config:
     """Class for all configuration settings and general helper functions"""
     
-    # Update interval in milliseconds (36 seconds)
+    # Live update interval in milliseconds (36 seconds)
+    # Only extends the currently open work interval, no files are read
     REFRESH_INTERVAL = 36000
     
+    # Fallback full reload interval in milliseconds (10 minutes)
+    # Changes to the data files are normally picked up by the DataWatcher
+    FALLBACK_REFRESH_INTERVAL = 600000
+    
+    # Delay in milliseconds for coalescing bursts of file system events
+    WATCH_DEBOUNCE_INTERVAL = 500
+    
+    # Number of computed weeks kept in the WeekLoader cache
+    WEEK_CACHE_SIZE = 16
+    
+    # Completed subtasks move from todo.json to the archive after this many days
+    ARCHIVE_AFTER_DAYS = 14
+    
     # Statische Variable für benutzerdefiniertes Datum
     custom_date = None
     
@@ -42,14 +56,34 @@ class Config:
         Config.notify_widgets()
     
     @staticmethod
-    def get_current_week_dates():
-        """Calculates dates for the current week (Monday to Sunday)"""
-        # Get today's date (or set manually for testing)
-        today = datetime.today()
+    def get_reference_date(reference_date=None):
+        """Returns the date whose week is displayed (explicit date, custom date or today)"""
+        if reference_date:
+            return reference_date
         
         # Benutze benutzerdefiniertes Datum falls vorhanden
         if Config.custom_date:
-            today = Config.custom_date
+            return Config.custom_date
+        
+        return datetime.today()
+    
+    @staticmethod
+    def shift_week(weeks):
+        """Moves the displayed week by the given number of weeks and notifies all registered widgets"""
+        reference_date = Config.get_reference_date()
+        Config.set_custom_date(reference_date + timedelta(weeks=weeks))
+    
+    @staticmethod
+    def get_week_key(reference_date=None):
+        """Returns the ISO (year, week) of the displayed week, used to identify loaded weeks"""
+        year, week, weekday = Config.get_reference_date(reference_date).isocalendar()
+        return (year, week)
+    
+    @staticmethod
+    def get_current_week_dates(reference_date=None):
+        """Calculates dates for the current week (Monday to Sunday)"""
+        # Get today's date (or the explicitly requested / custom date)
+        today = Config.get_reference_date(reference_date)
         
         # Get current ISO calendar week
         year, week, weekday = today.isocalendar()
@@ -88,53 +122,25 @@ class Config:
             return 0.0
 
 class TodoManager:
-    """Class for managing Todo data"""
+    """
+    Class for managing Todo data.
+    A lightweight view on the shared TodoStore: constructing it does not parse
+    todo.json again unless the file changed since it was last read.
+    """
     
     def __init__(self, base_dir):
-        import json
+        from todo_store import TodoStore
         
         self.base_dir = base_dir
-        self.todo_path = os.path.join(base_dir, "data", "todo.json")
+        self.store = TodoStore.for_path(os.path.join(base_dir, "data", "todo.json"))
+        self.todo_path = self.store.path
         self.todo_data = self.load_todo()
         self.task_info = self.prepare_task_info()
     
     def load_todo(self):
-        """Loads the Todo file"""
-        import json
-        
-        if os.path.exists(self.todo_path):
-            print(f"Loading Todo file: {self.todo_path}")
-            try:
-                with open(self.todo_path, "r", encoding="utf-8") as file:
-                    return json.load(file)
-            except Exception as e:
-                print(f"Error loading todo file: {e}")
-                return {"tasks": []}
-        else:
-            print(f"Todo file not found: {self.todo_path}")
-            return {"tasks": []}  # Return empty structure if no file exists
+        """Returns the Todo document (cached by the store, re-read only after changes)"""
+        return self.store.get()
     
     def prepare_task_info(self):
-        """Prepares a dictionary with task information for quick access"""
-        task_info = {}
-        for task in self.todo_data.get("tasks", []):
-            task_name = task.get("task", "")
-            if task_name:
-                task_info[task_name] = {
-                    "type": task.get("type", "N/A"),
-                    "category": task.get("category", "N/A"),
-                    "estimated_time": task.get("estimated_time", "N/A"),
-                    "color": task.get("color", "#cccccc"),  # Default color if none specified
-                    "subtasks": {}
-                }
-                
-                # Prepare subtask information
-                for subtask in task.get("subtasks", []):
-                    subtask_name = subtask.get("subtask", "")
-                    if subtask_name:
-                        task_info[task_name]["subtasks"][subtask_name] = {
-                            "status": subtask.get("status", "N/A"),
-                            "estimated_time": subtask.get("estimated_time", "N/A")
-                        }
-        
-        return task_info
\ No newline at end of file
+        """Returns the dictionary with task information for quick access (built by the store on change)"""
+        return self.store.get_task_info()
\ No newline at end of file
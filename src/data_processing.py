@@ -1,13 +1,24 @@
 # File 2: data_processing.py
 # Contains all CSV reading and data processing logic
 
-import csv
+import heapq
+import threading
+from collections import OrderedDict
 from datetime import datetime
+from operator import itemgetter
 from tabulate import tabulate
 from data_models import Config, TodoManager
+from calendar_materializer import START_TIMER, END_TIMER
+from day_file import DayFileIndex
 import os
 import json
 
+# Rows read from the end of today's file when the live bar checks for new tracker rows
+LIVE_TAIL_ROWS = 8
+
+# Processed day files kept by DataManager.load_day_csv, least recently used ones are dropped
+MAX_CACHED_DAYS = 21
+
 class DataProcessor:
     """Class for all data processing functions"""
     
@@ -18,43 +29,145 @@ class DataProcessor:
         return f"{int(hours)}h {int((hours % 1) * 60)}m"
     
     @staticmethod
-    def read_csv(file_path):
-        """Reads a CSV file and returns the data as a list of dictionaries."""
+    def time_to_seconds(time_str):
+        """Converts HH:MM:SS into seconds since midnight, None if the value cannot be parsed."""
         try:
-            with open(file_path, mode='r', encoding='utf-8') as file:
-                reader = csv.DictReader(file)
-                data = [row for row in reader]
+            parsed = datetime.strptime(time_str, "%H:%M:%S")
+        except (TypeError, ValueError):
+            return None
+        return parsed.hour * 3600 + parsed.minute * 60 + parsed.second
+    
+    @staticmethod
+    def seconds_to_time(seconds):
+        """Converts seconds since midnight back into HH:MM:SS."""
+        return f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+    
+    @staticmethod
+    def is_working(row):
+        """True for rows with Mode, Status and Work set to 1 (start of a work interval)."""
+        return int(row["Mode"]) == 1 and int(row["Status"]) == 1 and int(row["Work"]) == 1
+    
+    @staticmethod
+    def split_streams(rows):
+        """
+        Splits the rows of a day file into the tracker stream and the calendar stream.
+        A calendar event is a start row with START_TIMER directly followed by its end row
+        (see calendar_materializer); every other row was written by the tracker.
+        Both streams keep file order.
+        """
+        tracker_rows = []
+        calendar_rows = []
+        i = 0
+        while i < len(rows):
+            row = rows[i]
+            end_row = rows[i + 1] if i + 1 < len(rows) else None
+            if (end_row is not None and row["Timer"] == START_TIMER and end_row["Timer"] == END_TIMER
+                    and not row["Subtask"] and not end_row["Subtask"] and row["Task"] == end_row["Task"]
+                    and DataProcessor.is_working(row)
+                    and int(end_row["Mode"]) == 0 and int(end_row["Status"]) == 0 and int(end_row["Work"]) == 0):
+                row["Source"] = end_row["Source"] = "Calendar"
+                row["Start"] = row["Time"]
+                row["Stop"] = end_row["Time"]
+                end_row["Start"] = "False"
+                end_row["Actual Time"] = 0
+                calendar_rows.extend((row, end_row))
+                i += 2
+                continue
+            row["Source"] = "Tracker"
+            tracker_rows.append(row)
+            i += 1
+        return tracker_rows, calendar_rows
+    
+    @staticmethod
+    def sorted_runs(rows):
+        """
+        Cuts a stream into ascending runs of (seconds, row).
+        Each calendar import appends its events as one block, so a day file holds a
+        few sorted runs that heapq.merge can combine without sorting the whole day.
+        Rows with an unreadable time keep the position of the row before them.
+        """
+        run = []
+        last = 0
+        for row in rows:
+            seconds = DataProcessor.time_to_seconds(row["Time"])
+            if seconds is None:
+                seconds = last
+            if run and seconds < last:
+                yield run
+                run = []
+            run.append((seconds, row))
+            last = seconds
+        if run:
+            yield run
+    
+    @staticmethod
+    def resolve_overlaps(rows):
+        """
+        Sweep line over the intervals in start order: every interval only counts the part
+        not already covered by an earlier one, so time in which tracker and calendar (or two
+        events) overlap is counted once. "Start" becomes the start of the counted part.
+        Interval rows are copied, so the input rows are never modified.
+        """
+        resolved = []
+        covered_until = 0
+        for row in rows:
+            if row["Start"] == "False":
+                resolved.append(row)
+                continue
             
-            # Remove all rows at the beginning that are not 1,1,1
-            while data and (int(data[0]["Mode"]) != 1 or int(data[0]["Status"]) != 1 or int(data[0]["Work"]) != 1):
-                data.pop(0)
+            row = dict(row)
+            start = DataProcessor.time_to_seconds(row["Time"])
+            stop = DataProcessor.time_to_seconds(row.get("Stop"))
+            if start is None or stop is None:
+                row["Start"] = row["Time"]
+                row["Actual Time"] = 0
+            else:
+                counted_from = min(max(start, covered_until), max(start, stop))
+                row["Start"] = DataProcessor.seconds_to_time(counted_from)
+                row["Actual Time"] = max(0, stop - counted_from)
+                covered_until = max(covered_until, stop)
+            resolved.append(row)
+        return resolved
+    
+    @staticmethod
+    def read_csv(file_path):
+        """
+        Reads a day file and returns its rows as a list of dictionaries in time order.
+        Tracker rows and calendar events are separate time-ordered streams (calendar
+        events are appended whenever an import runs); they are combined with a k-way
+        merge by time and the last row is the live timer row.
+        """
+        try:
+            # Memory-mapped, with a cached line index: appended rows are the only ones parsed.
+            # The cached rows are copied because the steps below add columns
+            data = [dict(row) for row in DayFileIndex.for_path(file_path).rows()]
             
-            # Add last row for live timer
-            current_time = datetime.now().strftime("%H:%M:%S")
-            new_row = {"Mode": "0", "Status": "0", "Work": "0", "Time": current_time }
-            data.append(new_row)
+            tracker_rows, calendar_rows = DataProcessor.split_streams(data)
             
-            # Add extra columns if not present in CSV
-            for row in data:
-                row["Start"] = row["Time"] if int(row["Mode"]) == 1 and int(row["Status"]) == 1 and int(row["Work"]) == 1 else "False"
+            # Remove all tracker rows at the beginning that are not 1,1,1
+            while tracker_rows and not DataProcessor.is_working(tracker_rows[0]):
+                tracker_rows.pop(0)
             
-            # Assign "Stop" time from the next row
-            for i in range(len(data) - 1):
-                if data[i]["Start"] != "False":
-                    data[i]["Stop"] = data[i + 1]["Time"]
+            # Live timer row; an open work interval runs until now
+            current_time = datetime.now().strftime("%H:%M:%S")
+            live_row = {"Mode": "0", "Status": "0", "Work": "0", "Time": current_time,
+                        "Source": "Tracker", "Start": "False", "Actual Time": 0}
             
-            # Calculate "Actual Time"
-            for row in data:
-                try:
-                    if row["Start"] != "False":
-                        start_time = datetime.strptime(row["Start"], "%H:%M:%S")
-                        stop_time = datetime.strptime(row["Stop"], "%H:%M:%S")
-                        actual_time = (stop_time - start_time).total_seconds()
-                        row["Actual Time"] = int(actual_time)
-                    else:
-                        row["Actual Time"] = 0
-                except Exception:
+            # A work interval lasts until the next tracker row, calendar rows do not end it
+            for i, row in enumerate(tracker_rows):
+                if DataProcessor.is_working(row):
+                    row["Start"] = row["Time"]
+                    row["Stop"] = tracker_rows[i + 1]["Time"] if i + 1 < len(tracker_rows) else current_time
+                else:
+                    row["Start"] = "False"
                     row["Actual Time"] = 0
+            
+            # At equal times the tracker stream comes first (heapq.merge is stable)
+            merged = heapq.merge(*DataProcessor.sorted_runs(tracker_rows),
+                                 *DataProcessor.sorted_runs(calendar_rows),
+                                 key=itemgetter(0))
+            data = DataProcessor.resolve_overlaps(row for _, row in merged)
+            data.append(live_row)
             return data
         
         except FileNotFoundError:
@@ -64,6 +177,60 @@ class DataProcessor:
             print(f"An error occurred: {e}")
             return None
     
+    @staticmethod
+    def last_tracker_row(file_path, count=LIVE_TAIL_ROWS):
+        """
+        Returns the last tracker row among the last count rows of a day file, read
+        from the end of the file (usually only its last page); None if there is none.
+        """
+        rows = DayFileIndex.tail(file_path, count)
+        for i in range(len(rows) - 1, -1, -1):
+            row = rows[i]
+            if row["Timer"] == START_TIMER:
+                continue
+            previous = rows[i - 1] if i > 0 else None
+            if row["Timer"] == END_TIMER and not row["Subtask"] and (
+                    previous is None or (previous["Timer"] == START_TIMER and previous["Task"] == row["Task"])):
+                continue  # end row of a calendar event (at i == 0 its start row may be cut off)
+            return row
+        return None
+    
+    @staticmethod
+    def open_interval(data):
+        """Index of the tracker row whose interval is still running, None if the tracker is not working."""
+        for i in range(len(data) - 2, -1, -1):
+            if data[i].get("Source") == "Tracker":
+                return i if data[i]["Start"] != "False" else None
+        return None
+    
+    @staticmethod
+    def refresh_live_row(data):
+        """
+        Moves the live timer row of already processed data to the current time.
+        Only the open interval is extended; the overlaps are resolved again in one
+        pass over the already ordered rows. Changed rows are copied so cached data
+        is never modified.
+        """
+        if not data:
+            return data
+        
+        current_time = datetime.now().strftime("%H:%M:%S")
+        live_row = dict(data[-1])
+        live_row["Time"] = current_time
+        
+        index = DataProcessor.open_interval(data)
+        if index is None:
+            return list(data[:-1]) + [live_row]
+        
+        rows = list(data[:-1])
+        open_row = dict(rows[index])
+        open_row["Stop"] = current_time
+        rows[index] = open_row
+        
+        data = DataProcessor.resolve_overlaps(rows)
+        data.append(live_row)
+        return data
+    
     @staticmethod
     def print_csv_nicely(data, file_path):
         """Prints the CSV data in a formatted table."""
@@ -411,30 +578,20 @@ class DataProcessor:
             task_info = todo_manager.task_info.get(task, {})
             task_type = task_info.get("type", "N/A")
             category = task_info.get("category", "N/A")
-            estimated_time = task_info.get("estimated_time", "N/A")
+            estimated_time = task_info.get("estimated_time")  # Stunden, None = unbekannt
             color = task_info.get("color", "#cccccc")
             
             # Convert estimated time to hours:minutes, if possible
             est_time_display = "N/A"
-            if estimated_time != "N/A":
-                try:
-                    est_hours = float(estimated_time)
-                    est_hours_int = int(est_hours)
-                    est_minutes = int((est_hours - est_hours_int) * 60)
-                    est_time_display = f"{est_hours_int}h {est_minutes}m"
-                except ValueError:
-                    est_time_display = estimated_time
+            if estimated_time is not None:
+                est_hours_int = int(estimated_time)
+                est_minutes = int((estimated_time - est_hours_int) * 60)
+                est_time_display = f"{est_hours_int}h {est_minutes}m"
             
             # Calculate progress (actual/estimated in %)
             progress = "N/A"
-            if estimated_time != "N/A" and estimated_time != "0":
-                try:
-                    est_hours = float(estimated_time)
-                    act_hours = hours
-                    if est_hours > 0:
-                        progress = f"{(act_hours / est_hours) * 100:.1f}%"
-                except ValueError:
-                    progress = "N/A"
+            if estimated_time:
+                progress = f"{(hours / estimated_time) * 100:.1f}%"
             
             # Add row to array
             task_rows.append([
@@ -478,30 +635,20 @@ class DataProcessor:
             task_type = task_info.get("type", "N/A")
             category = task_info.get("category", "N/A")
             subtask_status = subtask_info.get("status", "N/A")
-            estimated_time = subtask_info.get("estimated_time", "N/A")
+            estimated_time = subtask_info.get("estimated_time")  # Stunden, None = unbekannt
             color = task_info.get("color", "#cccccc")
             
             # Convert estimated time to hours:minutes, if possible
             est_time_display = "N/A"
-            if estimated_time != "N/A":
-                try:
-                    est_hours = float(estimated_time)
-                    est_hours_int = int(est_hours)
-                    est_minutes = int((est_hours - est_hours_int) * 60)
-                    est_time_display = f"{est_hours_int}h {est_minutes}m"
-                except ValueError:
-                    est_time_display = estimated_time
+            if estimated_time is not None:
+                est_hours_int = int(estimated_time)
+                est_minutes = int((estimated_time - est_hours_int) * 60)
+                est_time_display = f"{est_hours_int}h {est_minutes}m"
             
             # Calculate progress (actual/estimated in %)
             progress = "N/A"
-            if estimated_time != "N/A" and estimated_time != "0":
-                try:
-                    est_hours = float(estimated_time)
-                    act_hours = hours
-                    if est_hours > 0:
-                        progress = f"{(act_hours / est_hours) * 100:.1f}%"
-                except ValueError:
-                    progress = "N/A"
+            if estimated_time:
+                progress = f"{(hours / estimated_time) * 100:.1f}%"
             
             # Add row to array
             subtask_rows.append([
@@ -549,74 +696,98 @@ class DataProcessor:
     @staticmethod
     def update_todo_with_actual_times(subtask_totals, todo_manager):
         """Aktualisiert die tatsächlichen Zeiten der Subtasks in der todo.json Datei"""
-        # Lade die aktuelle todo.json Datei
-        todo_data = todo_manager.todo_data
-        modified = False
-        
-        # Durchlaufe alle Tasks und Subtasks
-        for task in todo_data.get("tasks", []):
-            task_name = task.get("task", "")
+        # Änderungen als Journal-Operationen auf das gemeinsame Dokument anwenden (läuft auf einem
+        # Worker-Thread); die Sperre hält die Positionen bis zum Anwenden gültig
+        store = todo_manager.store
+        with store.lock:
+            ops = []
+        
+            # Durchlaufe alle Tasks und Subtasks
+            for task_position, task in enumerate(store.get().get("tasks", [])):
+                task_name = task.get("task", "")
             
-            for subtask in task.get("subtasks", []):
-                subtask_name = subtask.get("subtask", "")
+                for subtask_position, subtask in enumerate(task.get("subtasks", [])):
+                    subtask_name = subtask.get("subtask", "")
                 
-                # Suche nach den tatsächlichen Zeiten in den subtask_totals
-                key = f"{task_name}:{subtask_name}"
-                if key in subtask_totals:
-                    # Konvertiere Sekunden in Stunden
-                    hours = subtask_totals[key] / 3600
-                    # Runde auf 2 Dezimalstellen
-                    formatted_time = round(hours, 2)
+                    # Suche nach den tatsächlichen Zeiten in den subtask_totals
+                    key = f"{task_name}:{subtask_name}"
+                    if key in subtask_totals:
+                        # Konvertiere Sekunden in Stunden
+                        hours = subtask_totals[key] / 3600
+                        # Runde auf 2 Dezimalstellen
+                        formatted_time = round(hours, 2)
                     
-                    # Aktualisiere die tatsächliche Zeit, wenn sie sich unterscheidet
-                    if subtask.get("actual_time") != str(formatted_time):
-                        subtask["actual_time"] = str(formatted_time)
-                        modified = True
-        
-        # Speichere die aktualisierte todo.json Datei, falls Änderungen vorgenommen wurden
-        if modified:
-            try:
-                with open(todo_manager.todo_path, "w", encoding="utf-8") as file:
-                    json.dump(todo_data, file, indent=4)
-                print(f"Todo-Datei mit tatsächlichen Zeiten aktualisiert: {todo_manager.todo_path}")
-                return True
-            except Exception as e:
-                print(f"Fehler beim Speichern der Todo-Datei: {e}")
-                return False
+                        # Aktualisiere die tatsächliche Zeit, wenn sie sich unterscheidet
+                        if subtask.get("actual_time") != formatted_time:
+                            ops.append({
+                                "op": "set_subtask",
+                                "task": task_position,
+                                "subtask": subtask_position,
+                                "values": {"actual_time": formatted_time},
+                                "old": {"actual_time": subtask.get("actual_time")}
+                            })
+        
+            # Änderungen ins Journal der todo.json schreiben (nicht Teil des Rückgängig-Verlaufs)
+            if ops:
+                try:
+                    store.apply(ops, undoable=False)
+                    print(f"Todo-Datei mit tatsächlichen Zeiten aktualisiert: {todo_manager.todo_path}")
+                    return True
+                except Exception as e:
+                    print(f"Fehler beim Speichern der Todo-Datei: {e}")
+                    return False
         
         return False
 
 class DataManager:
     """Class for collecting and managing all data"""
     
-    def __init__(self):
-        self.week_dates = Config.get_current_week_dates()
+    # Processed day files shared by all instances and load threads: path -> ((mtime_ns, size), rows),
+    # least recently used first
+    _csv_cache = OrderedDict()
+    _csv_cache_lock = threading.Lock()
+    
+    def __init__(self, reference_date=None):
+        # The week is fixed at construction so background loads never read Config.custom_date
+        self.week_dates = Config.get_current_week_dates(reference_date)
         self.base_dir = Config.get_base_dir()
         self.data_dict = {}
         self.task_totals = {}
         self.subtask_totals = {}
         self.hacken_hustle_data = {}
+        self.task_info = {}
         
-    def load_all_data(self, verbose=True):
-        """Loads and processes all data from CSV files"""
+    def load_all_data(self, verbose=True, is_cancelled=None, update_todo=True):
+        """
+        Loads and processes all data from CSV files
+        
+        is_cancelled: optional callable; if it returns True between two files,
+        loading stops and None is returned (used by background week loads)
+        update_todo: write the subtask times of this week back to todo.json
+        (disabled for background loads of other weeks)
+        """
         
-        base_dir = Config.get_base_dir()
+        base_dir = self.base_dir
         
         # Create a TodoManager to handle todo.json operations
         todo_manager = TodoManager(base_dir)
+        self.task_info = todo_manager.task_info
         
         # Week dates for file naming
-        week_dates = Config.get_current_week_dates()
+        week_dates = self.week_dates
         
         # Load data for each day of the week
         self.data_dict = {}
         for i, (day, date_str) in enumerate(week_dates.items(), 1):
+            if is_cancelled and is_cancelled():
+                return None
+            
             csv_path = os.path.join(base_dir, "data", f"{date_str}.csv")
             
             if os.path.exists(csv_path):
                 if verbose:
                     print(f"Loading CSV file for {day}: {csv_path}")
-                csv_data = DataProcessor.read_csv(csv_path)
+                csv_data = DataManager.load_day_csv(csv_path)
                 if verbose:
                     DataProcessor.print_csv_nicely(csv_data, csv_path)
                 self.data_dict[i] = csv_data
@@ -645,8 +816,13 @@ class DataManager:
             todo_manager
         )
         
+        # A superseded load must not write its (possibly outdated) times to todo.json
+        if is_cancelled and is_cancelled():
+            return None
+        
         # Aktualisiere Todo-Daten mit den tatsächlichen Zeiten der Subtasks
-        DataProcessor.update_todo_with_actual_times(self.subtask_totals, todo_manager)
+        if update_todo:
+            DataProcessor.update_todo_with_actual_times(self.subtask_totals, todo_manager)
         
         # Output Hacken/Hustle statistics
         DataProcessor.print_hacken_hustle_summary(self.hacken_hustle_data)
@@ -657,6 +833,91 @@ class DataManager:
         # Return original return values for backward compatibility
         return self.data_dict, self.total_actual_times, self.start_times
     
+    @staticmethod
+    def empty_week():
+        """
+        Week data without any rows, as returned by load_all_data: shown until
+        the first background load of the WeekLoader arrives
+        """
+        data_dict = {day_idx: [] for day_idx in range(1, 8)}
+        return data_dict, DataProcessor.sum_actual_times(data_dict), DataProcessor.extract_start_times(data_dict)
+    
+    @staticmethod
+    def file_version(paths):
+        """Modification time and size of each path (None for missing files)"""
+        version = []
+        for path in paths:
+            try:
+                stat = os.stat(path)
+                version.append((stat.st_mtime_ns, stat.st_size))
+            except OSError:
+                version.append(None)
+        return tuple(version)
+    
+    @staticmethod
+    def get_data_version(week_dates, base_dir):
+        """
+        Returns the data version of a week: modification time and size of its
+        day files. Computed weeks are valid as long as it is unchanged; changes
+        of todo.json only refresh the task info (see refresh_task_info).
+        """
+        data_dir = os.path.join(base_dir, "data")
+        return DataManager.file_version(os.path.join(data_dir, f"{date_str}.csv") for date_str in week_dates.values())
+    
+    @staticmethod
+    def get_todo_version(base_dir):
+        """Returns the version of todo.json and its journal (modification time and size)"""
+        data_dir = os.path.join(base_dir, "data")
+        return DataManager.file_version([os.path.join(data_dir, "todo.json"),
+                                         os.path.join(data_dir, "todo.journal.jsonl")])
+    
+    @staticmethod
+    def refresh_task_info(snapshot, base_dir):
+        """
+        Returns the week snapshot with task info and Hacken/Hustle totals taken
+        from the current todo.json. The processed day data is kept as is; an
+        up-to-date snapshot is returned unchanged.
+        """
+        todo_version = DataManager.get_todo_version(base_dir)
+        if snapshot.get("todo_version") == todo_version:
+            return snapshot
+        
+        todo_manager = TodoManager(base_dir)
+        snapshot = dict(snapshot)
+        snapshot["todo_version"] = todo_version
+        snapshot["task_info"] = todo_manager.task_info
+        snapshot["hacken_hustle_data"] = DataProcessor.sum_hacken_hustle_times(snapshot["task_totals"], todo_manager)
+        return snapshot
+    
+    @staticmethod
+    def load_day_csv(csv_path):
+        """
+        Reads a day file, reusing the processed rows if the file has not
+        changed since it was last read (same modification time and size).
+        Only the live timer row is brought up to date in that case.
+        """
+        try:
+            stat = os.stat(csv_path)
+        except OSError:
+            return DataProcessor.read_csv(csv_path)
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        
+        with DataManager._csv_cache_lock:
+            cached = DataManager._csv_cache.get(csv_path)
+            if cached and cached[0] == stamp:
+                DataManager._csv_cache.move_to_end(csv_path)
+        if cached and cached[0] == stamp:
+            return DataProcessor.refresh_live_row(cached[1])
+        
+        csv_data = DataProcessor.read_csv(csv_path)
+        if csv_data is not None:
+            with DataManager._csv_cache_lock:
+                DataManager._csv_cache[csv_path] = (stamp, csv_data)
+                DataManager._csv_cache.move_to_end(csv_path)
+                while len(DataManager._csv_cache) > MAX_CACHED_DAYS:
+                    DataManager._csv_cache.popitem(last=False)
+        return csv_data
+    
     def print_enhanced_statistics(self):
         """Prints enhanced statistics with Todo data"""
         # Initialize Todo-Manager
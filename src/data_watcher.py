@@ -0,0 +1,106 @@
+# File: data_watcher.py
+# Watches the data files and notifies the visualizations when something changed
+
+import os
+from PyQt5.QtCore import QObject, QFileSystemWatcher, QTimer, pyqtSignal
+from data_models import Config
+
+
+class DataWatcher(QObject):
+    """
+    Watches the data directory, todo.json (and its journal) and the day files of the displayed week.
+    Bursts of file system events are debounced and coalesced into a single
+    data_changed signal carrying the set of changed paths.
+    """
+
+    # Emitted with the set of paths that changed since the last notification
+    data_changed = pyqtSignal(object)
+
+    _instance = None
+
+    @classmethod
+    def instance(cls):
+        """Returns the process-wide watcher shared by all widgets"""
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.base_dir = Config.get_base_dir()
+        self.data_dir = os.path.join(self.base_dir, "data")
+        self.todo_path = os.path.join(self.data_dir, "todo.json")
+        self.journal_path = os.path.join(self.data_dir, "todo.journal.jsonl")
+
+        self.pending_paths = set()
+
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.fileChanged.connect(self.on_file_changed)
+        self.watcher.directoryChanged.connect(self.on_directory_changed)
+
+        # Debounce timer: restarted on every event, fires once the burst is over
+        self.debounce_timer = QTimer(self)
+        self.debounce_timer.setSingleShot(True)
+        self.debounce_timer.setInterval(Config.WATCH_DEBOUNCE_INTERVAL)
+        self.debounce_timer.timeout.connect(self.emit_changes)
+
+        # Registriere bei Config, damit bei Datumsänderung die neue Woche beobachtet wird
+        Config.register_widget(self)
+
+        self.watch_current_week()
+
+    def week_file_paths(self):
+        """Returns the paths of todo.json, its journal and the day files of the displayed week"""
+        paths = [self.todo_path, self.journal_path]
+        for date_str in Config.get_current_week_dates().values():
+            paths.append(os.path.join(self.data_dir, f"{date_str}.csv"))
+        return paths
+
+    def watch_current_week(self):
+        """Adds watches for all existing files of the displayed week"""
+        # Das Datenverzeichnis selbst beobachten, um neu angelegte Tagesdateien zu bemerken
+        directory = self.data_dir if os.path.isdir(self.data_dir) else self.base_dir
+        if directory not in self.watcher.directories():
+            self.watcher.addPath(directory)
+
+        watched = set(self.watcher.files())
+        wanted = set(path for path in self.week_file_paths() if os.path.exists(path))
+
+        # Dateien anderer Wochen nicht mehr beobachten
+        stale = watched - wanted
+        if stale:
+            self.watcher.removePaths(list(stale))
+
+        missing = wanted - watched
+        if missing:
+            self.watcher.addPaths(list(missing))
+
+    def refresh_data(self):
+        """Called by Config.notify_widgets when the displayed week changes"""
+        self.watch_current_week()
+
+    def on_file_changed(self, path):
+        """Collects a changed file and restarts the debounce timer"""
+        # Atomares Ersetzen (temp + rename) entfernt den Watch, daher neu hinzufügen
+        if os.path.exists(path) and path not in self.watcher.files():
+            self.watcher.addPath(path)
+        self.pending_paths.add(path)
+        self.debounce_timer.start()
+
+    def on_directory_changed(self, path):
+        """A file was created, removed or renamed in the data directory"""
+        watched_before = set(self.watcher.files())
+        self.watch_current_week()
+        watched_after = set(self.watcher.files())
+
+        # Nur melden, wenn eine Datei der angezeigten Woche hinzugekommen oder verschwunden ist
+        if watched_after != watched_before:
+            self.pending_paths.update(watched_after ^ watched_before)
+            self.debounce_timer.start()
+
+    def emit_changes(self):
+        """Emits the coalesced set of changed paths"""
+        paths = self.pending_paths
+        self.pending_paths = set()
+        if paths:
+            self.data_changed.emit(paths)
@@ -0,0 +1,157 @@
+# File: day_file.py
+# Memory-mapped access to the day files (DD-MM-YY.csv) through an index of line offsets
+
+import csv
+import mmap
+import os
+import threading
+from array import array
+from collections import OrderedDict
+
+# Bytes read from the end of a file per step when looking for the last rows
+TAIL_CHUNK = mmap.PAGESIZE
+
+# Day files whose index (and parsed rows) are kept, least recently used ones are dropped
+MAX_CACHED_INDEXES = 21
+
+
+def parse_lines(header, lines):
+    """Parses raw CSV lines (bytes) into dictionaries keyed by the header, like csv.DictReader."""
+    return list(csv.DictReader((line.decode("utf-8") for line in lines if line.strip()), fieldnames=header))
+
+
+class DayFileIndex:
+    """
+    Compact index of one day file: the offset of every row.
+
+    The file is memory-mapped only while it is read, so only the pages that are
+    actually needed are touched. The index is cached per path; when the tracker
+    appends rows, only the appended bytes are scanned and parsed. A replaced file
+    (new inode) or a file that shrank is indexed again.
+
+    Indexes are shared by the week load threads and the GUI thread; each one
+    is only scanned and read while holding its lock.
+    """
+
+    _indexes = OrderedDict()  # path -> index, least recently used first
+    _indexes_lock = threading.Lock()
+
+    @classmethod
+    def for_path(cls, path):
+        """Returns the up-to-date index of a day file (FileNotFoundError if it does not exist)"""
+        with cls._indexes_lock:
+            index = cls._indexes.get(path)
+            if index is None:
+                index = cls._indexes[path] = cls(path)
+            cls._indexes.move_to_end(path)
+            while len(cls._indexes) > MAX_CACHED_INDEXES:
+                cls._indexes.popitem(last=False)
+        index.refresh()
+        return index
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.RLock()
+        self.reset()
+
+    def reset(self):
+        self.stamp = None            # (inode, mtime_ns, size) at the last scan
+        self.header = []
+        self.offsets = array("q")    # start of every data row, plus the end of the indexed part
+        self.partial = False         # the last row had no line break yet and was indexed
+        self.parsed = []             # rows parsed so far, see rows()
+
+    def refresh(self):
+        with self.lock:
+            stat = os.stat(self.path)
+            stamp = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+            if stamp == self.stamp:
+                return
+            if self.stamp is None or stamp[0] != self.stamp[0] or stat.st_size < self.stamp[2]:
+                self.reset()
+            self.scan(stat.st_size)
+            self.stamp = stamp
+
+    def scan(self, size):
+        """Indexes the rows after the indexed part of the file (caller holds the lock)"""
+        if size == 0:
+            return
+        if self.partial:
+            # The unterminated last row may have been completed since: index it again
+            self.partial = False
+            self.offsets.pop()
+            del self.parsed[len(self):]
+
+        with open(self.path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if not self.header:
+                end = mm.find(b"\n")
+                if end < 0:
+                    return
+                self.header = next(csv.reader([mm[:end].rstrip(b"\r").decode("utf-8")]), [])
+                self.offsets.append(end + 1)
+
+            position = self.offsets[-1]
+            while position < size:
+                end = mm.find(b"\n", position)
+                terminated = end >= 0
+                if not terminated:
+                    end = size
+                if mm[position:end].strip():
+                    self.offsets.append(end + 1)
+                    self.partial = not terminated
+                elif terminated:
+                    self.offsets[-1] = end + 1  # empty line: belongs to no row
+                position = end + 1
+
+    def __len__(self):
+        return len(self.offsets) - 1 if self.offsets else 0
+
+    def rows(self):
+        """
+        All rows as dictionaries, in file order. Only rows added since the last
+        call are parsed; the dictionaries are shared and must not be modified.
+        """
+        with self.lock:
+            self.parsed.extend(self.read(range(len(self.parsed), len(self))))
+            return list(self.parsed)
+
+    def read(self, numbers=None):
+        """Parses the given rows (all if None) into dictionaries, in file order"""
+        with self.lock:
+            if numbers is None:
+                numbers = range(len(self))
+            numbers = sorted(numbers)
+            if not numbers:
+                return []
+            with open(self.path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                if numbers[-1] - numbers[0] + 1 == len(numbers):
+                    # One contiguous block: a single slice of the mapping
+                    block = mm[self.offsets[numbers[0]]:self.offsets[numbers[-1] + 1]]
+                else:
+                    block = b"".join(mm[self.offsets[n]:self.offsets[n + 1]] for n in numbers)
+            return parse_lines(self.header, block.splitlines())
+
+    @staticmethod
+    def tail(path, count=1):
+        """
+        Returns the last count rows of a day file without indexing it.
+        Reads backwards from the end, so usually only the last page is touched.
+        """
+        with open(path, "rb") as file:
+            size = os.fstat(file.fileno()).st_size
+            if size == 0:
+                return []
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                header_end = mm.find(b"\n", 0, min(size, TAIL_CHUNK))
+                if header_end < 0:
+                    return []
+                header = next(csv.reader([mm[:header_end].rstrip(b"\r").decode("utf-8")]), [])
+
+                # Move back chunk by chunk until count + 1 line breaks are found
+                start = size
+                while start > header_end + 1 and mm[start - 1:size].count(b"\n") <= count:
+                    start = max(header_end + 1, start - TAIL_CHUNK)
+                lines = [line for line in mm[start:size].splitlines() if line.strip()]
+                if start > header_end + 1:
+                    lines = lines[1:]  # first line may be cut off
+        return parse_lines(header, lines[-count:])
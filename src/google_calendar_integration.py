@@ -1,22 +1,82 @@
 #!/usr/bin/env python3
 import os
 import datetime
+import json
 import pickle
-import csv
+import threading
+from contextlib import contextmanager
+from itertools import islice
 from google.auth.transport.requests import Request
 from google_auth_oauthlib.flow import InstalledAppFlow
 from googleapiclient.discovery import build
+from googleapiclient.discovery_cache.base import Cache
+from calendar_sync import CalendarSync, DEFAULT_PAGE_SIZE, iter_events, sync_calendars
+from calendar_materializer import EventMaterializer
+from data_models import Config
 
 # Berechtigungen festlegen, die wir von Google benötigen
 # Für Nur-Lese-Zugriff auf den Kalender reicht CALENDAR.READONLY
 # Wenn Sie später Termine erstellen möchten, benötigen Sie CALENDAR
 SCOPES = ['https://www.googleapis.com/auth/calendar.readonly']
 
-# Basisverzeichnis bestimmen (geht eine Ebene nach oben)
-base_dir = os.path.abspath(os.path.join(os.getcwd(), ".."))
+# Basisverzeichnis bestimmen (unabhängig vom Arbeitsverzeichnis)
+base_dir = Config.get_base_dir()
 data_dir = os.path.join(base_dir, "data")
 
+# Zwischengespeichertes Discovery-Dokument der Calendar API
+discovery_cache_path = os.path.join(data_dir, "calendar_discovery.json")
+
+class DiscoveryFileCache(Cache):
+    """
+    Speichert Discovery-Dokumente in einer Datei, damit build() nach dem
+    ersten Mal ohne Netzwerkzugriff auskommt.
+    """
+    
+    def __init__(self, path=discovery_cache_path):
+        self.path = path
+        self.lock = threading.Lock()
+    
+    def load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return {}
+    
+    def get(self, url):
+        with self.lock:
+            return self.load().get(url)
+    
+    def set(self, url, content):
+        with self.lock:
+            documents = self.load()
+            documents[url] = content
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(self.path, 'w', encoding='utf-8') as file:
+                json.dump(documents, file)
+
 class GoogleCalendarAPI:
+    """
+    Zugriff auf die Google Calendar API.
+    
+    instance() liefert einen prozessweiten Client: die Anmeldedaten werden
+    einmal geladen und nur bei Ablauf erneuert, die API-Services (samt ihrer
+    offenen HTTP-Verbindungen) liegen in einem Pool und werden für jede
+    Anfrage wiederverwendet. Ein Service ist nicht threadsicher, deshalb
+    leiht sich jeder Thread über lease_service() einen eigenen.
+    """
+    
+    _instance = None
+    _instance_lock = threading.Lock()
+    
+    @classmethod
+    def instance(cls):
+        """Gibt den von allen Importen und Dialogen gemeinsam genutzten Client zurück"""
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+    
     def __init__(self, token_path='token.pickle', credentials_path='credentials.json'):
         """
         Initialisiert die Verbindung zur Google Calendar API.
@@ -27,19 +87,30 @@ class GoogleCalendarAPI:
         """
         self.token_path = token_path
         self.credentials_path = credentials_path
-        self.service = None
+        self.creds = None
+        self.lock = threading.RLock()
+        self.idle_services = []  # Gebaute Services, die gerade kein Thread benutzt
+        self.discovery_cache = DiscoveryFileCache()
         
     def authenticate(self):
         """
-        Führt die Authentifizierung mit Google durch und erstellt den API-Service.
+        Führt die Authentifizierung mit Google durch. Gültige Anmeldedaten
+        werden wiederverwendet, abgelaufene nur dann erneuert.
         
         Returns:
             bool: True, wenn die Authentifizierung erfolgreich war, sonst False
         """
-        creds = None
+        with self.lock:
+            if self.creds and self.creds.valid:
+                return True
+            return self.load_credentials()
+    
+    def load_credentials(self):
+        """Lädt das gespeicherte Token bzw. erneuert es oder meldet neu an (unter self.lock)"""
+        creds = self.creds
         
         # Token aus vorherigen Anmeldungen laden, falls vorhanden
-        if os.path.exists(self.token_path):
+        if creds is None and os.path.exists(self.token_path):
             with open(self.token_path, 'rb') as token:
                 creds = pickle.load(token)
         
@@ -65,10 +136,37 @@ class GoogleCalendarAPI:
             with open(self.token_path, 'wb') as token:
                 pickle.dump(creds, token)
         
-        # API-Service erstellen
-        self.service = build('calendar', 'v3', credentials=creds)
+        # Neue Anmeldedaten: die Services des Pools gehören zu den alten
+        if creds is not self.creds:
+            self.idle_services = []
+        self.creds = creds
         return True
     
+    def new_service(self):
+        """
+        Erstellt einen weiteren API-Service mit den vorhandenen Anmeldedaten.
+        Das Discovery-Dokument kommt aus dem Datei-Cache.
+        """
+        return build('calendar', 'v3', credentials=self.creds, cache=self.discovery_cache)
+    
+    @contextmanager
+    def lease_service(self):
+        """
+        Leiht dem aufrufenden Thread einen Service aus dem Pool (oder baut einen
+        neuen) und gibt ihn danach samt offener HTTP-Verbindung zurück.
+        """
+        with self.lock:
+            creds = self.creds
+            service = self.idle_services.pop() if self.idle_services else None
+        if service is None:
+            service = self.new_service()
+        try:
+            yield service
+        finally:
+            with self.lock:
+                if self.creds is creds:
+                    self.idle_services.append(service)
+    
     def get_calendars(self):
         """
         Holt eine Liste aller Kalender des Benutzers.
@@ -76,11 +174,11 @@ class GoogleCalendarAPI:
         Returns:
             list: Liste von Kalender-Dicts mit 'id' und 'summary'
         """
-        if not self.service:
-            if not self.authenticate():
-                return []
+        if not self.authenticate():
+            return []
         
-        calendar_list = self.service.calendarList().list().execute()
+        with self.lease_service() as service:
+            calendar_list = service.calendarList().list().execute()
         calendars = []
         
         for calendar_entry in calendar_list.get('items', []):
@@ -91,23 +189,25 @@ class GoogleCalendarAPI:
         
         return calendars
     
-    def get_events(self, calendar_id='primary', time_min=None, time_max=None, max_results=50, create_csv=True):
+    def iter_events(self, calendar_id='primary', time_min=None, time_max=None, page_size=DEFAULT_PAGE_SIZE):
         """
-        Holt Termine aus einem Kalender innerhalb eines Zeitraums.
+        Liefert Termine aus einem Kalender innerhalb eines Zeitraums als Generator.
+        
+        Die Ergebnisse werden seitenweise über nextPageToken abgerufen; jeder
+        Termin wird geliefert, sobald seine Seite da ist. Damit werden auch
+        lange Zeiträume vollständig und mit begrenztem Speicher gelesen.
         
         Args:
             calendar_id: ID des Kalenders, 'primary' für den Hauptkalender
             time_min: Startzeit für die Terminsuche (datetime, optional)
             time_max: Endzeit für die Terminsuche (datetime, optional)
-            max_results: Maximale Anzahl der zurückgegebenen Termine (int)
-            create_csv: Ob CSV-Dateien für jeden Termin erstellt werden sollen
+            page_size: Anzahl der Termine pro API-Anfrage (int)
             
-        Returns:
-            list: Liste von Termin-Dicts mit relevanten Informationen
+        Yields:
+            dict: Termin mit relevanten Informationen
         """
-        if not self.service:
-            if not self.authenticate():
-                return []
+        if not self.authenticate():
+            return
         
         # Standardwerte für Zeitbereiche setzen
         if time_min is None:
@@ -116,50 +216,85 @@ class GoogleCalendarAPI:
             time_max = time_min + datetime.timedelta(days=30)  # 30 Tage ab jetzt
         
         # Zeiten ins ISO-Format umwandeln
-        time_min_iso = time_min.isoformat() + 'Z'  # 'Z' zeigt UTC-Zeit an
-        time_max_iso = time_max.isoformat() + 'Z'
-        
-        # Events abrufen
-        events_result = self.service.events().list(
-            calendarId=calendar_id,
-            timeMin=time_min_iso,
-            timeMax=time_max_iso,
-            maxResults=max_results,
-            singleEvents=True,
-            orderBy='startTime'
-        ).execute()
-        
-        # Events verarbeiten
-        events = []
-        for event in events_result.get('items', []):
-            # Start- und Endzeit des Termins abholen
-            start_time = event.get('start', {})
-            end_time = event.get('end', {})
-            
-            # Überprüfen, ob es sich um einen Ganztagestermin handelt
-            is_all_day = 'date' in start_time and 'date' in end_time
-            
-            # Formatiertes Event-Objekt erstellen
-            event_data = {
-                'id': event.get('id', ''),
-                'summary': event.get('summary', '(Kein Titel)'),
-                'description': event.get('description', ''),
-                'location': event.get('location', ''),
-                'is_all_day': is_all_day,
-                'start_time': start_time.get('dateTime', start_time.get('date', '')),
-                'end_time': end_time.get('dateTime', end_time.get('date', '')),
-                'creator': event.get('creator', {}).get('email', ''),
-                'attendees': [attendee.get('email', '') for attendee in event.get('attendees', [])]
-            }
+        request = {
+            'calendarId': calendar_id,
+            'timeMin': time_min.isoformat() + 'Z',  # 'Z' zeigt UTC-Zeit an
+            'timeMax': time_max.isoformat() + 'Z',
+            'singleEvents': True,
+            'orderBy': 'startTime'
+        }
+        with self.lease_service() as service:
+            yield from iter_events(service, request, page_size)
+    
+    def get_events(self, calendar_id='primary', time_min=None, time_max=None, max_results=None, create_csv=True,
+                   page_size=DEFAULT_PAGE_SIZE):
+        """
+        Holt Termine aus einem Kalender innerhalb eines Zeitraums.
+        
+        Args:
+            calendar_id: ID des Kalenders, 'primary' für den Hauptkalender
+            time_min: Startzeit für die Terminsuche (datetime, optional)
+            time_max: Endzeit für die Terminsuche (datetime, optional)
+            max_results: Maximale Anzahl der zurückgegebenen Termine (int, None = alle)
+            create_csv: Ob CSV-Dateien für jeden Termin erstellt werden sollen
+            page_size: Anzahl der Termine pro API-Anfrage (int)
             
+        Returns:
+            list: Liste von Termin-Dicts mit relevanten Informationen
+        """
+        materializer = EventMaterializer(data_dir) if create_csv else None
+        events = []
+        for event_data in islice(self.iter_events(calendar_id, time_min, time_max, page_size), max_results):
             events.append(event_data)
             
-            # CSV-Datei für diesen Termin erstellen, falls gewünscht
-            if create_csv:
-                create_csv_for_event(event_data)
+            # Termin für die CSV-Datei seines Tages vormerken (nur neue oder geänderte Termine)
+            if materializer:
+                materializer.upsert(event_data)
+        
+        # Jede betroffene Tagesdatei einmal schreiben
+        if materializer:
+            materializer.flush()
         
         return events
     
+    def sync_events(self, calendar_id='primary', time_min=None, cache=None, page_size=DEFAULT_PAGE_SIZE):
+        """
+        Gleicht den lokalen Termin-Cache eines Kalenders inkrementell ab.
+        
+        Args:
+            calendar_id: ID des Kalenders
+            time_min: Beginn des Zeitraums für die erste, volle Synchronisation (datetime, UTC)
+            cache: EventCache (Standard: data/calendar_cache.json)
+            page_size: Anzahl der Termine pro API-Anfrage (int)
+            
+        Returns:
+            SyncResult: geänderte und gelöschte Termine, None ohne Authentifizierung
+        """
+        if not self.authenticate():
+            return None
+        
+        with self.lease_service() as service:
+            return CalendarSync(service, cache, page_size).sync(calendar_id, time_min)
+    
+    def sync_calendars(self, calendar_ids, time_min=None, cache=None, page_size=DEFAULT_PAGE_SIZE, **options):
+        """
+        Gleicht die Termin-Caches mehrerer Kalender gleichzeitig ab.
+        
+        Args:
+            calendar_ids: IDs der Kalender
+            time_min: Beginn des Zeitraums für die erste, volle Synchronisation (datetime, UTC)
+            cache: EventCache (Standard: data/calendar_cache.json)
+            page_size: Anzahl der Termine pro API-Anfrage (int)
+            options: weitere Optionen von calendar_sync.sync_calendars (save, on_result, is_cancelled)
+            
+        Returns:
+            dict: Kalender-ID -> SyncResult, None ohne Authentifizierung
+        """
+        if not self.authenticate():
+            return None
+        
+        return sync_calendars(self.lease_service, calendar_ids, cache, time_min, page_size, **options)
+    
     def get_events_by_date_range(self, start_date, end_date, calendar_id='primary', create_csv=True):
         """
         Holt Termine in einem bestimmten Datumsbereich.
@@ -212,55 +347,15 @@ class GoogleCalendarAPI:
 
 def create_csv_for_event(event):
     """
-    Erstellt oder aktualisiert eine CSV-Datei für einen Termin.
+    Erstellt oder aktualisiert die Zeilen eines Termins in der CSV-Datei seines Tages.
+    Ein erneuter Aufruf für einen unveränderten Termin schreibt nichts.
     
     Args:
         event: Event-Dictionary mit Termindaten
     """
-    # Verarbeite nur Ereignisse mit einer Start- und Endzeit
-    if not event['start_time'] or not event['end_time']:
-        return
-    
-    # Parse Startzeit
-    if event['is_all_day']:
-        # Bei ganztägigen Terminen setzen wir Standardzeiten
-        start_date = datetime.date.fromisoformat(event['start_time'])
-        start_datetime = datetime.datetime.combine(start_date, datetime.time(9, 0))  # 09:00 Uhr
-        end_datetime = datetime.datetime.combine(start_date, datetime.time(17, 0))  # 17:00 Uhr
-    else:
-        # Bei zeitgebundenen Terminen verwenden wir die exakten Zeiten
-        start_datetime = datetime.datetime.fromisoformat(event['start_time'].replace('Z', '+00:00')).astimezone()
-        end_datetime = datetime.datetime.fromisoformat(event['end_time'].replace('Z', '+00:00')).astimezone()
-    
-    # Formatiere das Datum für den Dateinamen (DD-MM-YY.csv)
-    date_for_filename = start_datetime.strftime("%d-%m-%y")
-    
-    # Sorge dafür, dass das Datenverzeichnis existiert
-    os.makedirs(data_dir, exist_ok=True)
-    
-    # CSV-Dateipfad
-    csv_path = os.path.join(data_dir, f"{date_for_filename}.csv")
-    
-    # Startzeit und Endzeit im Format HH:MM:SS
-    start_time_str = start_datetime.strftime("%H:%M:%S")
-    end_time_str = end_datetime.strftime("%H:%M:%S")
-    
-    # Überprüfen, ob die Datei bereits existiert
-    file_exists = os.path.exists(csv_path)
-    
-    # Öffne die CSV-Datei im Append-Modus oder erstelle sie neu
-    with open(csv_path, 'a', newline='') as csvfile:
-        csv_writer = csv.writer(csvfile)
-        
-        # Wenn die Datei neu erstellt wurde, füge den Header hinzu
-        if not file_exists:
-            csv_writer.writerow(['Mode', 'Status', 'Work', 'Block', 'Task', 'Subtask', 'Timer', 'Time'])
-        
-        # Füge die Zeilen für den Termin hinzu
-        # Startzeile: Termin beginnt
-        csv_writer.writerow(['1', '1', '1', '1', event['summary'], '', '00:00:00', start_time_str])
-        # Endzeile: Termin endet
-        csv_writer.writerow(['0', '0', '0', '0', event['summary'], '', '0:00:00', end_time_str])
+    materializer = EventMaterializer(data_dir)
+    materializer.upsert(event)
+    materializer.flush()
 
 def format_event_time(event):
     """
@@ -330,7 +425,7 @@ def main():
     Hauptfunktion zum Testen der Google Calendar API-Integration.
     """
     # Google Calendar API initialisieren
-    calendar_api = GoogleCalendarAPI()
+    calendar_api = GoogleCalendarAPI.instance()
     
     # Authentifizieren
     if not calendar_api.authenticate():
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Intervall-Index über die Arbeitsintervalle des Trackers und die Kalendertermine.
+
+Beantwortet ohne erneutes Parsen und ohne Scan aller Zeilen:
+- Punktabfragen ("woran habe ich am Dienstag um 14:32 gearbeitet?"),
+- Überlappungsabfragen ("welche Sitzungen überschneiden sich mit diesem Termin?"),
+- Lücken (Leerlaufzeiten) in einem Zeitraum.
+
+Die Intervalle kommen aus den verarbeiteten Tagesdateien (DataProcessor.read_csv)
+und liegen nie über Mitternacht hinaus. Pro Tag genügt daher ein nach Start
+sortiertes Array mit Binärsuche; über Zeiträume hinweg wird in der sortierten
+Liste der Tage gesucht. Der Index wird einmal aufgebaut und für beliebig viele
+Abfragen wiederverwendet; update() liest nur geänderte Tagesdateien neu ein.
+"""
+
+import os
+from bisect import bisect_left, bisect_right, insort
+from collections import namedtuple
+from datetime import datetime, timedelta
+from data_models import Config
+from data_processing import DataManager, DataProcessor
+
+# Ein Intervall: Start und Ende als datetime, Quelle "Tracker" oder "Calendar"
+Interval = namedtuple("Interval", ["start", "end", "source", "task", "subtask"])
+
+
+def day_intervals(date, data):
+    """
+    Liest die Intervalle eines Tages aus den Zeilen von DataProcessor.read_csv.
+
+    Verwendet wird die tatsächliche Start- und Endzeit (Time/Stop), nicht der
+    um Überlappungen gekürzte Start, damit sich Tracker und Termine hier
+    überschneiden dürfen.
+
+    Args:
+        date: datetime.date des Tages
+        data: verarbeitete Zeilen des Tages
+
+    Returns:
+        list: Interval-Einträge, nach Start sortiert
+    """
+    intervals = []
+    midnight = datetime.combine(date, datetime.min.time())
+    for row in data or []:
+        if row.get("Start", "False") == "False":
+            continue
+        start = DataProcessor.time_to_seconds(row.get("Time"))
+        stop = DataProcessor.time_to_seconds(row.get("Stop"))
+        if start is None or stop is None or stop <= start:
+            continue
+        intervals.append(Interval(midnight + timedelta(seconds=start), midnight + timedelta(seconds=stop),
+                                  row.get("Source", "Tracker"), (row.get("Task") or "").strip(),
+                                  (row.get("Subtask") or "").strip()))
+    intervals.sort(key=lambda interval: interval.start)
+    return intervals
+
+
+class DayIntervals:
+    """Die Intervalle eines Tages, sortiert nach Start, mit Binärsuche abfragbar"""
+
+    def __init__(self, intervals):
+        self.intervals = intervals
+        self.starts = [interval.start for interval in intervals]
+        # Ein Intervall, das bei t noch läuft, hat frühestens bei t - max_length begonnen
+        self.max_length = max((interval.end - interval.start for interval in intervals), default=timedelta(0))
+
+    def overlapping(self, start, end):
+        """Intervalle, die sich mit [start, end) überschneiden"""
+        first = bisect_right(self.starts, start - self.max_length)
+        last = bisect_left(self.starts, end)
+        return [interval for interval in self.intervals[first:last] if interval.end > start]
+
+    def at(self, moment):
+        """Intervalle, die zum Zeitpunkt moment laufen"""
+        first = bisect_right(self.starts, moment - self.max_length)
+        last = bisect_right(self.starts, moment)
+        return [interval for interval in self.intervals[first:last] if interval.end > moment]
+
+
+class IntervalIndex:
+    """
+    Index über alle Tagesdateien in data/ (Dateiname DD-MM-YY.csv).
+
+    Abfragen nehmen datetime-Werte entgegen und können mit source auf
+    "Tracker" oder "Calendar" beschränkt werden.
+    """
+
+    def __init__(self, data_dir=None):
+        self.data_dir = data_dir or os.path.join(Config.get_base_dir(), "data")
+        self.days = {}        # datetime.date -> DayIntervals
+        self.day_list = []    # sortierte Tage mit Intervallen
+        self.stamps = {}      # Pfad -> (mtime_ns, size) beim letzten Einlesen
+
+    def add_day(self, date, data):
+        """Setzt die Intervalle eines Tages aus seinen verarbeiteten Zeilen (ersetzt vorhandene)"""
+        intervals = day_intervals(date, data)
+        if date in self.days:
+            del self.days[date]
+            self.day_list.remove(date)
+        if intervals:
+            self.days[date] = DayIntervals(intervals)
+            insort(self.day_list, date)
+
+    def update(self):
+        """
+        Liest neue und geänderte Tagesdateien ein und entfernt gelöschte.
+        Die heutige Datei wird immer neu eingelesen, weil ihr offenes Intervall bis jetzt läuft.
+
+        Returns:
+            int: Zahl der neu eingelesenen Tage
+        """
+        today = datetime.now().date()
+        try:
+            names = os.listdir(self.data_dir)
+        except OSError:
+            names = []
+
+        seen = set()
+        loaded = 0
+        for name in names:
+            if not name.endswith(".csv"):
+                continue
+            try:
+                date = datetime.strptime(name[:-4], "%d-%m-%y").date()
+            except ValueError:
+                continue
+            path = os.path.join(self.data_dir, name)
+            seen.add(path)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            stamp = (stat.st_mtime_ns, stat.st_size)
+            if self.stamps.get(path) == stamp and date != today:
+                continue
+            self.add_day(date, DataManager.load_day_csv(path))
+            self.stamps[path] = stamp
+            loaded += 1
+
+        for path in set(self.stamps) - seen:
+            del self.stamps[path]
+            date = datetime.strptime(os.path.basename(path)[:-4], "%d-%m-%y").date()
+            self.add_day(date, None)
+        return loaded
+
+    @classmethod
+    def load(cls, data_dir=None):
+        """Baut den Index über alle Tagesdateien auf"""
+        index = cls(data_dir)
+        index.update()
+        return index
+
+    def days_between(self, start, end):
+        """Tage mit Intervallen, die [start, end) berühren"""
+        first = bisect_left(self.day_list, start.date())
+        last = bisect_right(self.day_list, end.date())
+        return self.day_list[first:last]
+
+    def at(self, moment, source=None):
+        """Stabbing-Abfrage: alle Intervalle, die zum Zeitpunkt moment laufen"""
+        day = self.days.get(moment.date())
+        if day is None:
+            return []
+        return [interval for interval in day.at(moment) if source is None or interval.source == source]
+
+    def overlapping(self, start, end, source=None):
+        """Alle Intervalle, die sich mit [start, end) überschneiden, nach Start sortiert"""
+        result = []
+        for date in self.days_between(start, end):
+            result.extend(interval for interval in self.days[date].overlapping(start, end)
+                          if source is None or interval.source == source)
+        return result
+
+    def gaps(self, start, end, source=None, min_length=timedelta(0)):
+        """
+        Leerlaufzeiten: Abschnitte von [start, end), die von keinem Intervall abgedeckt sind.
+
+        Returns:
+            list: (Beginn, Ende) je Lücke, die länger als min_length ist
+        """
+        gaps = []
+        covered_until = start
+        # Sweep über die nach Start sortierten Intervalle
+        for interval in self.overlapping(start, end, source):
+            if interval.start > covered_until and interval.start - covered_until > min_length:
+                gaps.append((covered_until, interval.start))
+            covered_until = max(covered_until, interval.end)
+        if end > covered_until and end - covered_until > min_length:
+            gaps.append((covered_until, end))
+        return gaps
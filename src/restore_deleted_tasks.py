@@ -2,161 +2,231 @@
 import json
 import os
 import csv
-from decimal import Decimal
+from data_models import Config
+from todo_schema import Status
+from todo_store import TodoStore, update_task_totals
 
-# Basisverzeichnis bestimmen
-base_dir = os.path.abspath(os.path.join(os.getcwd(), ".."))
-todo_path = os.path.join(base_dir, "data", "todo.json")
+# Basisverzeichnis bestimmen (unabhängig vom Arbeitsverzeichnis)
+base_dir = Config.get_base_dir()
+todo_store = TodoStore.instance()
+todo_path = todo_store.path
 task_storage_path = os.path.join(base_dir, "data", "Task_storage_tracker - Tabellenblatt1.csv")
 
 def load_todo():
     """Lädt die aktuelle Todo-JSON-Datei"""
-    if os.path.exists(todo_path):
-        with open(todo_path, "r", encoding="utf-8") as file:
-            return json.load(file)
-    return {"tasks": []}
+    return todo_store.get()
 
 def save_todo(data):
-    """Speichert die aktualisierte Todo-JSON-Datei"""
-    os.makedirs(os.path.dirname(todo_path), exist_ok=True)
-    with open(todo_path, "w", encoding="utf-8") as file:
-        json.dump(data, file, indent=4)
-
-def task_exists(todo_data, task_name):
-    """Überprüft, ob ein Task bereits in der JSON-Datei existiert"""
-    for task in todo_data["tasks"]:
-        if task["task"] == task_name:
-            return True
-    return False
-
-def subtask_exists(todo_data, task_name, subtask_name):
-    """Überprüft, ob ein Subtask in einem bestimmten Task bereits existiert"""
-    for task in todo_data["tasks"]:
-        if task["task"] == task_name:
+    """Speichert die aktualisierte Todo-JSON-Datei atomar"""
+    todo_store.save(data)
+
+# Status-Codes der Task-Storage-CSV
+STATUS_CODES = {0: Status.PENDING.value, 1: Status.IN_PROGRESS.value, 2: Status.COMPLETED.value}
+
+# Standardwerte für Tasks, die beim Import neu angelegt werden
+DEFAULT_TASK = {
+    "type": "Digital",
+    "category": "Hacken",
+    "estimated_time": 0.0,
+    "actual_time": 0.0,
+    "color": "#3498db",  # Standard-Farbe
+}
+
+def seconds_to_hours(value):
+    """Wandelt eine Sekundenangabe der CSV in Stunden (float, 2 Nachkommastellen) um"""
+    try:
+        return round(int(value) / 3600, 2)
+    except (ValueError, TypeError):
+        return 0.0
+
+def read_task_storage_rows(path):
+    """
+    Liest die Task-Storage-CSV zeilenweise (Streaming) und liefert
+    (Zeilennummer, Task, Subtask, Status, geschätzte Zeit, tatsächliche Zeit).
+    Zeilen mit zu wenigen Spalten werden mit Subtask None geliefert.
+    """
+    with open(path, "r", encoding="utf-8") as file:
+        csv_reader = csv.reader(file)
+        next(csv_reader, None)  # Überspringen der Header-Zeile
+
+        for line_number, row in enumerate(csv_reader, start=2):
+            if len(row) < 6:
+                yield line_number, None, None, None, None, None
+                continue
+            try:
+                status = STATUS_CODES.get(int(row[5]), "Pending")
+            except ValueError:
+                status = Status.PENDING.value
+            actual_time = seconds_to_hours(row[6]) if len(row) >= 7 and row[6] else 0.0
+            yield line_number, row[0], row[2], status, seconds_to_hours(row[4]), actual_time
+
+
+class MergeReport:
+    """Ergebnis eines Imports: Zähler und Diff-Zeilen für die Ausgabe"""
+
+    def __init__(self):
+        self.inserted = 0
+        self.updated = 0
+        self.skipped = 0
+        self.new_tasks = 0
+        self.diff = []
+
+    def summary(self):
+        return (f"{self.inserted} eingefügt, {self.updated} aktualisiert, {self.skipped} übersprungen "
+                f"({self.new_tasks} neue Tasks)")
+
+
+class TaskMerger:
+    """
+    Führt Zeilen aus Task-Storage-CSVs in ein Todo-Dokument zusammen.
+
+    Tasks und (Task, Subtask)-Paare werden einmal indiziert, jede Zeile kostet
+    damit nur Dictionary-Zugriffe; der Import ist linear in der Größe der CSV.
+    Die Task-Summen der geänderten Tasks werden erst in finish() einmal
+    neu berechnet.
+    """
+
+    def __init__(self, todo_data, update_existing=False):
+        self.todo_data = todo_data
+        self.update_existing = update_existing
+        self.report = MergeReport()
+
+        self.tasks = {}     # Task-Name -> Task (erster Task dieses Namens)
+        self.subtasks = {}  # (Task-Name, Subtask-Name) -> Subtask
+        for task in todo_data.setdefault("tasks", []):
+            self.tasks.setdefault(task["task"], task)
+            for subtask in task.setdefault("subtasks", []):
+                self.subtasks.setdefault((task["task"], subtask["subtask"]), subtask)
+
+        self.touched = set()  # Namen der Tasks, deren Summen neu berechnet werden müssen
+
+    def ensure_task(self, task_name, **fields):
+        """Gibt den Task zurück und legt ihn (mit Standardwerten) an, falls er fehlt"""
+        task = self.tasks.get(task_name)
+        if task is None:
+            task = dict(DEFAULT_TASK, task=task_name, subtasks=[])
+            task.update(fields)
+            self.todo_data["tasks"].append(task)
+            self.tasks[task_name] = task
             for subtask in task["subtasks"]:
-                if subtask["subtask"] == subtask_name:
-                    return True
-    return False
+                self.subtasks[(task_name, subtask["subtask"])] = subtask
+            self.report.new_tasks += 1
+            self.report.diff.append(f"+ Task {task_name}")
+        return task
+
+    def merge_row(self, task_name, subtask_name, status, estimated_time, actual_time):
+        """Fügt eine Zeile ein, aktualisiert einen vorhandenen Subtask (optional) oder überspringt sie"""
+        task = self.ensure_task(task_name)
+        key = (task_name, subtask_name)
+        subtask = self.subtasks.get(key)
+
+        if subtask is None:
+            subtask = {
+                "subtask": subtask_name,
+                "status": status,
+                "estimated_time": estimated_time,
+                "actual_time": actual_time
+            }
+            task["subtasks"].append(subtask)
+            self.subtasks[key] = subtask
+            self.touched.add(task_name)
+            self.report.inserted += 1
+            self.report.diff.append(f"+ {task_name} / {subtask_name}: {status}, {estimated_time}h, {actual_time}h")
+            return
+
+        changes = {}
+        if self.update_existing:
+            new_values = {"status": status, "estimated_time": estimated_time, "actual_time": actual_time}
+            changes = {field: value for field, value in new_values.items() if subtask.get(field) != value}
+        if not changes:
+            self.report.skipped += 1
+            return
+
+        if "estimated_time" in changes or "actual_time" in changes:
+            self.touched.add(task_name)
+        details = ", ".join(f"{field} {subtask.get(field)!r} -> {value!r}" for field, value in changes.items())
+        subtask.update(changes)
+        self.report.updated += 1
+        self.report.diff.append(f"~ {task_name} / {subtask_name}: {details}")
+
+    def merge_csv(self, path):
+        """Führt alle Zeilen einer Task-Storage-CSV zusammen"""
+        for line_number, task_name, subtask_name, status, estimated_time, actual_time in read_task_storage_rows(path):
+            if subtask_name is None:
+                self.report.skipped += 1
+                self.report.diff.append(f"- {os.path.basename(path)}:{line_number}: zu wenige Spalten")
+                continue
+            self.merge_row(task_name, subtask_name, status, estimated_time, actual_time)
+
+    def finish(self):
+        """Berechnet die Summen der geänderten Tasks neu und gibt den Bericht zurück"""
+        for task_name in self.touched:
+            update_task_totals(self.tasks[task_name])
+        self.touched = set()
+        return self.report
 
-def restore_tasks_from_csv():
-    """Stellt gelöschte Tasks aus CSV-Dateien wieder her"""
-    todo_data = load_todo()
+
+def restore_tasks_from_csv(csv_paths=None, dry_run=False, update_existing=False, verbose=False):
+    """
+    Stellt gelöschte Tasks aus CSV-Dateien wieder her.
+    Mit dry_run wird nur der Bericht ausgegeben, todo.json bleibt unverändert.
+    """
+    # Auf einer Kopie arbeiten: ein Probelauf oder ein Fehler lässt das gemeinsame Dokument unberührt
+    todo_data = todo_store.copy()
+    merger = TaskMerger(todo_data, update_existing=update_existing)
     
     # Füge den "To-Do Tracker" Task hinzu, falls er nicht bereits existiert
-    if not task_exists(todo_data, "To-Do Tracker"):
-        todo_data["tasks"].append({
-            "task": "To-Do Tracker",
-            "type": "Digital",
-            "category": "Hacken",
-            "estimated_time": "2.0",
-            "actual_time": "1.8",
-            "color": "#3498db",
-            "subtasks": []
-        })
-    
-    # Lese die CSV-Datei mit den Task-Storage-Informationen
-    try:
-        with open(task_storage_path, "r", encoding="utf-8") as file:
-            csv_reader = csv.reader(file)
-            headers = next(csv_reader)  # Überspringen der Header-Zeile
-            
-            # Verarbeite jede Zeile der CSV-Datei
-            for row in csv_reader:
-                if len(row) >= 6:  # Stellen Sie sicher, dass die Zeile genügend Spalten hat
-                    task_name = row[0]
-                    subtask_name = row[2]
-                    
-                    # Konvertiere die geschätzte Zeit von Sekunden in Stunden
-                    try:
-                        estimated_time_sec = int(row[4])
-                        estimated_time = str(round(estimated_time_sec / 3600, 2))
-                    except (ValueError, IndexError):
-                        estimated_time = "0.0"
-                    
-                    # Bestimme den Status
-                    try:
-                        status_code = int(row[5])
-                        if status_code == 0:
-                            status = "Pending"
-                        elif status_code == 1:
-                            status = "In Progress"
-                        elif status_code == 2:
-                            status = "Completed"
-                        else:
-                            status = "Pending"
-                    except (ValueError, IndexError):
-                        status = "Pending"
-                    
-                    # Bestimme die tatsächliche Zeit (falls vorhanden)
-                    try:
-                        if len(row) >= 7 and row[6] and row[6] != "":
-                            actual_time_sec = int(row[6])
-                            actual_time = str(round(actual_time_sec / 3600, 2))
-                        else:
-                            actual_time = "0.0"
-                    except (ValueError, IndexError):
-                        actual_time = "0.0"
-                    
-                    # Füge den Task hinzu, wenn er noch nicht existiert
-                    if not task_exists(todo_data, task_name):
-                        todo_data["tasks"].append({
-                            "task": task_name,
-                            "type": "Digital",
-                            "category": "Hacken",
-                            "estimated_time": "0.0",
-                            "actual_time": "0.0",
-                            "color": "#3498db",  # Standard-Farbe
-                            "subtasks": []
-                        })
-                    
-                    # Füge den Subtask hinzu, wenn er noch nicht existiert
-                    if not subtask_exists(todo_data, task_name, subtask_name):
-                        for task in todo_data["tasks"]:
-                            if task["task"] == task_name:
-                                task["subtasks"].append({
-                                    "subtask": subtask_name,
-                                    "status": status,
-                                    "estimated_time": estimated_time + "h",
-                                    "actual_time": actual_time
-                                })
-                                
-                                # Aktualisiere die Gesamtzeiten des Tasks
-                                task_estimated = Decimal(task["estimated_time"] or "0")
-                                task_actual = Decimal(task["actual_time"] or "0")
-                                
-                                task_estimated += Decimal(estimated_time)
-                                task_actual += Decimal(actual_time)
-                                
-                                task["estimated_time"] = str(task_estimated)
-                                task["actual_time"] = str(task_actual)
+    merger.ensure_task("To-Do Tracker", estimated_time=2.0, actual_time=1.8)
     
-    except FileNotFoundError:
-        print(f"CSV-Datei {task_storage_path} nicht gefunden.")
-    except Exception as e:
-        print(f"Fehler beim Lesen der CSV-Datei: {e}")
+    # Lese die CSV-Dateien mit den Task-Storage-Informationen
+    for path in csv_paths or [task_storage_path]:
+        try:
+            merger.merge_csv(path)
+        except FileNotFoundError:
+            print(f"CSV-Datei {path} nicht gefunden.")
+        except Exception as e:
+            print(f"Fehler beim Lesen der CSV-Datei {path}: {e}")
     
     # Füge auch den 'Relax' Task hinzu, falls er nicht existiert
-    if not task_exists(todo_data, "Relax"):
-        todo_data["tasks"].append({
-            "task": "Relax",
-            "type": "Other",
-            "category": "Persönlich",
-            "estimated_time": "0.0",
-            "actual_time": "0.0",
-            "color": "#2ecc71",  # Eine entspannte grüne Farbe
-            "subtasks": [
-                {
-                    "subtask": "Slay",
-                    "status": "Pending",
-                    "estimated_time": "0.0h",
-                    "actual_time": "0.0"
-                }
-            ]
-        })
+    merger.ensure_task(
+        "Relax",
+        type="Other",
+        category="Persönlich",
+        color="#2ecc71",  # Eine entspannte grüne Farbe
+        subtasks=[
+            {
+                "subtask": "Slay",
+                "status": Status.PENDING.value,
+                "estimated_time": 0.0,
+                "actual_time": 0.0
+            }
+        ]
+    )
+    report = merger.finish()
+    
+    if dry_run or verbose:
+        for line in report.diff:
+            print(line)
+    print(report.summary())
     
-    # Speichere die aktualisierte JSON-Datei
+    if dry_run:
+        print("Probelauf: todo.json wurde nicht verändert.")
+        return report
+    
+    # Speichere die aktualisierte JSON-Datei (ein einziger Schreibvorgang)
     save_todo(todo_data)
     print("Gelöschte Tasks wurden erfolgreich wiederhergestellt!")
+    return report
 
 if __name__ == "__main__":
-    restore_tasks_from_csv() 
\ No newline at end of file
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Stellt Tasks aus Task-Storage-CSVs in todo.json wieder her")
+    parser.add_argument("csv_files", nargs="*", help=f"CSV-Dateien (Standard: {task_storage_path})")
+    parser.add_argument("--dry-run", action="store_true", help="Nur Änderungen anzeigen, nichts speichern")
+    parser.add_argument("--update", action="store_true", help="Vorhandene Subtasks mit den CSV-Werten aktualisieren")
+    parser.add_argument("--verbose", action="store_true", help="Alle Änderungen ausgeben")
+    args = parser.parse_args()
+
+    restore_tasks_from_csv(args.csv_files or None, dry_run=args.dry_run,
+                           update_existing=args.update, verbose=args.verbose)
@@ -4,33 +4,30 @@ import json
 from PyQt5.QtWidgets import (
     QApplication, QWidget, QVBoxLayout, QHBoxLayout, QTableWidget, QTableWidgetItem, QPushButton, 
     QHeaderView, QDialog, QLineEdit, QComboBox, QLabel, QFormLayout, QDialogButtonBox, 
-    QDoubleSpinBox, QAbstractItemView, QMenu, QTreeWidget, QTreeWidgetItem, QFrame, QMessageBox
+    QDoubleSpinBox, QAbstractItemView, QMenu, QTreeView, QFrame, QMessageBox, QShortcut
 )
-from PyQt5.QtGui import QColor, QDrag, QCursor
-from PyQt5.QtCore import Qt, QMimeData, QByteArray, QPoint
+from PyQt5.QtGui import QColor, QDrag, QCursor, QKeySequence
+from PyQt5.QtCore import Qt, QMimeData, QByteArray, QPoint, pyqtSignal
+from data_models import Config
+from todo_store import TodoStore
+from todo_schema import Status, parse_hours, parse_status
+from todo_model import TodoTreeModel, TodoItemDelegate, format_time_display
 
-latest_in_progress = ('Relax', 'Slay', '0', '0')  # (Task, Subtask, Estimated Time, Actual Time)
+# Gemeinsamer Speicher für todo.json (einmal geparst, nur nach Änderungen neu gelesen)
+todo_store = TodoStore.instance()
+todo_path = todo_store.path
 
 def get_latest_in_progress():
-    """Getter für die globale Variable"""
-    return latest_in_progress
-
-# Basisverzeichnis bestimmen
-base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-todo_path = os.path.join(base_dir, "data", "todo.json")
+    """Aktiver Subtask (Task, Subtask, Estimated Time, Actual Time) aus dem Register des Speichers, ohne Suche"""
+    return todo_store.get_active()
 
 # Datei einlesen
 def load_todo():
-    if os.path.exists(todo_path):
-        with open(todo_path, "r", encoding="utf-8") as file:
-            return json.load(file)
-    return {"tasks": []}  # Falls keine Datei existiert, leere Struktur zurückgeben
+    return todo_store.get()
 
-# Datei speichern
+# Datei vollständig speichern (neuer Snapshot, atomar: temporäre Datei + Umbenennen)
 def save_todo(data):
-    os.makedirs(os.path.dirname(todo_path), exist_ok=True)
-    with open(todo_path, "w", encoding="utf-8") as file:
-        json.dump(data, file, indent=4)
+    todo_store.save(data)
         
 # Dialog für neuen Task
 class AddTaskDialog(QDialog):
@@ -145,7 +142,8 @@ class AddSubtaskDialog(QDialog):
         self.setLayout(layout)
     
     def populate_tasks(self):
-        data = load_todo()
+        # Das Dokument im Speicher der TodoApp verwenden, falls vorhanden (enthält noch nicht gespeicherte Änderungen)
+        data = getattr(self.parent(), "todo_data", None) or load_todo()
         self.task_dropdown.clear()
         tasks = [task["task"] for task in data.get("tasks", [])]
         self.task_dropdown.addItems(tasks)
@@ -185,11 +183,8 @@ class UpdateActualTimeDialog(QDialog):
         self.actual_time_input.setDecimals(2)     # Zwei Dezimalstellen
         self.actual_time_input.setSingleStep(0.25)  # 15-Minuten-Schritte (0.25 Stunden)
         
-        # Aktuellen Wert einstellen
-        try:
-            self.actual_time_input.setValue(float(current_time))
-        except (ValueError, TypeError):
-            self.actual_time_input.setValue(0.0)
+        # Aktuellen Wert einstellen (None = unbekannt)
+        self.actual_time_input.setValue(current_time or 0.0)
         
         layout.addRow(QLabel("Task:"), self.task_label)
         layout.addRow(QLabel("Subtask:"), self.subtask_label)
@@ -204,27 +199,11 @@ class UpdateActualTimeDialog(QDialog):
         self.setLayout(layout)
     
     def get_actual_time(self):
-        """Gibt die eingegebene tatsächliche Zeit zurück"""
-        return str(self.actual_time_input.value())
+        """Gibt die eingegebene tatsächliche Zeit in Stunden zurück"""
+        return self.actual_time_input.value()
 
-# Benutzerdefinierter TreeWidgetItem für Tasks und Subtasks
-class TaskTreeItem(QTreeWidgetItem):
-    def __init__(self, parent=None, is_task=True):
-        super().__init__(parent)
-        self.is_task = is_task
-        self.task_name = ""
-        self.subtask_name = ""
-        self.color = ""
-        self.status = ""
-        self.estimated_time = ""
-        self.actual_time = ""
-        self.setFlags(self.flags() | Qt.ItemIsEditable | Qt.ItemIsDropEnabled)
-        if not is_task:
-            # Subtasks können auch gezogen werden
-            self.setFlags(self.flags() | Qt.ItemIsDragEnabled)
-
-# TreeWidget mit Drag-and-Drop-Unterstützung
-class DraggableTreeWidget(QTreeWidget):
+# TreeView mit Drag-and-Drop-Unterstützung (Verschieben als Modell-Operation)
+class TodoTreeView(QTreeView):
     def __init__(self, parent=None):
         super().__init__(parent)
         self.parent_widget = parent
@@ -235,29 +214,26 @@ class DraggableTreeWidget(QTreeWidget):
         self.setDragDropMode(QAbstractItemView.DragDrop)
         self.setSelectionMode(QAbstractItemView.SingleSelection)
         
-        # Spaltenreihenfolge anpassen
-        self.setHeaderLabels(["Task/Subtask", "Tatsächliche Zeit", "Geschätzte Zeit", "Status"])
-        
-        # Spaltenbreiten initialisieren
-        self.updateColumnWidths()
+        # Alle Zeilen gleich hoch: die View muss nur die sichtbaren Zeilen ausmessen
+        self.setUniformRowHeights(True)
         
         # Aktiviere das Editieren per Doppelklick
         self.setEditTriggers(QAbstractItemView.DoubleClicked | QAbstractItemView.EditKeyPressed)
         
         # Stil anpassen für bessere visuelle Darstellung
         self.setStyleSheet("""
-            QTreeWidget {
+            QTreeView {
                 background-color: #ffffff;
                 border: 1px solid #d1d1d1;
                 border-radius: 5px;
                 padding: 5px;
             }
-            QTreeWidget::item {
+            QTreeView::item {
                 padding: 5px;
                 margin: 2px 0;
                 border-radius: 4px;
             }
-            QTreeWidget::item:selected {
+            QTreeView::item:selected {
                 background-color: #e6f0fa;
                 border: 1px solid #a0c4e4;
                 color: black;
@@ -267,7 +243,7 @@ class DraggableTreeWidget(QTreeWidget):
     def updateColumnWidths(self):
         """Aktualisiert die Spaltenbreiten basierend auf der aktuellen Breite des Widgets"""
         total_width = self.width()
-        if total_width > 0:  # Nur aktualisieren, wenn die Breite gültig ist
+        if total_width > 0 and self.model() is not None:  # Nur aktualisieren, wenn die Breite gültig ist
             # Berechne und setze die Spaltenbreiten basierend auf Prozentangaben
             self.setColumnWidth(0, int(total_width * 0.6))  # Task/Subtask (60%)
             self.setColumnWidth(1, int(total_width * 0.1))  # Tatsächliche Zeit (10%)
@@ -283,86 +259,53 @@ class DraggableTreeWidget(QTreeWidget):
         """Überschreiben des Show-Events, um Spaltenbreiten bei erster Anzeige korrekt zu setzen"""
         super().showEvent(event)
         self.updateColumnWidths()
-            
+    
     def dropEvent(self, event):
-        if event.source() == self:
-            # Aktuelles ausgewähltes Item
-            target_item = self.itemAt(event.pos())
-            drag_item = self.currentItem()
-            
-            if not target_item or not drag_item:
-                return
-            
-            # Keine Aktion, wenn wir versuchen, auf sich selbst zu ziehen
-            if target_item == drag_item:
-                return
-            
-            # Wenn wir ein Subtask item ziehen
-            if not drag_item.is_task:
-                # Wenn wir auf einen Task ziehen, fügen wir es als dessen Subtask hinzu
-                if target_item.is_task:
-                    # Entferne das Item von seinem aktuellen Elternelement
-                    old_parent = drag_item.parent()
-                    old_parent_index = old_parent.indexOfChild(drag_item)
-                    old_parent.takeChild(old_parent_index)
-                    
-                    # Füge es dem Ziel-Task hinzu
-                    target_item.addChild(drag_item)
-                    
-                    # JSON-Daten aktualisieren
-                    self.parent_widget.update_json_from_tree()
-                # Wenn wir auf einen Subtask ziehen, fügen wir es nach diesem Subtask ein
-                else:
-                    parent_item = target_item.parent()
-                    
-                    # Nur fortfahren, wenn das Ziel ein gültiger Subtask mit einem Elternelement ist
-                    if parent_item:
-                        # Entferne das Item von seinem aktuellen Elternelement
-                        old_parent = drag_item.parent()
-                        old_parent_index = old_parent.indexOfChild(drag_item)
-                        old_parent.takeChild(old_parent_index)
-                        
-                        # Füge es nach dem Ziel-Subtask ein
-                        target_index = parent_item.indexOfChild(target_item)
-                        parent_item.insertChild(target_index + 1, drag_item)
-                        
-                        # JSON-Daten aktualisieren
-                        self.parent_widget.update_json_from_tree()
-            
-            # Wenn wir einen Task ziehen
-            elif drag_item.is_task:
-                # Wenn wir auf einen Task ziehen, ändern wir die Reihenfolge
-                if target_item.is_task:
-                    # Finde die Indizes beider Tasks auf der obersten Ebene
-                    drag_index = self.indexOfTopLevelItem(drag_item)
-                    target_index = self.indexOfTopLevelItem(target_item)
-                    
-                    # Nur fortfahren, wenn beide gültige Top-Level-Items sind
-                    if drag_index >= 0 and target_index >= 0:
-                        # Entferne das Item
-                        self.takeTopLevelItem(drag_index)
-                        
-                        # Bei gleicher Richtung einfügen
-                        if target_index > drag_index:
-                            self.insertTopLevelItem(target_index, drag_item)
-                        else:
-                            # Wenn wir nach oben ziehen, müssen wir einen Platz davor einfügen
-                            self.insertTopLevelItem(target_index, drag_item)
-                        
-                        # JSON-Daten aktualisieren
-                        self.parent_widget.update_json_from_tree()
-            
-            event.accept()
-        else:
+        if event.source() != self:
             event.ignore()
+            return
+        
+        model = self.model()
+        
+        # Ziel unter dem Mauszeiger und gezogenes Element (immer Spalte 0)
+        target = self.indexAt(event.pos())
+        drag = self.currentIndex()
+        if not target.isValid() or not drag.isValid():
+            return
+        target = target.sibling(target.row(), 0)
+        drag = drag.sibling(drag.row(), 0)
+        
+        # Keine Aktion, wenn wir versuchen, auf sich selbst zu ziehen
+        if target == drag:
+            return
+        
+        target_is_task = target.data(TodoTreeModel.IS_TASK_ROLE)
+        
+        # Wenn wir ein Subtask ziehen
+        if not drag.data(TodoTreeModel.IS_TASK_ROLE):
+            if target_is_task:
+                # Auf einen Task: als dessen letzten Subtask anhängen
+                model.move_subtask(drag, target.row())
+            else:
+                # Auf einen Subtask: direkt nach diesem Subtask einfügen
+                model.move_subtask(drag, target.parent().row(), target.row())
+        
+        # Wenn wir einen Task auf einen Task ziehen, ändern wir die Reihenfolge
+        elif target_is_task:
+            model.move_task(drag.row(), target.row())
+        
+        # Die Verschiebung ist bereits im Modell erfolgt; die View soll nichts entfernen
+        event.setDropAction(Qt.CopyAction)
+        event.accept()
     
     def contextMenuEvent(self, event):
         # Rechtsklick-Menü für zusätzliche Funktionen
-        item = self.itemAt(event.pos())
-        if item:
+        index = self.indexAt(event.pos())
+        if index.isValid():
+            index = index.sibling(index.row(), 0)
             menu = QMenu(self)
             
-            if item.is_task:
+            if index.data(TodoTreeModel.IS_TASK_ROLE):
                 # Menüoptionen für Tasks
                 add_subtask_action = menu.addAction("Subtask hinzufügen")
                 delete_task_action = menu.addAction("Task löschen")
@@ -371,11 +314,11 @@ class DraggableTreeWidget(QTreeWidget):
                 action = menu.exec_(event.globalPos())
                 
                 if action == add_subtask_action:
-                    self.parent_widget.add_subtask_to_task(item)
+                    self.parent_widget.add_subtask_to_task(index)
                 elif action == delete_task_action:
-                    self.parent_widget.delete_task(item)
+                    self.parent_widget.delete_task(index)
                 elif action == change_color_action:
-                    self.parent_widget.change_task_color(item)
+                    self.parent_widget.change_task_color(index)
             else:
                 # Menüoptionen für Subtasks
                 change_status_action = menu.addAction("Status ändern")
@@ -385,19 +328,47 @@ class DraggableTreeWidget(QTreeWidget):
                 action = menu.exec_(event.globalPos())
                 
                 if action == change_status_action:
-                    self.parent_widget.cycle_subtask_status(item)
+                    self.parent_widget.cycle_subtask_status(index)
                 elif action == edit_times_action:
-                    self.parent_widget.edit_subtask_times(item)
+                    self.parent_widget.edit_subtask_times(index)
                 elif action == delete_subtask_action:
-                    self.parent_widget.delete_subtask(item)
+                    self.parent_widget.delete_subtask(index)
 
-# GUI-Klasse mit QTreeWidget
+# GUI-Klasse mit QTreeView über dem TodoTreeModel
 class TodoApp(QWidget):
+    # Tasks mit mehr sichtbaren Subtasks starten eingeklappt und laden diese erst beim Ausklappen
+    AUTO_EXPAND_LIMIT = 50
+
+    # Der Speicher benachrichtigt auf dem Thread, der gespeichert hat; das Signal bringt es in den GUI-Thread
+    store_changed = pyqtSignal()
+    active_changed = pyqtSignal(object)
+
     def __init__(self):
         super().__init__()
 
         self.hide_completed = True  # Standardmäßig erledigte Aufgaben ausblenden
 
+        # Aktueller Stand von todo.json im Speicher; jede Änderung über das Modell
+        # wird sofort als kleine Operation ins Journal des Speichers geschrieben
+        self.todo_data = {"tasks": []}
+
+        # Beim Beenden das Journal in einen neuen Snapshot übernehmen
+        app = QApplication.instance()
+        if app is not None:
+            app.aboutToQuit.connect(self.flush_save)
+
+        # Rückgängig / Wiederholen aus dem Journal
+        QShortcut(QKeySequence.Undo, self, self.undo)
+        QShortcut(QKeySequence.Redo, self, self.redo)
+
+        # Änderungen anderer Module (z.B. Ist-Zeiten aus der Wochenauswertung) und Undo/Redo übernehmen
+        self.store_changed.connect(self.on_store_changed, Qt.QueuedConnection)
+        todo_store.subscribe(self.notify_store_changed)
+
+        # Anzeige des aktuellen Tasks folgt dem Register des aktiven Subtasks
+        self.active_changed.connect(self.update_current_task_display, Qt.QueuedConnection)
+        todo_store.subscribe_active(self.active_changed.emit)
+
         self.setWindowTitle("Todo Manager")
         self.setGeometry(100, 100, 1000, 600)  # Größere Abmessungen für den Tree-View
 
@@ -444,10 +415,17 @@ class TodoApp(QWidget):
         separator.setStyleSheet("background-color: #e0e0e0;")
         self.layout.addWidget(separator)
 
-        # TreeWidget erstellen
-        self.tree = DraggableTreeWidget(self)
+        # Modell über dem Todo-Dokument und TreeView erstellen
+        self.model = TodoTreeModel(self, store=todo_store)
+        self.tree = TodoTreeView(self)
+        self.tree.setModel(self.model)
+        self.tree.setItemDelegate(TodoItemDelegate(self.tree))
+        self.tree.updateColumnWidths()
         self.layout.addWidget(self.tree)
         
+        # Neu eingefügte Tasks ausklappen (nach der View verbunden, damit sie die Zeilen schon kennt)
+        self.model.rowsInserted.connect(self.expand_new_tasks)
+        
         # Horizontales Layout für Buttons
         button_layout = QHBoxLayout()
         
@@ -485,6 +463,7 @@ class TodoApp(QWidget):
         self.layout.addLayout(button_layout)
 
         self.setLayout(self.layout) 
+        self.archive_completed()
         self.load_data()
 
     def toggle_completed_tasks(self):
@@ -501,251 +480,89 @@ class TodoApp(QWidget):
         self.load_data()
         
     def load_data(self):
-        global latest_in_progress  # Zugriff auf die globale Variable
-        data = load_todo()
-        tasks = data.get("tasks", [])
-    
-        # Tree leeren
-        self.tree.clear()
+        self.todo_data = load_todo()
+        
+        # Das Archiv wird nur gelesen, wenn erledigte Einträge angezeigt werden sollen
+        archived_tasks = [] if self.hide_completed else todo_store.archive.load_tasks()
+        
+        # Dokument per Abgleich übernehmen: Ausklappzustand, Auswahl und Scrollposition bleiben erhalten
+        self.model.set_document(self.todo_data, self.hide_completed, archived_tasks)
         
-        # Tasks hinzufügen
-        for task in tasks:
-            task_name = task["task"]
-            task_color = task.get("color", "#3498db")
-            
-            # Task-Element erstellen
-            task_item = TaskTreeItem(None, is_task=True)
-            task_item.task_name = task_name
-            task_item.color = task_color
-            task_item.setText(0, task_name)
-            
-            # Setze Hintergrundfarbe für den Task (abgeschwächt für bessere Lesbarkeit)
-            color = QColor(task_color)
-            # Mache die Farbe heller und transparenter für den Hintergrund
-            color.setAlpha(40)  # Sehr transparent
-            task_item.setBackground(0, color)
-            
-            # Setze auch eine farbige linke Randbegrenzung
-            task_item.setForeground(0, QColor(task_color))  # Text in der Task-Farbe
-            
-            # Fett für Task-Namen
-            font = task_item.font(0)
-            font.setBold(True)
-            task_item.setFont(0, font)
-            
-            # Setze das Symbol für ein-/ausklappen explizit
-            task_item.setChildIndicatorPolicy(QTreeWidgetItem.ShowIndicator)
-            
-            # Subtasks verarbeiten
-            has_visible_subtasks = False
-            
-            # Summiere die tatsächlichen und geschätzten Zeiten für alle Subtasks
-            total_actual_time = 0.0
-            total_estimated_time = 0.0
-            
-            for subtask in task["subtasks"]:
-                subtask_name = subtask["subtask"]
-                status = subtask["status"]
-                estimated_time = subtask.get("estimated_time", "0")
-                actual_time = subtask.get("actual_time", "0")
-                
-                # Addiere zu den Gesamtsummen für den Task
-                try:
-                    total_actual_time += float(actual_time) if actual_time != "N/A" else 0.0
-                    total_estimated_time += float(estimated_time) if estimated_time != "N/A" else 0.0
-                except ValueError:
-                    pass  # Ignoriere Konvertierungsfehler
-                
-                # Überspringe, wenn "Completed" und Hide-Completed aktiviert ist
-                if self.hide_completed and status == "Completed":
-                    continue
-                
-                # Subtask-Element erstellen
-                subtask_item = TaskTreeItem(task_item, is_task=False)
-                subtask_item.task_name = task_name
-                subtask_item.subtask_name = subtask_name
-                subtask_item.status = status
-                subtask_item.estimated_time = estimated_time
-                subtask_item.actual_time = actual_time
-                
-                subtask_item.setText(0, subtask_name)
-                
-                # Formatiere die tatsächliche Zeit für die Anzeige
-                formatted_actual_time = self.format_time_display(actual_time)
-                subtask_item.setText(1, formatted_actual_time)
-                
-                # Formatiere die geschätzte Zeit für die Anzeige
-                formatted_estimated_time = self.format_time_display(estimated_time)
-                subtask_item.setText(2, formatted_estimated_time)
-                
-                subtask_item.setText(3, status)         # Status als vierte Spalte
-                
-                # Setze Hintergrundfarbe basierend auf Status
-                if status == "Completed":
-                    subtask_item.setBackground(3, QColor(144, 238, 144))  # Grün für erledigt
-                elif status == "In Progress":
-                    subtask_item.setBackground(3, QColor(255, 255, 102))  # Gelb für in Arbeit
-                    # Erweiterte Informationen für in_progress
-                    latest_in_progress = (task_name, subtask_name, estimated_time, actual_time)
-                
-                task_item.addChild(subtask_item)
-                has_visible_subtasks = True
-            
-            # Setze die summierten Zeiten für den Task
-            task_item.actual_time = str(total_actual_time)
-            task_item.estimated_time = str(total_estimated_time)
-            
-            # Zeige die summierten Zeiten für den Task an
-            formatted_total_actual = self.format_time_display(str(total_actual_time))
-            formatted_total_estimated = self.format_time_display(str(total_estimated_time))
-            
-            task_item.setText(1, formatted_total_actual)  # Tatsächliche Zeit
-            task_item.setText(2, formatted_total_estimated)  # Geschätzte Zeit
-            
-            # Nur Tasks mit sichtbaren Subtasks hinzufügen, wenn hide_completed aktiv ist
-            if has_visible_subtasks or not self.hide_completed:
-                self.tree.addTopLevelItem(task_item)
-                # Standardmäßig ausgeklappt
-                task_item.setExpanded(True)
-    
         # Zeige Informationen zum aktuellen "In Progress"-Task
-        if latest_in_progress:
-            task, subtask, est_time, act_time = latest_in_progress
-            formatted_est_time = self.format_time_display(est_time)
-            formatted_act_time = self.format_time_display(act_time)
-            
-            self.current_task_display.setText(
-                f"<b>Aktueller Task:</b> {task} &nbsp;&nbsp;&nbsp;&nbsp;&nbsp; "
-                f"<b>Subtask:</b> {subtask} &nbsp;&nbsp;&nbsp;&nbsp;&nbsp; "
-                f"<b>Geschätzte Zeit:</b> {formatted_est_time} &nbsp;&nbsp;&nbsp;&nbsp;&nbsp; "
-                f"<b>Tatsächliche Zeit:</b> {formatted_act_time}"
-            )
-        else:
-            self.current_task_display.setText("Kein aktueller Task in Bearbeitung.")
+        self.update_current_task_display()
+
+    def archive_completed(self):
+        """Verschiebt länger erledigte Subtasks und Tasks aus todo.json ins Archiv"""
+        self.flush_save()
+        try:
+            count = todo_store.archive_completed(Config.ARCHIVE_AFTER_DAYS)
+            if count:
+                print(f"{count} erledigte Subtasks archiviert: {todo_store.archive.path}")
+        except Exception as e:
+            print(f"Fehler beim Archivieren erledigter Tasks: {e}")
+
+    def expand_new_tasks(self, parent, first, last):
+        """Klappt neu eingefügte Tasks standardmäßig aus (außer sehr großen)"""
+        if parent.isValid():
+            return
+        for row in range(first, last + 1):
+            node = self.model.nodes[row]
+            if not node.archived and len(node.subtasks) <= self.AUTO_EXPAND_LIMIT:
+                self.tree.expand(self.model.index(row, 0))
 
     def format_time_display(self, time_value):
         """Formatiert einen Zeitwert für die Anzeige im Format 8.5h"""
-        if time_value == "N/A" or not time_value:
-            return "N/A"
-            
-        # Wenn der Wert bereits formatiert ist (endet mit "h"), entferne die Formatierung
-        if isinstance(time_value, str) and time_value.endswith("h"):
-            time_value = time_value[:-1]  # Entferne das "h" am Ende
-            
+        return format_time_display(time_value)
+
+    def flush_save(self):
+        """Übernimmt die Operationen des Journals in einen neuen Snapshot (todo.json)"""
         try:
-            time_float = float(time_value)
-            # Formatiere als Dezimalzahl mit einer Nachkommastelle, füge "h" hinzu
-            return f"{time_float:.1f}h"
-        except ValueError:
-            return time_value  # Bei Fehler den Originalwert zurückgeben
+            todo_store.compact()
+        except Exception as e:
+            print(f"Fehler beim Speichern der Todo-Datei: {e}")
+
+    def undo(self):
+        """Macht die letzte Änderung rückgängig (die Anzeige folgt über store_changed)"""
+        if not todo_store.undo():
+            print("Nichts rückgängig zu machen.")
+
+    def redo(self):
+        """Wiederholt die zuletzt rückgängig gemachte Änderung"""
+        if not todo_store.redo():
+            print("Nichts zu wiederholen.")
+
+    def notify_store_changed(self, document):
+        """Abonnent des TodoStore (beliebiger Thread)"""
+        self.store_changed.emit()
+
+    def on_store_changed(self):
+        """Gleicht die Anzeige mit dem Dokument ab, nachdem es außerhalb des Modells geändert wurde"""
+        self.load_data()
 
-    def update_json_from_tree(self):
-        """Aktualisiert die JSON-Datei basierend auf dem aktuellen Zustand des TreeWidget
-        und behält ausgeblendete erledigte Aufgaben bei"""
-        # Zuerst bestehende Daten laden, um ausgeblendete erledigte Aufgaben zu erhalten
-        existing_data = load_todo()
-        existing_tasks = {task["task"]: task for task in existing_data.get("tasks", [])}
-        
-        # Neue Daten vorbereiten
-        data = {"tasks": []}
-        
-        # Durchlaufe alle Top-Level-Items (Tasks)
-        for i in range(self.tree.topLevelItemCount()):
-            task_item = self.tree.topLevelItem(i)
-            task_name = task_item.text(0)
-            task_color = task_item.color
-            
-            # Subtasks aus der Baumansicht
-            visible_subtasks = []
-            for j in range(task_item.childCount()):
-                subtask_item = task_item.child(j)
-                subtask_name = subtask_item.text(0)
-                
-                # Hole die internen tatsächlichen und geschätzten Zeitwerte ohne "h"
-                actual_time = subtask_item.actual_time
-                estimated_time = subtask_item.estimated_time
-                status = subtask_item.text(3)         # Status aus vierter Spalte
-                
-                subtask_obj = {
-                    "subtask": subtask_name,
-                    "status": status,
-                    "estimated_time": estimated_time,
-                    "actual_time": actual_time
-                }
-                
-                visible_subtasks.append(subtask_obj)
-            
-            # Task-Objekt erstellen
-            task_obj = {
-                "task": task_name,
-                "type": "Digital",  # Standard oder aus den Elementen holen
-                "category": "Hacken",  # Standard oder aus den Elementen holen
-                "estimated_time": task_item.estimated_time,
-                "actual_time": task_item.actual_time,
-                "color": task_color,
-                "subtasks": []
-            }
-            
-            # Wenn der Task bereits existiert und wir erledigte Aufgaben ausblenden
-            if task_name in existing_tasks and self.hide_completed:
-                # Bestehende erledigte Subtasks beibehalten
-                existing_subtasks = existing_tasks[task_name].get("subtasks", [])
-                # Dictionary für schnellen Zugriff auf sichtbare Subtasks
-                visible_subtask_dict = {s["subtask"]: s for s in visible_subtasks}
-                
-                for subtask in existing_subtasks:
-                    subtask_name = subtask["subtask"]
-                    # Wenn es ein erledigter Subtask ist, der nicht im Tree angezeigt wird
-                    if subtask["status"] == "Completed" and subtask_name not in visible_subtask_dict:
-                        # Behalte den erledigten Subtask bei
-                        task_obj["subtasks"].append(subtask)
-            
-            # Sichtbare Subtasks hinzufügen
-            task_obj["subtasks"].extend(visible_subtasks)
-            
-            data["tasks"].append(task_obj)
-        
-        # Speichern der aktualisierten Daten
-        save_todo(data)
-        
-        # Aktualisiere die Anzeige des aktuellen Tasks
-        self.update_current_task_display()
+    def closeEvent(self, event):
+        """Beim Schließen des Fensters einen Snapshot schreiben"""
+        self.flush_save()
+        super().closeEvent(event)
 
-    def update_current_task_display(self):
-        """Aktualisiert die Anzeige des aktuellen Tasks"""
-        global latest_in_progress
-        
-        # Suche nach einem "In Progress" Subtask
-        for i in range(self.tree.topLevelItemCount()):
-            task_item = self.tree.topLevelItem(i)
-            task_name = task_item.text(0)
+    def update_current_task_display(self, active=None):
+        """Aktualisiert die Anzeige des aktuellen Tasks aus dem Register des Speichers"""
+        in_progress = todo_store.active
+        if in_progress:
+            task_name, subtask_name, estimated_time, actual_time = in_progress
             
-            for j in range(task_item.childCount()):
-                subtask_item = task_item.child(j)
-                subtask_name = subtask_item.text(0)
-                status = subtask_item.text(3)  # Status ist jetzt in Spalte 3
-                
-                if status == "In Progress":
-                    # Verwende die unformatierten Werte
-                    estimated_time = subtask_item.estimated_time
-                    actual_time = subtask_item.actual_time
-                    
-                    # Formatiere die Werte für die Anzeige
-                    formatted_estimated = self.format_time_display(estimated_time)
-                    formatted_actual = self.format_time_display(actual_time)
-                    
-                    latest_in_progress = (task_name, subtask_name, estimated_time, actual_time)
-                    
-                    self.current_task_display.setText(
-                        f"<b>Aktueller Task:</b> {task_name} &nbsp;&nbsp;&nbsp;&nbsp;&nbsp; "
-                        f"<b>Subtask:</b> {subtask_name} &nbsp;&nbsp;&nbsp;&nbsp;&nbsp; "
-                        f"<b>Geschätzte Zeit:</b> {formatted_estimated} &nbsp;&nbsp;&nbsp;&nbsp;&nbsp; "
-                        f"<b>Tatsächliche Zeit:</b> {formatted_actual}"
-                    )
-                    return
+            # Formatiere die Werte für die Anzeige
+            formatted_estimated = self.format_time_display(estimated_time)
+            formatted_actual = self.format_time_display(actual_time)
+            
+            self.current_task_display.setText(
+                f"<b>Aktueller Task:</b> {task_name} &nbsp;&nbsp;&nbsp;&nbsp;&nbsp; "
+                f"<b>Subtask:</b> {subtask_name} &nbsp;&nbsp;&nbsp;&nbsp;&nbsp; "
+                f"<b>Geschätzte Zeit:</b> {formatted_estimated} &nbsp;&nbsp;&nbsp;&nbsp;&nbsp; "
+                f"<b>Tatsächliche Zeit:</b> {formatted_actual}"
+            )
+            return
         
         # Wenn kein "In Progress" Task gefunden wurde
-        latest_in_progress = ("Relax", "Slay", "0", "0")
         self.current_task_display.setText("Kein aktueller Task in Bearbeitung.")
 
     def add_item(self):
@@ -791,17 +608,17 @@ class TodoApp(QWidget):
     
     def delete_selected_item(self):
         """Löscht das ausgewählte Item (Task oder Subtask)"""
-        selected_items = self.tree.selectedItems()
+        index = self.tree.currentIndex()
         
-        if not selected_items:
+        if not index.isValid():
             QMessageBox.information(self, "Hinweis", "Bitte wählen Sie einen Task oder Subtask aus.")
             return
-            
-        selected_item = selected_items[0]
+        index = index.sibling(index.row(), 0)
         
         # Bestätigungsdialog anzeigen
-        item_type = "Task" if selected_item.is_task else "Subtask"
-        item_name = selected_item.text(0)
+        is_task = index.data(TodoTreeModel.IS_TASK_ROLE)
+        item_type = "Task" if is_task else "Subtask"
+        item_name = index.data()
         
         reply = QMessageBox.question(
             self, 
@@ -813,10 +630,10 @@ class TodoApp(QWidget):
         
         if reply == QMessageBox.Yes:
             # Löschen durchführen
-            if selected_item.is_task:
-                self.delete_task(selected_item)
+            if is_task:
+                self.delete_task(index)
             else:
-                self.delete_subtask(selected_item)
+                self.delete_subtask(index)
 
     def add_task(self):
         dialog = AddTaskDialog(self)
@@ -830,30 +647,16 @@ class TodoApp(QWidget):
             color = next((c["hex"] for c in dialog.colors if c["name"] == color_name), "#3498db")
     
             if task_name:
-                # Task zum TreeWidget hinzufügen
-                task_item = TaskTreeItem(None, is_task=True)
-                task_item.task_name = task_name
-                task_item.color = color
-                task_item.setText(0, task_name)
-                
-                # Setze Hintergrundfarbe für den Task (abgeschwächt für bessere Lesbarkeit)
-                color_obj = QColor(color)
-                color_obj.setAlpha(40)  # Sehr transparent
-                task_item.setBackground(0, color_obj)
-                
-                # Fett für Task-Namen
-                font = task_item.font(0)
-                font.setBold(True)
-                task_item.setFont(0, font)
-                
-                # Setze das Symbol für ein-/ausklappen explizit
-                task_item.setChildIndicatorPolicy(QTreeWidgetItem.ShowIndicator)
-                
-                self.tree.addTopLevelItem(task_item)
-                task_item.setExpanded(True)
-                
-                # Aktualisiere JSON-Datei
-                self.update_json_from_tree()
+                # Task im Dokument anlegen; das Modell fügt die Zeile ein
+                self.model.add_task({
+                    "task": task_name,
+                    "type": task_type,
+                    "category": category,
+                    "estimated_time": parse_hours(estimated_time) or 0.0,
+                    "actual_time": 0.0,
+                    "color": color,
+                    "subtasks": []
+                })
 
     def add_subtask(self):
         dialog = AddSubtaskDialog(self)
@@ -864,51 +667,20 @@ class TodoApp(QWidget):
             estimated_time = dialog.estimated_time_input.text().strip()
 
             if task_name and subtask_name:
-                # Finde das entsprechende Task-Item
-                for i in range(self.tree.topLevelItemCount()):
-                    task_item = self.tree.topLevelItem(i)
-                    if task_item.text(0) == task_name:
-                        # Subtask zum Task hinzufügen
-                        subtask_item = TaskTreeItem(task_item, is_task=False)
-                        subtask_item.task_name = task_name
-                        subtask_item.subtask_name = subtask_name
-                        subtask_item.status = status
-                        subtask_item.estimated_time = estimated_time or "0"
-                        subtask_item.actual_time = "0"
-                        
-                        subtask_item.setText(0, subtask_name)
-                        
-                        # Formatierte Zeiten für die Anzeige
-                        formatted_actual = self.format_time_display("0")
-                        formatted_estimated = self.format_time_display(estimated_time or "0")
-                        
-                        subtask_item.setText(1, formatted_actual)  # Formatierte tatsächliche Zeit
-                        subtask_item.setText(2, formatted_estimated)  # Formatierte geschätzte Zeit
-                        subtask_item.setText(3, status)  # Status
-                        
-                        # Setze Hintergrundfarbe basierend auf Status
-                        if status == "Completed":
-                            subtask_item.setBackground(3, QColor(144, 238, 144))  # Grün für erledigt
-                        elif status == "In Progress":
-                            subtask_item.setBackground(3, QColor(255, 255, 102))  # Gelb für in Arbeit
-                        
-                        task_item.addChild(subtask_item)
-                        task_item.setExpanded(True)
-                        
-                        # Task-Zeiten aktualisieren
-                        self.update_task_times(task_item)
-                        
-                        # Aktualisiere JSON-Datei
-                        self.update_json_from_tree()
-                        
-                        break
+                self.model.add_subtask(task_name, {
+                    "subtask": subtask_name,
+                    "status": status,
+                    "estimated_time": parse_hours(estimated_time) or 0.0,
+                    "actual_time": 0.0
+                })
 
-    def add_subtask_to_task(self, task_item):
+    def add_subtask_to_task(self, index):
         """Fügt einen Subtask zu einem bestehenden Task hinzu"""
+        task_name = index.data()
         dialog = AddSubtaskDialog(self)
         
         # Aktuellen Task als Vorauswahl setzen
-        dialog.task_dropdown.setCurrentText(task_item.text(0))
+        dialog.task_dropdown.setCurrentText(task_name)
         dialog.task_dropdown.setEnabled(False)  # Sperren, da Task bereits vorgegeben
         
         if dialog.exec_():
@@ -917,118 +689,56 @@ class TodoApp(QWidget):
             estimated_time = dialog.estimated_time_input.text()
             
             # Verhindere Duplizierung von Subtask-Namen innerhalb eines Tasks
-            for i in range(task_item.childCount()):
-                if task_item.child(i).text(0) == subtask_name:
-                    QMessageBox.warning(self, "Warnung", 
-                                        "Ein Subtask mit diesem Namen existiert bereits für diesen Task.")
-                    return
-            
-            # Neuen Subtask hinzufügen
-            subtask_item = TaskTreeItem(task_item, is_task=False)
-            subtask_item.task_name = task_item.text(0)
-            subtask_item.subtask_name = subtask_name
-            subtask_item.status = status
-            subtask_item.estimated_time = estimated_time
-            subtask_item.actual_time = "0"  # Neue Subtasks haben 0 tatsächliche Zeit
-            
-            subtask_item.setText(0, subtask_name)
-            
-            # Formatierte Zeiten für die Anzeige
-            formatted_actual = self.format_time_display("0")
-            formatted_estimated = self.format_time_display(estimated_time)
-            
-            subtask_item.setText(1, formatted_actual)  # Formatierte tatsächliche Zeit initial 0
-            subtask_item.setText(2, formatted_estimated)  # Formatierte geschätzte Zeit
-            subtask_item.setText(3, status)  # Status
-            
-            # Setze Hintergrundfarbe basierend auf Status
-            if status == "Completed":
-                subtask_item.setBackground(3, QColor(144, 238, 144))  # Grün für erledigt
-            elif status == "In Progress":
-                subtask_item.setBackground(3, QColor(255, 255, 102))  # Gelb für in Arbeit
-            
-            task_item.addChild(subtask_item)
-            
-            # Task-Zeiten aktualisieren
-            self.update_task_times(task_item)
+            node = self.model.task_node(index)
+            if any(subtask.get("subtask") == subtask_name for subtask in node.subtasks):
+                QMessageBox.warning(self, "Warnung", 
+                                    "Ein Subtask mit diesem Namen existiert bereits für diesen Task.")
+                return
             
-            # Aktualisiere JSON-Datei
-            self.update_json_from_tree()
+            # Neue Subtasks haben 0 tatsächliche Zeit
+            self.model.add_subtask(task_name, {
+                "subtask": subtask_name,
+                "status": status,
+                "estimated_time": parse_hours(estimated_time),
+                "actual_time": 0.0
+            })
     
-    def delete_task(self, task_item):
-        """Löscht einen Task aus dem Tree und der JSON-Datei"""
-        index = self.tree.indexOfTopLevelItem(task_item)
-        if index >= 0:
-            self.tree.takeTopLevelItem(index)
-            self.update_json_from_tree()
+    def delete_task(self, index):
+        """Löscht einen Task aus dem Modell und dem Dokument"""
+        self.model.remove_task(index)
 
-    def delete_subtask(self, subtask_item):
+    def delete_subtask(self, index):
         """Löscht einen Subtask"""
-        parent_item = subtask_item.parent()
-        if parent_item:
-            parent_item.removeChild(subtask_item)
-            
-            # Task-Zeiten aktualisieren
-            self.update_task_times(parent_item)
-            
-            # JSON-Datei aktualisieren
-            self.update_json_from_tree()
+        self.model.remove_subtask(index)
 
-    def cycle_subtask_status(self, subtask_item):
+    def cycle_subtask_status(self, index):
         """Wechselt den Status eines Subtasks zwischen 'Pending', 'In Progress' und 'Completed'"""
-        current_status = subtask_item.text(3)
-        status_cycle = {"Pending": "In Progress", "In Progress": "Completed", "Completed": "Pending"}
-        next_status = status_cycle.get(current_status, "Pending")
-        
-        # Status aktualisieren
-        subtask_item.setText(3, next_status)
-        subtask_item.status = next_status
-        
-        # Hintergrundfarbe basierend auf neuem Status setzen
-        if next_status == "Completed":
-            subtask_item.setBackground(3, QColor(144, 238, 144))  # Grün für erledigt
-        elif next_status == "In Progress":
-            subtask_item.setBackground(3, QColor(255, 255, 102))  # Gelb für in Arbeit
-        else:
-            subtask_item.setBackground(3, QColor())  # Standardfarbe für Pending
-        
-        # Task-Zeiten aktualisieren
-        parent_item = subtask_item.parent()
-        if parent_item:
-            self.update_task_times(parent_item)
-        
-        # Aktualisiere JSON-Datei
-        self.update_json_from_tree()
-
-    def edit_subtask_times(self, subtask_item):
+        current_status = index.data(TodoTreeModel.STATUS_ROLE)
+        status_cycle = {
+            Status.PENDING: Status.IN_PROGRESS,
+            Status.IN_PROGRESS: Status.COMPLETED,
+            Status.COMPLETED: Status.PENDING,
+        }
+        next_status = status_cycle.get(parse_status(current_status), Status.PENDING).value
+        
+        # Status im Dokument ändern; Farbe zeichnet der Delegate, Task-Zeiten aktualisiert das Modell
+        self.model.set_subtask_field(index, "status", next_status)
+
+    def edit_subtask_times(self, index):
         """Bearbeitet die geschätzte und tatsächliche Zeit eines Subtasks"""
+        subtask = self.model.subtask(index)
         dialog = UpdateActualTimeDialog(
-            subtask_item.task_name, 
-            subtask_item.subtask_name, 
-            subtask_item.actual_time,  # Übergebe den unformatierten Wert
+            self.model.task_node(index).task.get("task", ""), 
+            subtask.get("subtask", ""), 
+            subtask.get("actual_time"),  # Stunden (None = unbekannt)
             self
         )
         
         if dialog.exec_():
-            # Erhalte den unformatierten numerischen Wert
-            actual_time = dialog.get_actual_time()
-            
-            # Speichere den unformatierten Wert in der Eigenschaft
-            subtask_item.actual_time = actual_time
-            
-            # Zeige den formatierten Wert in der UI an
-            formatted_time = self.format_time_display(actual_time)
-            subtask_item.setText(1, formatted_time)
-            
-            # Task-Zeiten aktualisieren
-            parent_item = subtask_item.parent()
-            if parent_item:
-                self.update_task_times(parent_item)
-            
-            # Aktualisiere JSON-Datei
-            self.update_json_from_tree()
+            # Speichere den numerischen Wert (Stunden) im Dokument
+            self.model.set_subtask_field(index, "actual_time", dialog.get_actual_time())
 
-    def change_task_color(self, task_item):
+    def change_task_color(self, index):
         """Ändert die Farbe eines Tasks"""
         dialog = QDialog(self)
         dialog.setWindowTitle("Task-Farbe ändern")
@@ -1068,18 +778,7 @@ class TodoApp(QWidget):
             color = next((c["hex"] for c in colors if c["name"] == color_name), "#3498db")
             
             # Farbe des Tasks aktualisieren
-            task_item.color = color
-            
-            # Setze Hintergrundfarbe für den Task (abgeschwächt für bessere Lesbarkeit)
-            color_obj = QColor(color)
-            color_obj.setAlpha(40)  # Sehr transparent
-            task_item.setBackground(0, color_obj)
-            
-            # Textfarbe auch aktualisieren
-            task_item.setForeground(0, QColor(color))
-            
-            # Aktualisiere JSON-Datei
-            self.update_json_from_tree()
+            self.model.set_task_color(index, color)
 
     def resizeEvent(self, event):
         """Überschreiben des Resize-Events, um Spaltenbreiten im Tree anzupassen"""
@@ -1090,51 +789,19 @@ class TodoApp(QWidget):
 
     def change_selected_subtask_status(self):
         """Ändert den Status des aktuell ausgewählten Subtasks"""
-        selected_items = self.tree.selectedItems()
+        index = self.tree.currentIndex()
         
-        if not selected_items:
+        if not index.isValid():
             QMessageBox.information(self, "Hinweis", "Bitte wählen Sie einen Subtask aus.")
             return
-            
-        selected_item = selected_items[0]
+        index = index.sibling(index.row(), 0)
         
         # Prüfen, ob es sich um einen Subtask handelt
-        if not selected_item.is_task:
-            self.cycle_subtask_status(selected_item)
+        if not index.data(TodoTreeModel.IS_TASK_ROLE):
+            self.cycle_subtask_status(index)
         else:
             QMessageBox.information(self, "Hinweis", "Status kann nur für Subtasks geändert werden.")
 
-    def update_task_times(self, task_item):
-        """Aktualisiert die summierten Zeiten eines Tasks basierend auf seinen Subtasks"""
-        total_actual_time = 0.0
-        total_estimated_time = 0.0
-        
-        # Alle Subtasks durchgehen und Zeiten summieren
-        for j in range(task_item.childCount()):
-            subtask_item = task_item.child(j)
-            
-            # Aktuelle Werte der Subtasks holen
-            try:
-                actual_time = subtask_item.actual_time
-                estimated_time = subtask_item.estimated_time
-                
-                # Zu Summen addieren
-                total_actual_time += float(actual_time) if actual_time != "N/A" else 0.0
-                total_estimated_time += float(estimated_time) if estimated_time != "N/A" else 0.0
-            except (ValueError, AttributeError):
-                pass  # Fehler beim Konvertieren ignorieren
-        
-        # Werte im Task-Item aktualisieren
-        task_item.actual_time = str(total_actual_time)
-        task_item.estimated_time = str(total_estimated_time)
-        
-        # UI aktualisieren
-        formatted_total_actual = self.format_time_display(str(total_actual_time))
-        formatted_total_estimated = self.format_time_display(str(total_estimated_time))
-        
-        task_item.setText(1, formatted_total_actual)
-        task_item.setText(2, formatted_total_estimated)
-
 # Anwendung starten
 if __name__ == "__main__":
     app = QApplication(sys.argv)
@@ -6,24 +6,106 @@ um Google Calendar-Funktionalitäten.
 """
 
 import sys
-from PyQt5.QtWidgets import QApplication, QMessageBox, QPushButton, QHBoxLayout, QDialog, QVBoxLayout, QFormLayout, QLabel, QComboBox, QLineEdit, QDialogButtonBox
-from PyQt5.QtCore import Qt
+from PyQt5.QtWidgets import QApplication, QMessageBox, QPushButton, QHBoxLayout, QDialog, QVBoxLayout, QFormLayout, QLabel, QListWidget, QListWidgetItem, QAbstractItemView, QLineEdit, QDialogButtonBox, QProgressDialog
+from PyQt5.QtCore import Qt, QObject, QRunnable, QThreadPool, pyqtSignal
 from todo_manager import TodoApp, load_todo, save_todo
 
 # Ergänzungen für die Google Calendar-Integration
 from google_calendar_integration import GoogleCalendarAPI
-from calendar_todo_integration import import_calendar_events_to_todo
+from calendar_todo_integration import CalendarImport, fetch_calendar_import
+
+class CalendarJobSignals(QObject):
+    """Signale der Kalender-Jobs (QRunnable selbst kann keine Signale senden)"""
+    
+    # Liste der Kalender (Dicts mit 'id' und 'summary'), None ohne Authentifizierung
+    calendars_loaded = pyqtSignal(object)
+    # Zwischenstand des Imports als Text
+    progress = pyqtSignal(str)
+    # Synchronisierte Termine (CalendarImport), zur Übernahme auf dem GUI-Thread
+    fetched = pyqtSignal(object)
+    # Anzahl der importierten Termine, None nach Abbruch
+    finished = pyqtSignal(object)
+    # Fehlermeldung
+    failed = pyqtSignal(str)
+
+class CalendarListJob(QRunnable):
+    """Authentifiziert sich und lädt die Kalenderliste auf einem Pool-Thread"""
+    
+    def __init__(self, api):
+        super().__init__()
+        self.api = api
+        self.signals = CalendarJobSignals()
+    
+    def run(self):
+        try:
+            calendars = self.api.get_calendars() if self.api.authenticate() else None
+        except Exception as e:
+            self.signals.failed.emit(str(e))
+            return
+        self.signals.calendars_loaded.emit(calendars)
+
+class CalendarImportJob(QRunnable):
+    """
+    Synchronisiert die Kalender (Netzwerk) auf einem Pool-Thread, damit
+    Oberfläche, Timer und Gesichtserkennung weiterlaufen. Das Ergebnis kommt
+    über signals.fetched; übernommen wird es auf dem GUI-Thread, der auch das
+    Todo-Modell liest. Zwischenstände kommen über signals.progress, cancel()
+    bricht vor dem Schreiben ab.
+    """
+    
+    def __init__(self, calendar_ids, days_ahead):
+        super().__init__()
+        self.calendar_ids = calendar_ids
+        self.days_ahead = days_ahead
+        self.cancelled = False
+        self.signals = CalendarJobSignals()
+    
+    def cancel(self):
+        self.cancelled = True
+    
+    def run(self):
+        try:
+            calendar_import = fetch_calendar_import(
+                self.calendar_ids,
+                self.days_ahead,
+                progress=self.signals.progress.emit,
+                is_cancelled=lambda: self.cancelled
+            )
+        except Exception as e:
+            self.signals.failed.emit(str(e))
+            return
+        if isinstance(calendar_import, CalendarImport):
+            self.signals.fetched.emit(calendar_import)
+        else:
+            self.signals.finished.emit(calendar_import)
+
+class CalendarWriteJob(QRunnable):
+    """Schreibt die Tages-CSVs und den Cache eines übernommenen Imports auf einem Pool-Thread"""
+    
+    def __init__(self, calendar_import, num_imported):
+        super().__init__()
+        self.calendar_import = calendar_import
+        self.num_imported = num_imported
+        self.signals = CalendarJobSignals()
+    
+    def run(self):
+        try:
+            self.calendar_import.write()
+        except Exception as e:
+            self.signals.failed.emit(str(e))
+            return
+        self.signals.finished.emit(self.num_imported)
 
 class CalendarImportDialog(QDialog):
-    """Dialog zur Auswahl von Kalender und Zeitraum für den Import."""
+    """Dialog zur Auswahl der Kalender und des Zeitraums für den Import."""
     
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setWindowTitle("Kalender importieren")
         self.setMinimumWidth(400)
         
-        # Google Calendar API initialisieren
-        self.api = GoogleCalendarAPI()
+        # Gemeinsamen Google Calendar-Client verwenden (bereits angemeldet nach dem ersten Mal)
+        self.api = GoogleCalendarAPI.instance()
         self.calendars = []
         
         # Button-Stil vom Hauptfenster übernehmen, falls verfügbar
@@ -40,9 +122,10 @@ class CalendarImportDialog(QDialog):
         # Formular für Kalender- und Zeitraumauswahl
         form_layout = QFormLayout()
         
-        # Kalenderauswahl
-        self.calendar_dropdown = QComboBox()
-        form_layout.addRow(QLabel("Kalender:"), self.calendar_dropdown)
+        # Kalenderauswahl (mehrere Kalender möglich)
+        self.calendar_list = QListWidget()
+        self.calendar_list.setSelectionMode(QAbstractItemView.MultiSelection)
+        form_layout.addRow(QLabel("Kalender:"), self.calendar_list)
         
         # Zeitraumauswahl
         self.days_input = QLineEdit("7")  # Standardwert: 7 Tage
@@ -62,39 +145,53 @@ class CalendarImportDialog(QDialog):
         
         self.setLayout(layout)
         
-        # Verbinde mit Google Calendar und lade verfügbare Kalender
+        # Verbinde mit Google Calendar und lade verfügbare Kalender (im Hintergrund)
         self.load_calendars()
     
     def load_calendars(self):
-        """Lädt verfügbare Kalender von Google Calendar."""
-        # Versuche, mit Google zu authentifizieren
-        if not self.api.authenticate():
+        """Startet das Laden der verfügbaren Kalender von Google Calendar auf einem Pool-Thread."""
+        # OK erst freigeben, wenn die Kalender da sind
+        self.buttons.button(QDialogButtonBox.Ok).setEnabled(False)
+        
+        job = CalendarListJob(self.api)
+        job.signals.calendars_loaded.connect(self.on_calendars_loaded)
+        job.signals.failed.connect(self.on_load_failed)
+        QThreadPool.globalInstance().start(job)
+    
+    def on_load_failed(self, message):
+        self.status_label.setText(f"Fehler beim Laden der Kalender: {message}")
+        self.status_label.setStyleSheet("color: red;")
+    
+    def on_calendars_loaded(self, calendars):
+        """Zeigt die geladenen Kalender an (GUI-Thread)."""
+        if calendars is None:
             self.status_label.setText("Fehler bei der Authentifizierung mit Google Calendar.")
             self.status_label.setStyleSheet("color: red;")
             return
         
-        # Kalender laden
-        self.calendars = self.api.get_calendars()
+        self.calendars = calendars
         
         if not self.calendars:
             self.status_label.setText("Keine Kalender gefunden.")
             self.status_label.setStyleSheet("color: red;")
             return
         
-        # Kalender zum Dropdown hinzufügen
-        self.calendar_dropdown.clear()
+        # Kalender zur Liste hinzufügen, der erste ist vorausgewählt
+        self.calendar_list.clear()
         for calendar in self.calendars:
-            self.calendar_dropdown.addItem(calendar['summary'], calendar['id'])
+            item = QListWidgetItem(calendar['summary'])
+            item.setData(Qt.UserRole, calendar['id'])
+            self.calendar_list.addItem(item)
+        self.calendar_list.item(0).setSelected(True)
         
         self.status_label.setText("Erfolgreich mit Google Calendar verbunden.")
         self.status_label.setStyleSheet("color: green;")
+        self.buttons.button(QDialogButtonBox.Ok).setEnabled(True)
     
-    def get_selected_calendar_id(self):
-        """Gibt die ID des ausgewählten Kalenders zurück."""
-        current_index = self.calendar_dropdown.currentIndex()
-        if current_index >= 0 and current_index < len(self.calendars):
-            return self.calendars[current_index]['id']
-        return 'primary'  # Standardwert
+    def get_selected_calendar_ids(self):
+        """Gibt die IDs der ausgewählten Kalender zurück."""
+        calendar_ids = [item.data(Qt.UserRole) for item in self.calendar_list.selectedItems()]
+        return calendar_ids or ['primary']  # Standardwert
     
     def get_days_ahead(self):
         """Gibt die Anzahl der Tage in die Zukunft zurück."""
@@ -109,6 +206,10 @@ class TodoAppWithCalendar(TodoApp):
     def __init__(self):
         super().__init__()
         
+        # Laufender Kalenderimport
+        self.import_job = None
+        self.import_progress = None
+        
         # Button zum Importieren von Kalenderterminen zum Layout hinzufügen
         # Wir suchen das vorhandene HBoxLayout für Buttons
         button_layout = None
@@ -139,37 +240,90 @@ class TodoAppWithCalendar(TodoApp):
             self.layout.addLayout(button_layout)
     
     def import_calendar(self):
-        """Öffnet den Dialog zum Importieren von Kalenderterminen."""
+        """Öffnet den Dialog zum Importieren von Kalenderterminen und startet den Import im Hintergrund."""
         dialog = CalendarImportDialog(self)
         
         if dialog.exec_():
-            calendar_id = dialog.get_selected_calendar_id()
+            calendar_ids = dialog.get_selected_calendar_ids()
             days_ahead = dialog.get_days_ahead()
             
-            # Zeige Warte-Nachricht
+            # Nur ein Import gleichzeitig
+            self.import_calendar_button.setEnabled(False)
+            
+            self.import_job = CalendarImportJob(calendar_ids, days_ahead)
+            self.import_job.signals.progress.connect(self.on_import_progress)
+            self.import_job.signals.fetched.connect(self.on_import_fetched)
+            self.import_job.signals.finished.connect(self.on_import_finished)
+            self.import_job.signals.failed.connect(self.on_import_failed)
+            
+            # Nicht-modale Fortschrittsanzeige; Abbrechen beendet den Import vor dem Schreiben
+            self.import_progress = QProgressDialog("Importiere Termine aus Google Calendar...", "Abbrechen", 0, 0, self)
+            self.import_progress.setWindowTitle("Importiere Termine")
+            self.import_progress.setWindowModality(Qt.NonModal)
+            self.import_progress.setMinimumDuration(0)
+            self.import_progress.canceled.connect(self.cancel_import)
+            self.import_progress.show()
+            
+            QThreadPool.globalInstance().start(self.import_job)
+    
+    def cancel_import(self):
+        if isinstance(self.import_job, CalendarImportJob):
+            self.import_job.cancel()
+    
+    def on_import_progress(self, message):
+        """Zeigt den Zwischenstand des Imports an (z.B. pro fertigem Kalender)."""
+        if self.import_progress is not None:
+            self.import_progress.setLabelText(message)
+    
+    def on_import_fetched(self, calendar_import):
+        """
+        Übernimmt die synchronisierten Termine in die Todo-Liste (GUI-Thread, wie
+        alle Änderungen am Modell) und schreibt danach Tages-CSVs und Cache im Hintergrund.
+        """
+        if self.import_job is None or self.import_job.cancelled:
+            self.end_import()
+            return
+        
+        num_imported = calendar_import.apply()
+        self.on_import_progress(f"Termine: {calendar_import.merge.summary()}.")
+        
+        # Ab hier wird nicht mehr abgebrochen: todo.json ist schon nachgeführt
+        job = CalendarWriteJob(calendar_import, num_imported)
+        job.signals.finished.connect(self.on_import_finished)
+        job.signals.failed.connect(self.on_import_failed)
+        self.import_job = job
+        QThreadPool.globalInstance().start(job)
+    
+    def end_import(self):
+        if self.import_progress is not None:
+            self.import_progress.canceled.disconnect()
+            self.import_progress.close()
+            self.import_progress = None
+        self.import_job = None
+        self.import_calendar_button.setEnabled(True)
+    
+    def on_import_failed(self, message):
+        self.end_import()
+        QMessageBox.warning(self, "Kalender importieren", f"Fehler beim Import: {message}")
+    
+    def on_import_finished(self, num_imported):
+        """Wertet das Ergebnis des Imports aus (GUI-Thread); die Anzeige folgt über store_changed."""
+        self.end_import()
+        
+        if num_imported is None:
+            return  # Abgebrochen
+        if num_imported > 0:
             QMessageBox.information(
                 self, 
-                "Importiere Termine", 
-                "Importiere Termine aus Google Calendar.\nDies kann einen Moment dauern."
+                "Kalender importiert", 
+                f"{num_imported} Termine wurden erfolgreich importiert."
+            )
+        else:
+            QMessageBox.information(
+                self, 
+                "Kalender importiert", 
+                "Keine neuen oder geänderten Termine gefunden."
             )
-            
-            # Termine importieren
-            num_imported = import_calendar_events_to_todo(calendar_id, days_ahead)
-            
-            if num_imported > 0:
-                QMessageBox.information(
-                    self, 
-                    "Kalender importiert", 
-                    f"{num_imported} Termine wurden erfolgreich importiert."
-                )
-                # Daten neu laden
-                self.load_data()
-            else:
-                QMessageBox.information(
-                    self, 
-                    "Kalender importiert", 
-                    "Keine Termine zum Importieren gefunden."
-                )
 
 def main():
     """Hauptfunktion zum Starten der erweiterten Todo-App."""
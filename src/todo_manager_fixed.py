@@ -8,6 +8,8 @@ from PyQt5.QtWidgets import (
 )
 from PyQt5.QtGui import QColor, QDrag, QCursor
 from PyQt5.QtCore import Qt, QMimeData, QByteArray, QPoint
+from todo_store import TodoStore
+from todo_schema import parse_hours
 
 latest_in_progress = ('Relax', 'Slay', '0', '0')  # (Task, Subtask, Estimated Time, Actual Time)
 
@@ -15,22 +17,17 @@ def get_latest_in_progress():
     """Getter für die globale Variable"""
     return latest_in_progress
 
-# Basisverzeichnis bestimmen (geht eine Ebene nach oben)
-base_dir = os.path.abspath(os.path.join(os.getcwd(), ".."))
-todo_path = os.path.join(base_dir, "data", "todo.json")
+# Gemeinsamer Speicher für todo.json (Basisverzeichnis unabhängig vom Arbeitsverzeichnis)
+todo_store = TodoStore.instance()
+todo_path = todo_store.path
 
 # Datei einlesen
 def load_todo():
-    if os.path.exists(todo_path):
-        with open(todo_path, "r", encoding="utf-8") as file:
-            return json.load(file)
-    return {"tasks": []}  # Falls keine Datei existiert, leere Struktur zurückgeben
+    return todo_store.get()
 
 # Datei speichern
 def save_todo(data):
-    os.makedirs(os.path.dirname(todo_path), exist_ok=True)
-    with open(todo_path, "w", encoding="utf-8") as file:
-        json.dump(data, file, indent=4)
+    todo_store.save(data)
         
 # Dialog für neuen Task
 class AddTaskDialog(QDialog):
@@ -550,11 +547,8 @@ class TodoApp(QWidget):
                 actual_time = subtask.get("actual_time", "0")
                 
                 # Addiere zu den Gesamtsummen für den Task
-                try:
-                    total_actual_time += float(actual_time) if actual_time != "N/A" else 0.0
-                    total_estimated_time += float(estimated_time) if estimated_time != "N/A" else 0.0
-                except ValueError:
-                    pass  # Ignoriere Konvertierungsfehler
+                total_actual_time += parse_hours(actual_time) or 0.0
+                total_estimated_time += parse_hours(estimated_time) or 0.0
                 
                 # Überspringe, wenn "Completed" und Hide-Completed aktiviert ist
                 if self.hide_completed and status == "Completed":
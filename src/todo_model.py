@@ -0,0 +1,708 @@
+# File: todo_model.py
+# Model/View für den Todo-Baum: QAbstractItemModel direkt über dem todo.json-Dokument
+
+from contextlib import nullcontext
+from datetime import datetime
+from PyQt5.QtCore import Qt, QAbstractItemModel, QModelIndex, pyqtSignal
+from PyQt5.QtGui import QColor, QBrush, QPalette
+from PyQt5.QtWidgets import QStyledItemDelegate
+from todo_schema import Status, normalize_subtask, normalize_task, parse_hours, parse_status
+from todo_store import update_task_totals
+
+
+def format_time_display(time_value):
+    """Formatiert einen Zeitwert (Stunden, None = unbekannt) für die Anzeige im Format 8.5h"""
+    if isinstance(time_value, str):
+        # Werte, die nicht aus dem Dokument stammen (z.B. Texteingaben), einmal umwandeln
+        parsed = parse_hours(time_value)
+        if parsed is None:
+            return "N/A" if time_value in ("", "N/A") else time_value
+        time_value = parsed
+    if time_value is None:
+        return "N/A"
+    return f"{time_value:.1f}h"
+
+
+def occurrence_keys(names):
+    """Macht Namen eindeutig, indem jedem Namen die Nummer seines Vorkommens angehängt wird"""
+    seen = {}
+    keys = []
+    for name in names:
+        count = seen.get(name, 0)
+        seen[name] = count + 1
+        keys.append((name, count))
+    return keys
+
+
+def index_of(items, obj):
+    """Position von obj in items nach Identität (Dictionaries mit gleichem Inhalt sind verschieden)"""
+    for i, item in enumerate(items):
+        if item is obj:
+            return i
+    return -1
+
+
+class TaskNode:
+    """Eine Task-Zeile des Modells: Verweis auf den Task im Dokument und seine sichtbaren Subtasks"""
+
+    __slots__ = ("task", "subtasks", "fetched", "row", "totals", "archived")
+
+    def __init__(self, task, subtasks):
+        self.task = task          # Task-Dictionary aus dem Dokument
+        self.subtasks = subtasks  # Sichtbare Subtask-Dictionaries (Verweise ins Dokument)
+        self.fetched = False      # Kinder erst beim Ausklappen an die View melden (fetchMore)
+        self.row = 0
+        self.totals = (0.0, 0.0)  # Summierte (tatsächliche, geschätzte) Zeit aller Subtasks
+        self.archived = bool(task.get("archived_at"))  # Aus dem Archiv: nur lesbar
+
+
+class TodoTreeModel(QAbstractItemModel):
+    """
+    Baum-Modell über dem Todo-Dokument ({"tasks": [...]}).
+
+    Die Zeilen verweisen direkt auf die Task- und Subtask-Dictionaries des
+    Dokuments; Änderungen über das Modell ändern das Dokument, es wird nichts
+    aus Widget-Texten zurückgelesen. Subtasks eines Tasks werden erst per
+    fetchMore gemeldet, wenn der Task ausgeklappt wird. Ein neues Dokument
+    wird per Abgleich (Einfügen, Entfernen, Verschieben, dataChanged)
+    übernommen, sodass Ausklappzustand und Auswahl der View erhalten bleiben.
+
+    Ist ein TodoStore gesetzt, wird jede Änderung als Operation in dessen
+    Journal geschrieben (statt todo.json neu zu schreiben) und Änderungen an
+    Subtasks werden dem Register des aktiven Subtasks gemeldet.
+
+    Archivierte Tasks werden nur angezeigt, wenn erledigte Einträge sichtbar
+    sind; sie stehen hinter den Tasks des Dokuments und sind nicht änderbar.
+    """
+
+    COLUMNS = ["Task/Subtask", "Tatsächliche Zeit", "Geschätzte Zeit", "Status"]
+
+    # Zusätzliche Rollen für den Delegate
+    IS_TASK_ROLE = Qt.UserRole + 1
+    COLOR_ROLE = Qt.UserRole + 2
+    STATUS_ROLE = Qt.UserRole + 3
+    ARCHIVED_ROLE = Qt.UserRole + 4
+
+    # Flags als Konstanten: die View fragt sie beim Layout für jede Zeile ab
+    ITEM_FLAGS = Qt.ItemIsEnabled | Qt.ItemIsSelectable | Qt.ItemIsDragEnabled | Qt.ItemIsDropEnabled
+    NAME_FLAGS = ITEM_FLAGS | Qt.ItemIsEditable
+    ARCHIVED_FLAGS = Qt.ItemIsEnabled | Qt.ItemIsSelectable
+
+    # Wird nach jeder Änderung des Dokuments über das Modell ausgelöst
+    document_changed = pyqtSignal()
+
+    def __init__(self, parent=None, store=None):
+        super().__init__(parent)
+        self.store = store
+        self.document = {"tasks": []}
+        self.hide_completed = True
+        self.archived_tasks = []
+        self.nodes = []
+
+    # --- Zugriff auf Knoten ---
+
+    def task_node(self, index):
+        """TaskNode eines Task- oder Subtask-Index"""
+        if not index.isValid():
+            return None
+        node = index.internalPointer()
+        return node if node is not None else self.nodes[index.row()]
+
+    def subtask(self, index):
+        """Subtask-Dictionary eines Subtask-Index (None für Tasks)"""
+        if not index.isValid():
+            return None
+        node = index.internalPointer()
+        return node.subtasks[index.row()] if node is not None else None
+
+    def task_index(self, row, column=0):
+        return self.index(row, column)
+
+    def is_visible_subtask(self, subtask):
+        return not (self.hide_completed and subtask.get("status") == "Completed")
+
+    # --- QAbstractItemModel ---
+
+    def index(self, row, column, parent=QModelIndex()):
+        # Grenzen direkt prüfen statt über hasIndex() (spart den Umweg über rowCount())
+        if row < 0 or column < 0 or column >= len(self.COLUMNS):
+            return QModelIndex()
+        if not parent.isValid():
+            return self.createIndex(row, column) if row < len(self.nodes) else QModelIndex()
+        if parent.internalPointer() is not None:
+            return QModelIndex()
+        node = self.nodes[parent.row()]
+        if not node.fetched or row >= len(node.subtasks):
+            return QModelIndex()
+        return self.createIndex(row, column, node)
+
+    def parent(self, index):
+        if not index.isValid():
+            return QModelIndex()
+        node = index.internalPointer()
+        if node is None:
+            return QModelIndex()
+        return self.createIndex(node.row, 0)
+
+    def rowCount(self, parent=QModelIndex()):
+        if not parent.isValid():
+            return len(self.nodes)
+        if parent.internalPointer() is not None or parent.column() != 0:
+            return 0
+        node = self.nodes[parent.row()]
+        return len(node.subtasks) if node.fetched else 0
+
+    def columnCount(self, parent=QModelIndex()):
+        return len(self.COLUMNS)
+
+    def hasChildren(self, parent=QModelIndex()):
+        if not parent.isValid():
+            return bool(self.nodes)
+        if parent.internalPointer() is not None or parent.column() != 0:
+            return False
+        return bool(self.nodes[parent.row()].subtasks)
+
+    def canFetchMore(self, parent):
+        if not parent.isValid() or parent.internalPointer() is not None:
+            return False
+        node = self.nodes[parent.row()]
+        return not node.fetched and bool(node.subtasks)
+
+    def fetchMore(self, parent):
+        """Meldet die Subtasks eines Tasks erst, wenn die View sie braucht (Ausklappen)"""
+        if not self.canFetchMore(parent):
+            return
+        node = self.nodes[parent.row()]
+        self.beginInsertRows(parent, 0, len(node.subtasks) - 1)
+        node.fetched = True
+        self.endInsertRows()
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return self.COLUMNS[section]
+        return None
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.ItemIsDropEnabled
+        if self.task_node(index).archived:
+            return self.ARCHIVED_FLAGS
+        return self.NAME_FLAGS if index.column() == 0 else self.ITEM_FLAGS
+
+    def supportedDropActions(self):
+        return Qt.MoveAction
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        node = self.task_node(index)
+        subtask = self.subtask(index)
+        column = index.column()
+
+        if role in (Qt.DisplayRole, Qt.EditRole):
+            if subtask is None:
+                if column == 0:
+                    if node.archived and role == Qt.DisplayRole:
+                        return f"{node.task.get('task', '')} (Archiv)"
+                    return node.task.get("task", "")
+                if column == 1:
+                    return format_time_display(node.totals[0])
+                if column == 2:
+                    return format_time_display(node.totals[1])
+                return None
+            if column == 0:
+                return subtask.get("subtask", "")
+            if column == 1:
+                return format_time_display(subtask.get("actual_time"))
+            if column == 2:
+                return format_time_display(subtask.get("estimated_time"))
+            return subtask.get("status", "")
+        if role == self.IS_TASK_ROLE:
+            return subtask is None
+        if role == self.COLOR_ROLE:
+            return node.task.get("color", "#3498db")
+        if role == self.STATUS_ROLE:
+            return subtask.get("status", "") if subtask is not None else None
+        if role == self.ARCHIVED_ROLE:
+            return node.archived
+        return None
+
+    def setData(self, index, value, role=Qt.EditRole):
+        """Umbenennen von Tasks und Subtasks in der ersten Spalte"""
+        if role != Qt.EditRole or index.column() != 0:
+            return False
+        name = str(value).strip()
+        if not name:
+            return False
+        node = self.task_node(index)
+        if node.archived:
+            return False
+        subtask = self.subtask(index)
+        if subtask is None:
+            if not self.set_task_fields(node, {"task": name}):
+                return False
+            if self.store is not None:
+                self.store.refresh_active()
+        else:
+            if not self.set_subtask_fields(node, subtask, {"subtask": name}):
+                return False
+            self.notify_store(node.task, subtask)
+        self.dataChanged.emit(index, index)
+        self.document_changed.emit()
+        return True
+
+    # --- Dokument übernehmen (Abgleich) ---
+
+    def set_document(self, document, hide_completed=None, archived_tasks=None):
+        """
+        Übernimmt ein (neu geladenes) Dokument und gleicht die Zeilen damit ab.
+        archived_tasks werden angezeigt, solange erledigte Einträge sichtbar sind.
+        """
+        if hide_completed is not None:
+            self.hide_completed = hide_completed
+        if archived_tasks is not None:
+            self.archived_tasks = archived_tasks
+        self.document = document
+        self.sync()
+
+    def sync(self):
+        """
+        Gleicht die Zeilen mit dem Dokument ab: Identität ist der Task- bzw.
+        Subtask-Name. Nur tatsächlich geänderte Zeilen werden an die View gemeldet.
+        """
+        desired = []
+        for task in self.document.get("tasks", []):
+            visible = [subtask for subtask in task.get("subtasks", []) if self.is_visible_subtask(subtask)]
+            # Vollständig erledigte Tasks ausblenden, wenn hide_completed aktiv ist (leere Tasks bleiben sichtbar)
+            if visible or not self.hide_completed or not task.get("subtasks"):
+                desired.append((task, visible))
+        if not self.hide_completed:
+            desired.extend((task, task.get("subtasks", [])) for task in self.archived_tasks)
+
+        # Archivierte Tasks sind eigene Zeilen, auch wenn ein Task gleichen Namens im Dokument steht
+        self.sync_rows(
+            QModelIndex(), self.nodes, desired,
+            old_key=lambda node: (node.task.get("task", ""), node.archived),
+            new_key=lambda entry: (entry[0].get("task", ""), bool(entry[0].get("archived_at"))),
+            create=lambda entry: TaskNode(entry[0], entry[1])
+        )
+
+        for row, (task, visible) in enumerate(desired):
+            node = self.nodes[row]
+            task_index = self.task_index(row)
+            changed = (node.task.get("color"), node.task.get("task")) != (task.get("color"), task.get("task"))
+            node.task = task
+
+            if node.fetched:
+                self.sync_rows(
+                    task_index, node.subtasks, visible,
+                    old_key=lambda subtask: subtask.get("subtask", ""),
+                    new_key=lambda subtask: subtask.get("subtask", ""),
+                    create=lambda subtask: subtask
+                )
+                # Inhalt der Subtask-Zeilen übernehmen, geänderte melden
+                for subtask_row, subtask in enumerate(visible):
+                    old = node.subtasks[subtask_row]
+                    if old is not subtask:
+                        node.subtasks[subtask_row] = subtask
+                        if old != subtask:
+                            self.dataChanged.emit(self.index(subtask_row, 0, task_index),
+                                                  self.index(subtask_row, len(self.COLUMNS) - 1, task_index))
+            else:
+                # Noch nicht an die View gemeldet: Liste einfach ersetzen
+                node.subtasks = visible
+
+            if self.update_totals(node) or changed:
+                self.dataChanged.emit(task_index, self.task_index(row, len(self.COLUMNS) - 1))
+
+    def sync_rows(self, parent, items, new_items, old_key, new_key, create):
+        """
+        Bringt die Zeilenliste items unter parent per Entfernen, Verschieben und
+        Einfügen in die Reihenfolge von new_items. Danach entspricht items[i]
+        (über den Schlüssel) new_items[i]; Inhalte aktualisiert der Aufrufer.
+        """
+        old_keys = occurrence_keys(old_key(item) for item in items)
+        new_keys = occurrence_keys(new_key(item) for item in new_items)
+        wanted = set(new_keys)
+
+        # Entfernen (von hinten, zusammenhängende Bereiche auf einmal)
+        row = len(items) - 1
+        while row >= 0:
+            if old_keys[row] in wanted:
+                row -= 1
+                continue
+            last = row
+            while row >= 0 and old_keys[row] not in wanted:
+                row -= 1
+            first = row + 1
+            self.beginRemoveRows(parent, first, last)
+            del items[first:last + 1]
+            del old_keys[first:last + 1]
+            self.renumber(parent)
+            self.endRemoveRows()
+
+        present = set(old_keys)
+        position = 0
+        while position < len(new_keys):
+            key = new_keys[position]
+            if position < len(old_keys) and old_keys[position] == key:
+                position += 1
+                continue
+
+            if key in present:
+                # Verschieben (alle Zeilen davor sind bereits an ihrem Platz, also liegt sie weiter hinten)
+                current = old_keys.index(key, position)
+                self.beginMoveRows(parent, current, current, parent, position)
+                items.insert(position, items.pop(current))
+                old_keys.insert(position, old_keys.pop(current))
+                self.renumber(parent)
+                self.endMoveRows()
+                position += 1
+            else:
+                # Einfügen (aufeinanderfolgende neue Zeilen auf einmal)
+                end = position
+                while end < len(new_keys) and new_keys[end] not in present:
+                    end += 1
+                self.beginInsertRows(parent, position, end - 1)
+                items[position:position] = [create(item) for item in new_items[position:end]]
+                old_keys[position:position] = new_keys[position:end]
+                self.renumber(parent)
+                self.endInsertRows()
+                position = end
+
+    def renumber(self, parent):
+        """Aktualisiert die Zeilennummern der Task-Knoten (für parent()) nach Strukturänderungen"""
+        if not parent.isValid():
+            for row, node in enumerate(self.nodes):
+                node.row = row
+
+    def update_totals(self, node):
+        """Berechnet die summierten Zeiten eines Tasks neu; gibt zurück, ob sie sich geändert haben"""
+        totals = update_task_totals(node.task)
+        if totals == node.totals:
+            return False
+        node.totals = totals
+        return True
+
+    def emit_task_changed(self, node):
+        self.dataChanged.emit(self.task_index(node.row), self.task_index(node.row, len(self.COLUMNS) - 1))
+
+    # --- Änderungen über das Modell ---
+
+    def store_lock(self):
+        """Sperre des Speichers: Änderung am Dokument und Journal-Eintrag bilden eine Einheit"""
+        return self.store.lock if self.store is not None else nullcontext()
+
+    def record(self, op):
+        """Schreibt eine bereits ausgeführte Änderung ins Journal des Speichers"""
+        if self.store is not None:
+            self.store.record(op)
+
+    def notify_store(self, task, subtask):
+        """Meldet eine Änderung eines Subtasks an das Register des aktiven Subtasks"""
+        if self.store is not None:
+            self.store.subtask_changed(task, subtask)
+
+    def task_position(self, task):
+        return index_of(self.document.get("tasks", []), task)
+
+    def reject_stale_edit(self):
+        """
+        Verwirft eine Änderung an einer Zeile, deren Task oder Subtask nicht mehr
+        im Dokument steht (z.B. neu geladen), und gleicht die Zeilen neu ab; gibt False zurück.
+        """
+        print("Eintrag steht nicht mehr im Dokument, die Änderung wird verworfen")
+        if self.store is not None:
+            self.set_document(self.store.get())
+        else:
+            self.sync()
+        return False
+
+    def set_task_fields(self, node, values):
+        """Setzt Felder eines Tasks im Dokument und protokolliert die Änderung; False, wenn der Task veraltet ist"""
+        with self.store_lock():
+            position = self.task_position(node.task)
+            if position >= 0:
+                old = {field: node.task.get(field) for field in values}
+                node.task.update(values)
+                self.record({"op": "set_task", "task": position, "values": values, "old": old})
+        if position < 0:
+            return self.reject_stale_edit()
+        return True
+
+    def set_subtask_fields(self, node, subtask, values):
+        """
+        Setzt Felder eines Subtasks im Dokument (None entfernt ein Feld) und protokolliert
+        die Änderung; False, wenn Task oder Subtask veraltet sind.
+        """
+        with self.store_lock():
+            position = self.task_position(node.task)
+            subtask_position = index_of(node.task.get("subtasks", []), subtask)
+            stale = position < 0 or subtask_position < 0
+            if not stale:
+                old = {field: subtask.get(field) for field in values}
+                for field, value in values.items():
+                    if value is None:
+                        subtask.pop(field, None)
+                    else:
+                        subtask[field] = value
+                self.record({
+                    "op": "set_subtask",
+                    "task": position,
+                    "subtask": subtask_position,
+                    "values": values,
+                    "old": old
+                })
+        if stale:
+            return self.reject_stale_edit()
+        return True
+
+    def set_subtask_field(self, index, field, value):
+        """Setzt ein Feld (status, actual_time, estimated_time) eines Subtasks"""
+        subtask = self.subtask(index)
+        value = parse_status(value) if field == "status" else parse_hours(value)
+        if subtask is None or subtask.get(field) == value or self.task_node(index).archived:
+            return
+        values = {field: value}
+        if field == "status":
+            # Zeitpunkt des Abschlusses merken: danach richtet sich die Archivierung
+            values["completed_at"] = datetime.now().isoformat(timespec="seconds") if value == Status.COMPLETED else None
+        node = self.task_node(index)
+        if not self.set_subtask_fields(node, subtask, values):
+            return
+
+        parent = index.parent()
+        self.dataChanged.emit(self.index(index.row(), 0, parent), self.index(index.row(), len(self.COLUMNS) - 1, parent))
+        self.notify_store(node.task, subtask)
+        if self.update_totals(node):
+            self.emit_task_changed(node)
+        self.document_changed.emit()
+
+    def set_task_color(self, index, color):
+        """Ändert die Farbe eines Tasks"""
+        node = self.task_node(index)
+        if node.archived:
+            return
+        if not self.set_task_fields(node, {"color": color}):
+            return
+        self.emit_task_changed(node)
+        self.document_changed.emit()
+
+    def add_task(self, task):
+        """Hängt einen neuen Task an das Dokument an"""
+        normalize_task(task)
+        with self.store_lock():
+            tasks = self.document.setdefault("tasks", [])
+            tasks.append(task)
+            self.record({"op": "insert_task", "task": len(tasks) - 1, "value": task})
+        for subtask in task.get("subtasks", []):
+            self.notify_store(task, subtask)
+        self.sync()
+        self.document_changed.emit()
+
+    def add_subtask(self, task_name, subtask):
+        """Hängt einen Subtask an den Task mit dem Namen task_name an"""
+        normalize_subtask(subtask)
+        for position, task in enumerate(self.document.get("tasks", [])):
+            if task.get("task") == task_name:
+                with self.store_lock():
+                    subtasks = task.setdefault("subtasks", [])
+                    subtasks.append(subtask)
+                    self.record({"op": "insert_subtask", "task": position, "subtask": len(subtasks) - 1,
+                                 "value": subtask})
+                self.notify_store(task, subtask)
+                self.sync()
+                self.document_changed.emit()
+                return True
+        return False
+
+    def remove_task(self, index):
+        """Entfernt einen Task aus Dokument und Modell"""
+        node = self.task_node(index)
+        if node.archived:
+            return
+        with self.store_lock():
+            tasks = self.document.get("tasks", [])
+            position = index_of(tasks, node.task)
+            if position >= 0:
+                del tasks[position]
+                self.record({"op": "remove_task", "task": position, "value": node.task})
+        if position < 0:
+            self.reject_stale_edit()
+            return
+        if self.store is not None:
+            self.store.subtasks_removed(node.task.get("subtasks", []))
+
+        self.beginRemoveRows(QModelIndex(), node.row, node.row)
+        del self.nodes[node.row]
+        self.renumber(QModelIndex())
+        self.endRemoveRows()
+        self.document_changed.emit()
+
+    def remove_subtask(self, index):
+        """Entfernt einen Subtask aus Dokument und Modell"""
+        node = self.task_node(index)
+        if node.archived:
+            return
+        subtask = self.subtask(index)
+        with self.store_lock():
+            subtasks = node.task.get("subtasks", [])
+            task_position = self.task_position(node.task)
+            position = index_of(subtasks, subtask)
+            stale = task_position < 0 or position < 0
+            if not stale:
+                del subtasks[position]
+                self.record({"op": "remove_subtask", "task": task_position, "subtask": position, "value": subtask})
+        if stale:
+            self.reject_stale_edit()
+            return
+        if self.store is not None:
+            self.store.subtasks_removed([subtask])
+
+        self.beginRemoveRows(index.parent(), index.row(), index.row())
+        del node.subtasks[index.row()]
+        self.endRemoveRows()
+
+        if self.update_totals(node):
+            self.emit_task_changed(node)
+        self.document_changed.emit()
+
+    def move_task(self, from_row, to_row):
+        """Verschiebt einen Task an die Position to_row (Position nach dem Herausnehmen)"""
+        if from_row == to_row or self.nodes[from_row].archived or self.nodes[to_row].archived:
+            return
+        node = self.nodes[from_row]
+        anchor = self.nodes[to_row].task
+
+        # Im Dokument vor bzw. hinter den Ziel-Task setzen (ausgeblendete Tasks bleiben, wo sie sind)
+        with self.store_lock():
+            tasks = self.document.get("tasks", [])
+            from_position = index_of(tasks, node.task)
+            stale = from_position < 0 or index_of(tasks, anchor) < 0
+            if not stale:
+                del tasks[from_position]
+                anchor_position = index_of(tasks, anchor)
+                to_position = anchor_position + 1 if to_row > from_row else anchor_position
+                tasks.insert(to_position, node.task)
+                self.record({"op": "move_task", "from": from_position, "to": to_position})
+        if stale:
+            self.reject_stale_edit()
+            return
+
+        destination = to_row + 1 if to_row > from_row else to_row
+        self.beginMoveRows(QModelIndex(), from_row, from_row, QModelIndex(), destination)
+        self.nodes.insert(to_row, self.nodes.pop(from_row))
+        self.renumber(QModelIndex())
+        self.endMoveRows()
+        self.document_changed.emit()
+
+    def move_subtask(self, index, target_task_row, target_subtask_row=None):
+        """
+        Verschiebt einen Subtask zum Task in Zeile target_task_row: ans Ende
+        (target_subtask_row None) oder direkt hinter den dortigen Subtask target_subtask_row.
+        """
+        source = self.task_node(index)
+        source_row = index.row()
+        subtask = source.subtasks[source_row]
+        target = self.nodes[target_task_row]
+        if source.archived or target.archived:
+            return
+
+        if target_subtask_row is None:
+            final_row = len(target.subtasks) - (1 if target is source else 0)
+        else:
+            final_row = target_subtask_row + 1
+            if target is source and source_row < target_subtask_row:
+                final_row -= 1
+        if target is source and final_row == source_row:
+            return
+
+        # Dokument: aus dem Quell-Task entfernen, im Ziel-Task hinter dem Anker einfügen
+        anchor = target.subtasks[target_subtask_row] if target_subtask_row is not None else None
+        with self.store_lock():
+            source_subtasks = source.task.get("subtasks", [])
+            target_subtasks = target.task.get("subtasks", [])
+            task_position = self.task_position(source.task)
+            to_task_position = self.task_position(target.task)
+            source_position = index_of(source_subtasks, subtask)
+            stale = min(task_position, to_task_position, source_position) < 0 \
+                or (anchor is not None and index_of(target_subtasks, anchor) < 0)
+            if not stale:
+                del source_subtasks[source_position]
+                target_subtasks = target.task.setdefault("subtasks", [])
+                target_position = len(target_subtasks) if anchor is None else index_of(target_subtasks, anchor) + 1
+                target_subtasks.insert(target_position, subtask)
+                self.record({
+                    "op": "move_subtask",
+                    "task": task_position,
+                    "subtask": source_position,
+                    "to_task": to_task_position,
+                    "to_subtask": target_position
+                })
+        if stale:
+            self.reject_stale_edit()
+            return
+        self.notify_store(target.task, subtask)
+
+        source_parent = index.parent()
+        target_parent = self.task_index(target.row)
+        if target.fetched:
+            destination = final_row + 1 if target is source and final_row > source_row else final_row
+            self.beginMoveRows(source_parent, source_row, source_row, target_parent, destination)
+            del source.subtasks[source_row]
+            target.subtasks.insert(final_row, subtask)
+            self.endMoveRows()
+        else:
+            # Ziel-Task noch nicht an die View gemeldet: nur beim Quell-Task entfernen
+            self.beginRemoveRows(source_parent, source_row, source_row)
+            del source.subtasks[source_row]
+            self.endRemoveRows()
+            target.subtasks.insert(final_row, subtask)
+
+        for node in (source, target):
+            if self.update_totals(node):
+                self.emit_task_changed(node)
+        if not target.fetched:
+            # Ausklapp-Symbol des Ziel-Tasks aktualisieren
+            self.emit_task_changed(target)
+        self.document_changed.emit()
+
+
+class TodoItemDelegate(QStyledItemDelegate):
+    """Zeichnet Task-Farben und Status-Hintergründe, statt Pinsel und Schriften pro Zelle zu speichern"""
+
+    STATUS_BRUSHES = {
+        "Completed": QBrush(QColor(144, 238, 144)),    # Grün für erledigt
+        "In Progress": QBrush(QColor(255, 255, 102)),  # Gelb für in Arbeit
+    }
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.task_brushes = {}  # Farbe (Hex) -> (Hintergrund-Pinsel, Textfarbe)
+
+    def task_brush(self, color_name):
+        """Pinsel für eine Task-Farbe, einmal pro Farbe erzeugt"""
+        brushes = self.task_brushes.get(color_name)
+        if brushes is None:
+            text_color = QColor(color_name)
+            background = QColor(color_name)
+            background.setAlpha(40)  # Sehr transparent
+            brushes = (QBrush(background), text_color)
+            self.task_brushes[color_name] = brushes
+        return brushes
+
+    def initStyleOption(self, option, index):
+        super().initStyleOption(option, index)
+        if index.data(TodoTreeModel.ARCHIVED_ROLE):
+            option.font.setItalic(True)
+        if index.data(TodoTreeModel.IS_TASK_ROLE):
+            if index.column() == 0:
+                # Task-Zeile: fett, Hintergrund und Text in der Task-Farbe
+                background, text_color = self.task_brush(index.data(TodoTreeModel.COLOR_ROLE))
+                option.font.setBold(True)
+                option.backgroundBrush = background
+                option.palette.setColor(QPalette.Text, text_color)
+        elif index.column() == 3:
+            status_brush = self.STATUS_BRUSHES.get(index.data(TodoTreeModel.STATUS_ROLE))
+            if status_brush is not None:
+                option.backgroundBrush = status_brush
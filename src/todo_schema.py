@@ -0,0 +1,73 @@
+# File: todo_schema.py
+# Versioned schema of todo.json: typed values and the migration of older files
+
+from enum import Enum
+
+# Version 1: times as strings in mixed formats ("1.0h", "0.0", "N/A", "2")
+# Version 2: times as float hours (null = unknown), status one of Status
+SCHEMA_VERSION = 2
+
+
+class Status(str, Enum):
+    """Status of a subtask (str values, so comparisons with plain strings keep working)"""
+
+    PENDING = "Pending"
+    IN_PROGRESS = "In Progress"
+    COMPLETED = "Completed"
+
+
+def parse_hours(value):
+    """
+    Converts a time value into float hours; None for unknown or invalid values.
+    Accepts numbers and the strings of schema version 1 ("1.5h", "1.5", "N/A", "").
+    """
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    text = str(value).strip()
+    if text.endswith("h"):
+        text = text[:-1].strip()
+    if not text or text == "N/A":
+        return None
+    try:
+        return float(text)
+    except ValueError:
+        return None
+
+
+def parse_status(value):
+    """Returns the status string of value; unknown values become "Pending" """
+    try:
+        return Status(value).value
+    except ValueError:
+        return Status.PENDING.value
+
+
+def normalize_subtask(subtask):
+    """Brings a subtask dictionary to the current schema (in place)"""
+    subtask["status"] = parse_status(subtask.get("status"))
+    subtask["estimated_time"] = parse_hours(subtask.get("estimated_time"))
+    subtask["actual_time"] = parse_hours(subtask.get("actual_time"))
+    return subtask
+
+
+def normalize_task(task):
+    """Brings a task dictionary and its subtasks to the current schema (in place)"""
+    task["estimated_time"] = parse_hours(task.get("estimated_time"))
+    task["actual_time"] = parse_hours(task.get("actual_time"))
+    for subtask in task.setdefault("subtasks", []):
+        normalize_subtask(subtask)
+    return task
+
+
+def migrate_document(document, version):
+    """
+    Migrates a document of the given schema version to SCHEMA_VERSION (in place).
+    Returns True if anything had to be converted.
+    """
+    if version >= SCHEMA_VERSION:
+        return False
+    for task in document.setdefault("tasks", []):
+        normalize_task(task)
+    return True
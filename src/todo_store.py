@@ -0,0 +1,818 @@
+# File: todo_store.py
+# Shared, cached access to todo.json (snapshot + journal of edits)
+
+import os
+import copy
+import json
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict, ChainMap
+from collections.abc import Mapping
+from datetime import datetime, timedelta
+from todo_schema import SCHEMA_VERSION, migrate_document, normalize_task
+
+
+# Default mode of newly created files (mkstemp creates its files with 0600)
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+DEFAULT_FILE_MODE = 0o666 & ~_UMASK
+
+
+def preserve_mode(tmp_path, path):
+    """Gives a temporary file the permissions of the file it is about to replace"""
+    try:
+        shutil.copymode(path, tmp_path)
+    except FileNotFoundError:
+        os.chmod(tmp_path, DEFAULT_FILE_MODE)
+
+
+def write_json_atomic(path, data, indent=4):
+    """
+    Writes data as JSON to path atomically: the document is written to a
+    temporary file in the same directory, flushed to disk and then renamed
+    over the target. Readers therefore see either the old or the new file,
+    never a half-written one, even if the app is killed during the write.
+    """
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+
+    fd, tmp_path = tempfile.mkstemp(prefix=".todo-", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as file:
+            json.dump(data, file, indent=indent)
+            file.flush()
+            os.fsync(file.fileno())
+        preserve_mode(tmp_path, path)
+        os.replace(tmp_path, path)
+    except Exception:
+        # Temporäre Datei nicht liegen lassen
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def sum_subtask_times(subtasks):
+    """Summiert die tatsächlichen und geschätzten Zeiten (Stunden, None = unbekannt) einer Liste von Subtasks"""
+    total_actual_time = 0.0
+    total_estimated_time = 0.0
+    for subtask in subtasks:
+        total_actual_time += subtask.get("actual_time") or 0.0
+        total_estimated_time += subtask.get("estimated_time") or 0.0
+    return round(total_actual_time, 2), round(total_estimated_time, 2)
+
+
+def update_task_totals(task):
+    """Writes the summed subtask times into the task (as the Todo model does); returns the totals"""
+    totals = sum_subtask_times(task.get("subtasks", []))
+    task["actual_time"], task["estimated_time"] = totals
+    return totals
+
+
+# Journal operations. Tasks and subtasks are addressed by their position in
+# the document, which is deterministic when the journal is replayed in order.
+# "value" holds the inserted/removed dictionary, "values"/"old" the changed
+# fields before and after (None = field absent).
+
+# Fields of an operation that hold a position
+POSITION_FIELDS = ("task", "subtask", "from", "to", "to_task", "to_subtask")
+
+
+def check_positions(op):
+    """Raises IndexError if an operation addresses a negative position (e.g. a stale index_of() result)"""
+    for field in POSITION_FIELDS:
+        if field in op and op[field] < 0:
+            raise IndexError(f"Negative position {field}={op[field]} in journal operation {op['op']}")
+
+
+def apply_operation(document, op):
+    """Applies one journal operation to the document"""
+    check_positions(op)
+    tasks = document.setdefault("tasks", [])
+    kind = op["op"]
+
+    if kind == "insert_task":
+        tasks.insert(op["task"], copy.deepcopy(op["value"]))
+    elif kind == "remove_task":
+        del tasks[op["task"]]
+    elif kind == "move_task":
+        tasks.insert(op["to"], tasks.pop(op["from"]))
+    elif kind == "set_task":
+        set_fields(tasks[op["task"]], op["values"])
+    else:
+        task = tasks[op["task"]]
+        subtasks = task.setdefault("subtasks", [])
+        if kind == "insert_subtask":
+            subtasks.insert(op["subtask"], copy.deepcopy(op["value"]))
+        elif kind == "remove_subtask":
+            del subtasks[op["subtask"]]
+        elif kind == "set_subtask":
+            set_fields(subtasks[op["subtask"]], op["values"])
+        elif kind == "move_subtask":
+            target = tasks[op["to_task"]]
+            target.setdefault("subtasks", []).insert(op["to_subtask"], subtasks.pop(op["subtask"]))
+            update_task_totals(target)
+        else:
+            raise ValueError(f"Unknown journal operation: {kind}")
+        update_task_totals(task)
+
+
+# Operations that shift the positions of the following tasks or subtasks
+STRUCTURAL_OPERATIONS = ("insert_task", "remove_task", "insert_subtask", "remove_subtask", "move_task", "move_subtask")
+
+
+def set_fields(item, values):
+    for field, value in values.items():
+        if value is None:
+            item.pop(field, None)
+        else:
+            item[field] = value
+
+
+def operation_of(record):
+    """The operation of a journal record, without its bookkeeping fields"""
+    return {key: value for key, value in record.items() if key not in ("seq", "undo", "redo", "undoable")}
+
+
+def invert_operation(op):
+    """Returns the operation that undoes op"""
+    kind = op["op"]
+    inverse = operation_of(op)
+    if kind in ("insert_task", "remove_task", "insert_subtask", "remove_subtask"):
+        inverse["op"] = kind.replace("insert", "remove") if kind.startswith("insert") else kind.replace("remove", "insert")
+    elif kind in ("set_task", "set_subtask"):
+        inverse["values"], inverse["old"] = op["old"], op["values"]
+    elif kind == "move_task":
+        inverse["from"], inverse["to"] = op["to"], op["from"]
+    elif kind == "move_subtask":
+        inverse["task"], inverse["subtask"] = op["to_task"], op["to_subtask"]
+        inverse["to_task"], inverse["to_subtask"] = op["task"], op["subtask"]
+    return inverse
+
+
+def task_info_entry(task):
+    """Summary of a task for statistics joins (type, category, color, subtask status)"""
+    info = {
+        "type": task.get("type", "N/A"),
+        "category": task.get("category", "N/A"),
+        "estimated_time": task.get("estimated_time"),  # Hours, None if unknown
+        "color": task.get("color", "#cccccc"),  # Default color if none specified
+        "subtasks": {}
+    }
+
+    # Prepare subtask information
+    for subtask in task.get("subtasks", []):
+        subtask_name = subtask.get("subtask", "")
+        if subtask_name:
+            info["subtasks"][subtask_name] = {
+                "status": subtask.get("status", "N/A"),
+                "estimated_time": subtask.get("estimated_time")
+            }
+    return info
+
+
+class ArchivedSubtasks(Mapping):
+    """
+    Subtask info of a live task, falling back to the subtasks archived for the
+    same task. The archive index is only consulted on a miss in the live entry.
+    """
+
+    def __init__(self, live, archive, task_name):
+        self.live = live
+        self.archive = archive
+        self.task_name = task_name
+
+    def archived(self):
+        entry = self.archive.get_index().get(self.task_name)
+        return entry["subtasks"] if entry is not None else {}
+
+    def __getitem__(self, subtask_name):
+        if subtask_name in self.live:
+            return self.live[subtask_name]
+        return self.archived()[subtask_name]
+
+    def __contains__(self, subtask_name):
+        return subtask_name in self.live or subtask_name in self.archived()
+
+    def __iter__(self):
+        return iter(ChainMap(self.live, self.archived()))
+
+    def __len__(self):
+        return len(ChainMap(self.live, self.archived()))
+
+
+class TaskInfoIndex(Mapping):
+    """
+    task_info of the live document, falling back to the archive index.
+    The archive index is only loaded on the first lookup of a task that is
+    not in the live document. For tasks in both, the live entry wins and the
+    subtasks of both are visible.
+    """
+
+    def __init__(self, live, archive):
+        self.live = live
+        self.archive = archive
+
+    def __getitem__(self, task_name):
+        entry = self.live.get(task_name)
+        if entry is not None:
+            # Archived subtasks are only looked up when a subtask is missing in the live entry
+            if self.archive is None:
+                return entry
+            return dict(entry, subtasks=ArchivedSubtasks(entry["subtasks"], self.archive, task_name))
+        archived = self.archive.get_index().get(task_name) if self.archive is not None else None
+        if archived is None:
+            raise KeyError(task_name)
+        return archived
+
+    def __contains__(self, task_name):
+        if task_name in self.live:
+            return True
+        return self.archive is not None and task_name in self.archive.get_index()
+
+    def __iter__(self):
+        yield from self.live
+        if self.archive is not None:
+            for task_name in self.archive.get_index():
+                if task_name not in self.live:
+                    yield task_name
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+
+class TodoArchive:
+    """
+    Append-only cold storage for completed tasks (todo_archive.jsonl).
+
+    Each line is one archived task with the subtasks moved in that run and
+    an "archived_at" timestamp; a task can appear on several lines. Next to
+    it, todo_archive.index.json keeps the task_info entry of every archived
+    task, so statistics resolve archived tasks without reading the archive.
+    The archive itself is only read when the user asks to see completed
+    items; both files are cached by their modification stamp.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.index_path = os.path.splitext(path)[0] + ".index.json"
+        self.lock = threading.RLock()
+        self.index = {}
+        self.index_stamp = False
+        self.tasks = []
+        self.tasks_stamp = False
+
+    @staticmethod
+    def stamp_of(path):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def read_records(self):
+        """Reads all archived records (skipping damaged lines, e.g. from an interrupted append)"""
+        records = []
+        if not os.path.exists(self.path):
+            return records
+        with open(self.path, "r", encoding="utf-8") as file:
+            for line in file:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                # Ältere Einträge können noch Zeiten als Strings enthalten
+                records.append(normalize_task(record))
+        return records
+
+    def append(self, records):
+        """Appends records to the archive and merges them into the index"""
+        if not records:
+            return
+        with self.lock:
+            index = dict(self.get_index())
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as file:
+                for record in records:
+                    file.write(json.dumps(record) + "\n")
+                file.flush()
+                os.fsync(file.fileno())
+
+            for record in records:
+                self.merge_into_index(index, record)
+            write_json_atomic(self.index_path, index)
+            self.index = index
+            self.index_stamp = self.stamp_of(self.index_path)
+
+    @staticmethod
+    def merge_into_index(index, record):
+        """Adds the task_info entry of one record (later records win for task fields)"""
+        entry = task_info_entry(record)
+        previous = index.get(record.get("task", ""))
+        if previous is not None:
+            entry["subtasks"] = dict(previous["subtasks"], **entry["subtasks"])
+        index[record.get("task", "")] = entry
+
+    def get_index(self):
+        """Returns the task_info index of the archive (rebuilt from the archive if it is missing)"""
+        with self.lock:
+            stamp = self.stamp_of(self.index_path)
+            if stamp == self.index_stamp:
+                return self.index
+
+            index = {}
+            if stamp is not None:
+                try:
+                    with open(self.index_path, "r", encoding="utf-8") as file:
+                        index = json.load(file)
+                except Exception as e:
+                    print(f"Error loading archive index {self.index_path}: {e}")
+                    stamp = None
+            if stamp is None and os.path.exists(self.path):
+                for record in self.read_records():
+                    self.merge_into_index(index, record)
+                write_json_atomic(self.index_path, index)
+                stamp = self.stamp_of(self.index_path)
+            self.index = index
+            self.index_stamp = stamp
+            return index
+
+    def load_tasks(self):
+        """Returns the archived tasks, all records of a task merged into one (read lazily, cached)"""
+        with self.lock:
+            stamp = self.stamp_of(self.path)
+            if stamp == self.tasks_stamp:
+                return self.tasks
+
+            tasks = OrderedDict()
+            for record in self.read_records():
+                task_name = record.get("task", "")
+                task = tasks.get(task_name)
+                if task is None:
+                    tasks[task_name] = dict(record, subtasks=list(record.get("subtasks", [])))
+                else:
+                    task.update({key: value for key, value in record.items() if key != "subtasks"})
+                    task["subtasks"].extend(record.get("subtasks", []))
+            self.tasks = list(tasks.values())
+            self.tasks_stamp = stamp
+            return self.tasks
+
+
+class TodoLoadError(OSError):
+    """todo.json exists but could not be read; the store does not write until it can"""
+
+
+class TodoStore:
+    """
+    Shared, cached todo.json document.
+
+    All modules load and save todo.json through the store of its path. The
+    parsed document is kept in memory together with the file's modification
+    stamp (mtime, size); get() only parses the file again when that stamp
+    changed, so one change is parsed once no matter how many readers ask.
+    Derived indexes (task_info, lookup by task name) are rebuilt only when
+    the document changes. Subscribers are called after every change, on the
+    thread that caused it.
+
+    get() returns the shared document itself: code that modifies it must
+    call save() afterwards, code on worker threads should modify a copy().
+
+    The store also keeps the registry of "In Progress" subtasks. The active
+    subtask is the one most recently set to "In Progress" (after loading: the
+    first one in the document). Its (task, subtask, estimated, actual) tuple
+    is kept ready under its own small lock, so the tracker and the logger can
+    read it from any thread without scanning the document or waiting for a
+    save. Editors report status changes with subtask_changed().
+
+    Completed work moves to the TodoArchive next to the file with
+    archive_completed(), so the live document stays small over time.
+
+    Edits are not written as whole documents: record() appends one small
+    operation to todo.journal.jsonl next to the file. todo.json is the
+    snapshot and carries the sequence number of the last operation it
+    contains; loading means reading the snapshot and replaying the journal
+    after it. Every COMPACT_AFTER operations (and on compact()) a new
+    snapshot is written and the journal starts over. undo() and redo()
+    append the inverse or repeated operation to the journal.
+    """
+
+    # Number of journal operations after which a new snapshot is written
+    COMPACT_AFTER = 200
+
+    # Reported when no subtask is in progress (Task, Subtask, Estimated Time, Actual Time)
+    NO_ACTIVE_SUBTASK = ("Relax", "Slay", 0.0, 0.0)
+
+    _stores = {}
+    _stores_lock = threading.Lock()
+
+    @classmethod
+    def instance(cls):
+        """Returns the store of the application's data/todo.json"""
+        from data_models import Config
+        return cls.for_path(os.path.join(Config.get_base_dir(), "data", "todo.json"))
+
+    @classmethod
+    def for_path(cls, path):
+        """Returns the store of the todo file at path (one store per file)"""
+        path = os.path.abspath(path)
+        with cls._stores_lock:
+            store = cls._stores.get(path)
+            if store is None:
+                store = cls(path)
+                cls._stores[path] = store
+            return store
+
+    def __init__(self, path):
+        self.path = path
+        self.archive = TodoArchive(os.path.join(os.path.dirname(path), "todo_archive.jsonl"))
+        self.lock = threading.RLock()
+        self.document = {"tasks": []}
+        self.stamp = False  # Stamp of the file the document corresponds to (False = never loaded)
+        self.load_error = None  # Error of the last load; while set, nothing is written
+        self.task_info = {}
+        self.tasks_by_name = {}
+        self.subscribers = []
+
+        self.journal_path = os.path.splitext(path)[0] + ".journal.jsonl"
+        self.seq = 0              # Sequence number of the last applied operation
+        self.journal_length = 0   # Operations in the journal since the last snapshot
+        self.indexes_stale = False
+        self.undo_stack = []      # Applied operations (journal records), last one on top
+        self.redo_stack = []
+
+        self.active_lock = threading.Lock()
+        self.in_progress = OrderedDict()  # id(subtask) -> (task, subtask), most recently started last
+        self.active = None  # (Task, Subtask, Estimated Time, Actual Time) or None
+        self.active_subscribers = []
+
+    def file_stamp(self):
+        """Modification stamps of snapshot and journal, None if neither exists"""
+        stamps = []
+        for path in (self.path, self.journal_path):
+            try:
+                stat = os.stat(path)
+                stamps.append((stat.st_mtime_ns, stat.st_size))
+            except OSError:
+                stamps.append(None)
+        return tuple(stamps) if stamps != [None, None] else None
+
+    def get(self):
+        """Returns the in-memory document, re-reading the files only if they changed on disk"""
+        with self.lock:
+            stamp = self.file_stamp()
+            if stamp == self.stamp:
+                return self.document
+
+            document = {"tasks": []}  # Leere Struktur, falls keine Datei existiert
+            self.load_error = None
+            if os.path.exists(self.path):
+                try:
+                    with open(self.path, "r", encoding="utf-8") as file:
+                        document = json.load(file)
+                except Exception as e:
+                    print(f"Error loading todo file {self.path}: {e}")
+                    # Datei unangetastet lassen: kein Journal, keine Migration, kein Snapshot
+                    self.load_error = e
+                    self.undo_stack = []
+                    self.redo_stack = []
+                    self.set_document({"tasks": []}, stamp)
+                    return self.document
+            version = document.pop("schema_version", 1)
+            self.seq = document.pop("journal_seq", 0)
+            self.undo_stack = []
+            self.redo_stack = []
+            self.replay_journal(document)
+
+            # Einmalige Migration älterer Dateien: Werte einmal umwandeln und als neuen Snapshot schreiben
+            if migrate_document(document, version) and os.path.exists(self.path):
+                print(f"Migrating {self.path} to schema version {SCHEMA_VERSION}")
+                self.write_snapshot(document)
+                stamp = self.file_stamp()
+            self.set_document(document, stamp)
+            return document
+
+    def replay_journal(self, document):
+        """Applies the journal operations after the snapshot and restores the undo/redo stacks"""
+        self.journal_length = 0
+        if not os.path.exists(self.journal_path):
+            return
+        with open(self.journal_path, "r", encoding="utf-8") as file:
+            for line in file:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # Unvollständige letzte Zeile (Abbruch beim Anhängen): hier endet das Journal
+                    break
+                self.journal_length += 1
+                if record.get("seq", 0) <= self.seq:
+                    continue  # Schon im Snapshot enthalten (Abbruch zwischen Snapshot und Leeren)
+                try:
+                    apply_operation(document, record)
+                except (LookupError, ValueError) as e:
+                    print(f"Error replaying todo journal at {record.get('seq')}: {e}")
+                    break
+                self.seq = record["seq"]
+                self.push_history(record)
+
+    def push_history(self, record):
+        """Updates the undo/redo stacks for an applied journal record"""
+        if record.get("undoable") is False:
+            if record["op"] in STRUCTURAL_OPERATIONS:
+                # Positionen der bisherigen Operationen stimmen nicht mehr (wie bei archive_completed)
+                self.undo_stack = []
+                self.redo_stack = []
+            return
+        if "undo" in record:
+            if self.undo_stack:
+                self.redo_stack.append(self.undo_stack.pop())
+        elif "redo" in record:
+            if self.redo_stack:
+                self.undo_stack.append(self.redo_stack.pop())
+        else:
+            self.undo_stack.append(record)
+            self.redo_stack = []
+
+    def check_writable(self):
+        """Refuses to write while todo.json could not be read, so a damaged file is never overwritten"""
+        if self.load_error is not None:
+            raise TodoLoadError(f"{self.path} could not be read ({self.load_error}); not writing")
+
+    def append_journal(self, record):
+        """Appends one record to the journal (a single small write, flushed to disk)"""
+        self.check_writable()
+        self.seq += 1
+        record["seq"] = self.seq
+        with open(self.journal_path, "a", encoding="utf-8") as file:
+            file.write(json.dumps(record) + "\n")
+            file.flush()
+            os.fsync(file.fileno())
+        self.journal_length += 1
+        self.stamp = self.file_stamp()
+        self.indexes_stale = True
+
+    def record(self, op):
+        """
+        Journals an operation that the caller has already applied to the
+        in-memory document (e.g. the Todo model). Compacts when the journal is long.
+        """
+        check_positions(op)
+        with self.lock:
+            if "value" in op:
+                # Zustand zum Zeitpunkt der Operation festhalten (das Dictionary lebt im Dokument weiter)
+                op = dict(op, value=copy.deepcopy(op["value"]))
+            self.append_journal(op)
+            self.push_history(op)
+            if self.journal_length >= self.COMPACT_AFTER:
+                self.compact()
+
+    def apply(self, ops, undoable=True):
+        """
+        Applies operations to the in-memory document and journals them, e.g.
+        from a worker thread. Operations with undoable=False (automatic
+        updates such as actual times or calendar imports) do not enter the
+        undo history; if they shift positions, the history is cleared.
+        """
+        if not ops:
+            return
+        with self.lock:
+            self.check_writable()
+            for op in ops:
+                apply_operation(self.document, op)
+                if not undoable:
+                    op["undoable"] = False
+                self.append_journal(op)
+                self.push_history(op)
+            if self.journal_length >= self.COMPACT_AFTER:
+                self.compact()
+            self.set_document(self.document, self.stamp)
+
+    def undo(self):
+        """Reverts the last operation; returns False if there is nothing to undo"""
+        return self.step_history(self.undo_stack, "undo")
+
+    def redo(self):
+        """Applies the last undone operation again; returns False if there is nothing to redo"""
+        return self.step_history(self.redo_stack, "redo")
+
+    def step_history(self, stack, marker):
+        with self.lock:
+            if not stack:
+                return False
+            original = stack[-1]
+            op = invert_operation(original) if marker == "undo" else operation_of(original)
+            try:
+                apply_operation(self.document, op)
+            except (LookupError, ValueError) as e:
+                print(f"Error during {marker}: {e}")
+                return False
+            op[marker] = original["seq"]
+            self.append_journal(op)
+            self.push_history(op)
+            self.set_document(self.document, self.stamp)
+            return True
+
+    def clear_history(self):
+        with self.lock:
+            self.undo_stack = []
+            self.redo_stack = []
+
+    def compact(self):
+        """Writes a new snapshot containing all operations and empties the journal"""
+        with self.lock:
+            if self.journal_length == 0 and os.path.exists(self.path):
+                return
+            self.write_snapshot(self.document)
+            self.stamp = self.file_stamp()
+
+    def write_snapshot(self, document):
+        self.check_writable()
+        # Erst den Snapshot (mit Sequenznummer) schreiben, dann das Journal leeren:
+        # ein Abbruch dazwischen hinterlässt nur Operationen, die beim Laden übersprungen werden
+        write_json_atomic(self.path, {**document, "schema_version": SCHEMA_VERSION, "journal_seq": self.seq})
+        with open(self.journal_path, "w", encoding="utf-8"):
+            pass
+        self.journal_length = 0
+
+    def copy(self):
+        """Returns a deep copy of the current document for modification on another thread"""
+        with self.lock:
+            return copy.deepcopy(self.get())
+
+    def save(self, document=None):
+        """Writes the document (default: the in-memory one) as a new snapshot and makes it the current state"""
+        with self.lock:
+            if document is None:
+                document = self.document
+            # Dokumente anderer Module können noch Werte im alten Format enthalten
+            migrate_document(document, 1)
+            self.write_snapshot(document)
+            self.set_document(document, self.file_stamp())
+
+    def set_document(self, document, stamp):
+        """Adopts a new document state, rebuilds the indexes and notifies the subscribers"""
+        self.document = document
+        self.stamp = stamp
+        self.rebuild_indexes()
+        self.rebuild_in_progress()
+        for callback in list(self.subscribers):
+            try:
+                callback(document)
+            except Exception as e:
+                print(f"Error notifying todo store subscriber: {e}")
+
+    def rebuild_indexes(self):
+        """Builds the task_info map and the name lookup (new objects, so readers keep a consistent view)"""
+        task_info = {}
+        tasks_by_name = {}
+        for task in self.document.get("tasks", []):
+            task_name = task.get("task", "")
+            if task_name:
+                tasks_by_name.setdefault(task_name, task)
+                task_info[task_name] = task_info_entry(task)
+        self.task_info = TaskInfoIndex(task_info, self.archive)
+        self.tasks_by_name = tasks_by_name
+        self.indexes_stale = False
+
+    def rebuild_in_progress(self):
+        """
+        Registers all "In Progress" subtasks of the document. Subtasks that were
+        already registered (same task and subtask name) keep their order, so a
+        reload or a save of a copy does not change the active subtask.
+        """
+        entries = []
+        for task in self.document.get("tasks", []):
+            for subtask in task.get("subtasks", []):
+                if subtask.get("status") == "In Progress":
+                    entries.append((task, subtask))
+
+        # Reihenfolge: neu gefundene in umgekehrter Dokument-Reihenfolge (der erste gilt als aktiv),
+        # danach die bereits bekannten in ihrer bisherigen Reihenfolge
+        with self.active_lock:
+            previous = {(task.get("task"), subtask.get("subtask")): rank
+                        for rank, (task, subtask) in enumerate(self.in_progress.values())}
+        entries.reverse()
+        entries.sort(key=lambda entry: previous.get((entry[0].get("task"), entry[1].get("subtask")), -1))
+
+        in_progress = OrderedDict((id(subtask), (task, subtask)) for task, subtask in entries)
+        with self.active_lock:
+            self.in_progress = in_progress
+        self.refresh_active()
+
+    def subtask_changed(self, task, subtask):
+        """Updates the registry after the status (or another field) of a subtask changed"""
+        with self.active_lock:
+            key = id(subtask)
+            if subtask.get("status") == "In Progress":
+                # Neu gestartete Subtasks werden aktiv, bereits laufende behalten ihren Platz
+                self.in_progress[key] = (task, subtask)
+            else:
+                self.in_progress.pop(key, None)
+        self.refresh_active()
+
+    def subtasks_removed(self, subtasks):
+        """Removes deleted subtasks from the registry"""
+        with self.active_lock:
+            for subtask in subtasks:
+                self.in_progress.pop(id(subtask), None)
+        self.refresh_active()
+
+    def refresh_active(self):
+        """Recomputes the active tuple from the most recently started subtask and notifies on change"""
+        with self.active_lock:
+            active = None
+            if self.in_progress:
+                task, subtask = next(reversed(self.in_progress.values()))
+                active = (task.get("task", ""), subtask.get("subtask", ""),
+                          subtask.get("estimated_time"), subtask.get("actual_time"))
+            if active == self.active:
+                return
+            self.active = active
+            subscribers = list(self.active_subscribers)
+        for callback in subscribers:
+            try:
+                callback(active)
+            except Exception as e:
+                print(f"Error notifying active subtask subscriber: {e}")
+
+    def get_active(self):
+        """Returns (Task, Subtask, Estimated Time, Actual Time) of the active subtask (hours), or NO_ACTIVE_SUBTASK"""
+        if self.stamp is False:
+            self.get()
+        active = self.active
+        return active if active is not None else self.NO_ACTIVE_SUBTASK
+
+    def subscribe_active(self, callback):
+        """Registers callback(active tuple or None), called when the active subtask changes"""
+        if callback not in self.active_subscribers:
+            self.active_subscribers.append(callback)
+
+    def unsubscribe_active(self, callback):
+        if callback in self.active_subscribers:
+            self.active_subscribers.remove(callback)
+
+    def archive_completed(self, max_age_days, now=None):
+        """
+        Moves completed work into the archive and saves the smaller document:
+        completed subtasks whose "completed_at" is at least max_age_days old
+        (or unknown), and whole tasks once all their subtasks qualify.
+        Returns the number of archived subtasks.
+        """
+        now = now or datetime.now()
+        cutoff = (now - timedelta(days=max_age_days)).isoformat(timespec="seconds")
+        archived_at = now.isoformat(timespec="seconds")
+
+        def is_old(subtask):
+            return subtask.get("status") == "Completed" and subtask.get("completed_at", "") <= cutoff
+
+        with self.lock:
+            document = self.get()
+            records = []
+            remaining_tasks = []
+            count = 0
+            for task in document.get("tasks", []):
+                subtasks = task.get("subtasks", [])
+                old = [subtask for subtask in subtasks if is_old(subtask)]
+                if not old:
+                    remaining_tasks.append(task)
+                    continue
+
+                records.append(dict(task, subtasks=old, archived_at=archived_at))
+                count += len(old)
+                if len(old) < len(subtasks):
+                    task["subtasks"] = [subtask for subtask in subtasks if not is_old(subtask)]
+                    remaining_tasks.append(task)
+
+            if not records:
+                return 0
+            # Erst archivieren, dann speichern: bei einem Abbruch dazwischen geht nichts verloren
+            self.archive.append(records)
+            document["tasks"] = remaining_tasks
+            self.save(document)
+            # Positionen der bisherigen Operationen stimmen nicht mehr
+            self.clear_history()
+            return count
+
+    def get_task_info(self):
+        """Returns the task_info map of the current document"""
+        with self.lock:
+            self.get()
+            if self.indexes_stale:
+                self.rebuild_indexes()
+            return self.task_info
+
+    def find_task(self, task_name):
+        """Returns the (first) task with the given name, or None"""
+        with self.lock:
+            self.get()
+            if self.indexes_stale:
+                self.rebuild_indexes()
+            return self.tasks_by_name.get(task_name)
+
+    def subscribe(self, callback):
+        """Registers callback(document), called after every change of the document"""
+        if callback not in self.subscribers:
+            self.subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        if callback in self.subscribers:
+            self.subscribers.remove(callback)
@@ -158,7 +158,7 @@ class MainApp(QWidget):
             # Hole die aktuelle Task-Informationen für den Log
             latest_task = todo_manager.get_latest_in_progress()
             
-            log_message = self.get_log_message()
+            log_message = self.get_log_message(latest_task)
             print(log_message)
             self.logger.log(self.mode, self.status, self.work, self.block, latest_task[0], latest_task[1], self.get_total_time_str())
 
@@ -211,7 +211,7 @@ class MainApp(QWidget):
         # Hole die aktuelle Task-Informationen für den Log
         latest_task = todo_manager.get_latest_in_progress()
         
-        log_message = self.get_log_message()
+        log_message = self.get_log_message(latest_task)
         print(log_message)
         self.logger.log(self.mode, self.status, self.work, self.block, latest_task[0], latest_task[1], self.get_total_time_str())
         self.update_timer_label()
@@ -263,7 +263,7 @@ class MainApp(QWidget):
             # Hole die aktuelle Task-Informationen für den Log
             latest_task = todo_manager.get_latest_in_progress()
             
-            log_message = self.get_log_message()
+            log_message = self.get_log_message(latest_task)
             print(log_message)
             self.logger.log(self.mode, self.status, self.work, self.block, latest_task[0], latest_task[1], self.get_total_time_str())
 
@@ -294,7 +294,7 @@ class MainApp(QWidget):
                 # Hole die aktuelle Task-Informationen für den Log
                 latest_task = todo_manager.get_latest_in_progress()
                 
-                log_message = self.get_log_message()
+                log_message = self.get_log_message(latest_task)
                 print(log_message)
                 self.logger.log(self.mode, self.status, self.work, self.block, latest_task[0], latest_task[1], self.get_total_time_str())
 
@@ -313,7 +313,7 @@ class MainApp(QWidget):
         # Hole die aktuelle Task-Informationen für den Log
         latest_task = todo_manager.get_latest_in_progress()
         
-        log_message = self.get_log_message()
+        log_message = self.get_log_message(latest_task)
         print(log_message)
         self.logger.log(self.mode, self.status, self.work, self.block, latest_task[0], latest_task[1], self.get_total_time_str())
         self.update_timer_label()
@@ -340,9 +340,9 @@ class MainApp(QWidget):
         """Gibt die aktuelle Gesamtzeit als String HH:MM:SS zurück"""
         return str(self.get_total_time()).split('.')[0]
 
-    def get_log_message(self):
-        """Erzeugt die Log-Nachricht für print und CSV"""
-        # Hole die aktuelle Task-Informationen
-        latest_task = todo_manager.get_latest_in_progress()
+    def get_log_message(self, latest_task=None):
+        """Erzeugt die Log-Nachricht für print und CSV (mit demselben Task-Stand wie der Log-Eintrag)"""
+        if latest_task is None:
+            latest_task = todo_manager.get_latest_in_progress()
         
         return f"Mode= {self.mode} Status= {self.status} Work= {self.work} Block = {self.block} Task = {latest_task[0]} Subtask = {latest_task[1]} Timer= {self.get_total_time_str()} Est.Time= {latest_task[2]} Act.Time= {latest_task[3]} Time= {datetime.now().strftime('%H:%M:%S')}"
\ No newline at end of file
@@ -1,30 +1,55 @@
 # File 3: visualization.py
 # Contains all visualization and GUI components
 
+import os
 import numpy as np
 import matplotlib.pyplot as plt
+from matplotlib.patches import Rectangle
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
-from PyQt5.QtWidgets import QWidget, QVBoxLayout
-from PyQt5.QtCore import QTimer
+from PyQt5.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QLabel
+from PyQt5.QtCore import Qt, QTimer
 from data_models import Config, TodoManager
+from data_processing import DataProcessor
+from week_loader import WeekLoader
 from datetime import datetime
 
 
 class BarChartApp(QWidget):
+    # Weekdays shown on the X-axis (index 0-6 = Monday-Sunday)
+    CATEGORIES = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+    # Target work hours (e.g. 8 hours per day for weekdays, 0 for weekends)
+    TARGET_HOURS = [8.0, 8.0, 8.0, 8.0, 8.0, 0.0, 0.0]  # Mon-Fri: 8h, Sat-Sun: 0h
+
+    BAR_WIDTH = 0.6  # Wider bars for a more modern look
+
+    # Colors for a modern color scheme
+    DEFAULT_COLOR = '#3498db'  # Standard blue for tasks without color
+    HIGHLIGHT_COLOR = '#2ecc71'  # Green for achieved hour goals
+    BACKGROUND_COLOR = '#ececec'  # Changed to requested background color
+    GRID_COLOR = '#A0A0A0'  # Light gray grid lines
+    TEXT_COLOR = '#2c3e50'  # Dark blue/gray for text
+
     def __init__(self, data_dict, total_actual_times, start_times):
         super().__init__()
         self.data_dict = data_dict
         self.start_times = start_times
         self.total_actual_times = total_actual_times
-        
+        self.week_dates = Config.get_current_week_dates()
+
         # Initialize Todo-Manager for color assignment
         self.base_dir = Config.get_base_dir()
-        self.todo_manager = TodoManager(self.base_dir)
-        
-        # Registriere bei Config für Datumsaktualisierungen
-        Config.register_widget(self)
-        
+        self.task_info = TodoManager(self.base_dir).task_info
+
+        # Retained chart state: artists and the specs they were drawn from, per day (1-7)
+        self.day_bar_specs = {day_idx: [] for day_idx in range(1, 8)}
+        self.day_bars = {day_idx: [] for day_idx in range(1, 8)}
+        self.day_label_specs = {day_idx: None for day_idx in range(1, 8)}
+        self.day_labels = {}
+        self.xtick_label_key = None
+
         self.setup_ui()
+        self.setup_chart()
         self.setup_timer()
         self.draw_chart()
 
@@ -33,130 +58,251 @@ class BarChartApp(QWidget):
         layout = QVBoxLayout(self)
         self.setWindowTitle("Working Time Visualization")
 
+        # Week navigation (previous / next week)
+        navigation_layout = QHBoxLayout()
+        self.prev_week_button = QPushButton("◀")
+        self.prev_week_button.setFixedWidth(40)
+        self.prev_week_button.clicked.connect(lambda: Config.shift_week(-1))
+        self.next_week_button = QPushButton("▶")
+        self.next_week_button.setFixedWidth(40)
+        self.next_week_button.clicked.connect(lambda: Config.shift_week(1))
+        self.week_label = QLabel("")
+        self.week_label.setAlignment(Qt.AlignCenter)
+        navigation_layout.addWidget(self.prev_week_button)
+        navigation_layout.addStretch()
+        navigation_layout.addWidget(self.week_label)
+        navigation_layout.addStretch()
+        navigation_layout.addWidget(self.next_week_button)
+        layout.addLayout(navigation_layout)
+
         # Prepare Matplotlib Canvas
         self.figure, self.ax = plt.subplots()
         self.canvas = FigureCanvas(self.figure)
-        
-        # Show only the chart, no info panels
-        layout.addWidget(self.canvas)
 
-    def setup_timer(self):
-        """Sets up the timer for automatic updates"""
-        self.timer = QTimer(self)
-        self.timer.timeout.connect(self.refresh_data)
-        self.timer.start(Config.REFRESH_INTERVAL)  # Update every 36 seconds
-        print(f"Auto-refresh activated: Every {Config.REFRESH_INTERVAL/1000} seconds")
+        # Recompute the layout only when the canvas size actually changes
+        self.canvas.mpl_connect('resize_event', lambda event: self.figure.tight_layout(pad=2.0))
 
-    def refresh_data(self):
-        """Updates the data and display"""
-        print("Updating data...")
-        
-        # Reload data (without detailed output)
-        from data_processing import DataManager
-        data_manager = DataManager()
-        self.data_dict, self.total_actual_times, self.start_times = data_manager.load_all_data(verbose=False)
-        
-        # Update Todo-Manager
-        self.todo_manager = TodoManager(self.base_dir)
-        
-        # Redraw chart
-        self.draw_chart()
-        
-        print("Update completed.")
+        # Show only the chart, no info panels
+        layout.addWidget(self.canvas)
 
-    def draw_chart(self):
-        """Draws a modern, more appealing bar chart with task-specific colors"""
-        self.ax.clear()
-        categories = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
-        x_pos = np.arange(len(categories))
-        bar_width = 0.6  # Wider bars for a more modern look
-        
-        # Colors for a modern color scheme
-        default_color = '#3498db'  # Standard blue for tasks without color
-        highlight_color = '#2ecc71'  # Green for achieved hour goals
-        background_color = '#ececec'  # Changed to requested background color
-        grid_color = '#A0A0A0'  # Light gray grid lines
-        text_color = '#2c3e50'  # Dark blue/gray for text
-        
+    def setup_chart(self):
+        """Builds the static chart elements once (background, axes, grid, spines)"""
         # Set background
-        self.figure.patch.set_facecolor(background_color)
-        self.ax.set_facecolor(background_color)
-        
-        # Target work hours (e.g. 8 hours per day for weekdays, 0 for weekends)
-        target_hours = [8.0, 8.0, 8.0, 8.0, 8.0, 0.0, 0.0]  # Mon-Fri: 8h, Sat-Sun: 0h
-        
-        # Draw bars for each day
-        for day_idx in range(1, 8):  # Index 1-7 for Monday-Sunday
-            if day_idx in self.data_dict:
-                day_data = self.data_dict[day_idx]
-                last_valid_bar = None
-                daily_total = 0.0 if day_idx-1 >= len(self.total_actual_times) else self.total_actual_times[day_idx-1]
-                
-                # Process all work intervals of the day
-                for i, row in enumerate(day_data[:-1]):  # Ignore last row
-                    if row["Start"] != "False" and row["Actual Time"] > 0:
-                        start = Config.time_to_decimal(row["Start"])
-                        duration = row["Actual Time"] / 3600
-                        
-                        # Determine color from todo.json, if task is defined
-                        task_color = default_color
-                        
-                        # Check if task information is present in the row
-                        if "Task" in row and row["Task"].strip():
-                            task_name = row["Task"].strip()
-                            # Retrieve color from the Todo-Manager
-                            task_info = self.todo_manager.task_info.get(task_name, {})
-                            if "color" in task_info:
-                                task_color = task_info["color"]
-                        
-                        # Draw bar with task-specific color
-                        bar = self.ax.bar(
-                            x_pos[day_idx-1], 
-                            duration,
-                            bottom=start,
-                            width=bar_width,
-                            color=task_color,
-                            alpha=0.85,
-                            edgecolor='none',
-                            zorder=3
-                        )
-                        
-                        last_valid_bar = bar
-                
-                # Display total time above last bar with a more modern style
-                if last_valid_bar and day_idx-1 < len(self.total_actual_times):
-                    total_time = self.total_actual_times[day_idx-1]
-                    bar_top = last_valid_bar[0].get_height() + last_valid_bar[0].get_y()
-                    
-                    # Hour count as simple black number
-                    self.ax.text(
-                        x_pos[day_idx-1], 
-                        bar_top + 0.8, 
-                        f"{total_time:.2f}h",
-                        ha='center', 
-                        va='center',
-                        fontsize=10,
-                        fontweight='normal',
-                        color='black',  # Black number
-                        zorder=4
-                    )
+        self.figure.patch.set_facecolor(self.BACKGROUND_COLOR)
+        self.ax.set_facecolor(self.BACKGROUND_COLOR)
 
         # Highlight horizontal lines for work hours (9-17)
         self.ax.axhspan(9, 17, color='#ececec', alpha=0.5, zorder=1)  # Changed to match background
-        
-        # Chart formatting
+
+        # Chart formatting; fixed limits so adding bars never triggers autoscaling
+        self.x_pos = np.arange(len(self.CATEGORIES))
+        self.ax.set_xlim(self.x_pos[0] - 0.65, self.x_pos[-1] + 0.65)
         self.ax.set_ylim(7, 20)
         self.ax.set_yticks(np.arange(8, 21, 1))
-        self.ax.set_yticklabels([f"{h}:00" for h in range(8, 21)], fontsize=9, color=text_color)
-        self.ax.set_xticks(x_pos)
-        
+        self.ax.set_yticklabels([f"{h}:00" for h in range(8, 21)], fontsize=9, color=self.TEXT_COLOR)
+        self.ax.set_xticks(self.x_pos)
+
+        # Darker grid lines
+        self.ax.grid(True, axis='y', linestyle='-', alpha=0.4, color=self.GRID_COLOR, zorder=0)
+
+        # Remove axis lines for a cleaner look
+        self.ax.spines['top'].set_visible(False)
+        self.ax.spines['right'].set_visible(False)
+        self.ax.spines['left'].set_color(self.GRID_COLOR)
+        self.ax.spines['bottom'].set_color(self.GRID_COLOR)
+
+    def setup_timer(self):
+        """Sets up background-loaded updates and the live timer"""
+        # New week data (date change, changed files, fallback poll) arrives from the WeekLoader
+        WeekLoader.instance().week_loaded.connect(self.apply_snapshot)
+
+        # Live timer: extends today's open work interval, reading only the end of today's file
+        self.live_timer = QTimer(self)
+        self.live_timer.timeout.connect(self.update_live_bar)
+        self.live_timer.start(Config.REFRESH_INTERVAL)  # Update every 36 seconds
+        print(f"Auto-refresh activated: On file changes, live bar every {Config.REFRESH_INTERVAL/1000} seconds")
+
+    def update_live_bar(self):
+        """Extends today's open work interval up to now, if the tracker is currently working"""
+        today = datetime.today()
+        day_idx = today.weekday() + 1
+
+        # Only if the displayed week contains today
+        if self.week_dates.get(self.CATEGORIES[day_idx - 1]) != today.strftime("%d-%m-%y"):
+            return
+
+        day_data = self.data_dict.get(day_idx)
+        open_index = DataProcessor.open_interval(day_data) if day_data else None
+        if open_index is None:
+            return
+
+        # Has the tracker logged since the data was loaded (file events are debounced)?
+        # Then the interval may have ended: reload instead of extending it
+        csv_path = os.path.join(self.base_dir, "data", f"{today.strftime('%d-%m-%y')}.csv")
+        try:
+            last_row = DataProcessor.last_tracker_row(csv_path)
+        except OSError:
+            last_row = None
+        if last_row is not None and last_row["Time"] != day_data[open_index]["Time"]:
+            self.refresh_data()
+            return
+
+        day_data = DataProcessor.refresh_live_row(day_data)
+        self.data_dict[day_idx] = day_data
+
+        if day_idx - 1 < len(self.total_actual_times):
+            total_time = sum(int(row["Actual Time"]) for row in day_data if str(row["Actual Time"]).isdigit())
+            self.total_actual_times[day_idx - 1] = round(total_time / 3600, 2)
+
+        self.draw_chart()
+
+    def refresh_data(self):
+        """Requests a background reload; the chart keeps its data until the result arrives"""
+        WeekLoader.instance().request_week()
+
+    def apply_snapshot(self, snapshot):
+        """Shows the week data loaded by the WeekLoader"""
+        self.week_dates = snapshot["week_dates"]
+        # Copies, because the live bar updates them and snapshots are shared and cached
+        self.data_dict = dict(snapshot["data_dict"])
+        self.total_actual_times = list(snapshot["total_actual_times"])
+        self.start_times = snapshot["start_times"]
+        self.task_info = snapshot["task_info"]
+
+        # Redraw chart (a cached snapshot may be older than the live timer row)
+        self.draw_chart()
+        self.update_live_bar()
+
+    def get_bar_specs(self, day_idx):
+        """Returns (start, duration, color) for every work interval of a day"""
+        specs = []
+
+        # Process all work intervals of the day
+        for row in self.data_dict.get(day_idx, [])[:-1]:  # Ignore last row
+            if row["Start"] != "False" and row["Actual Time"] > 0:
+                start = Config.time_to_decimal(row["Start"])
+                duration = row["Actual Time"] / 3600
+
+                # Determine color from todo.json, if task is defined
+                task_color = self.DEFAULT_COLOR
+
+                # Check if task information is present in the row
+                if "Task" in row and row["Task"].strip():
+                    task_name = row["Task"].strip()
+                    # Retrieve color from the Todo-Manager
+                    task_info = self.task_info.get(task_name, {})
+                    if "color" in task_info:
+                        task_color = task_info["color"]
+
+                specs.append((start, duration, task_color))
+
+        return specs
+
+    def update_day_bars(self, day_idx, specs):
+        """
+        Brings the bar artists of a day in line with its specs.
+        Existing rectangles are reused and only changed properties are set,
+        so an unchanged past day costs nothing and today usually only grows one bar.
+
+        Returns True if any artist was changed.
+        """
+        old_specs = self.day_bar_specs[day_idx]
+        if specs == old_specs:
+            return False
+
+        bars = self.day_bars[day_idx]
+        x = self.x_pos[day_idx - 1] - self.BAR_WIDTH / 2
+
+        for i, (start, duration, color) in enumerate(specs):
+            if i < len(bars):
+                if old_specs[i] == (start, duration, color):
+                    continue
+                rect = bars[i]
+                rect.set_y(start)
+                rect.set_height(duration)
+                rect.set_facecolor(color)
+            else:
+                # Draw bar with task-specific color
+                rect = Rectangle(
+                    (x, start),
+                    self.BAR_WIDTH,
+                    duration,
+                    facecolor=color,
+                    alpha=0.85,
+                    edgecolor='none',
+                    zorder=3
+                )
+                self.ax.add_patch(rect)
+                bars.append(rect)
+
+        # Remove bars that no longer exist (e.g. after switching the week)
+        for rect in bars[len(specs):]:
+            rect.remove()
+        del bars[len(specs):]
+
+        self.day_bar_specs[day_idx] = specs
+        return True
+
+    def update_day_label(self, day_idx, specs):
+        """
+        Updates the total time displayed above the last bar of a day.
+
+        Returns True if the label was changed.
+        """
+        label_spec = None
+        if specs and day_idx - 1 < len(self.total_actual_times):
+            start, duration, _ = specs[-1]
+            label_spec = (start + duration + 0.8, f"{self.total_actual_times[day_idx-1]:.2f}h")
+
+        if label_spec == self.day_label_specs[day_idx]:
+            return False
+        self.day_label_specs[day_idx] = label_spec
+
+        label = self.day_labels.get(day_idx)
+        if label_spec is None:
+            if label is not None:
+                label.set_visible(False)
+            return True
+
+        y, text = label_spec
+        if label is None:
+            # Hour count as simple black number
+            self.day_labels[day_idx] = self.ax.text(
+                self.x_pos[day_idx-1],
+                y,
+                text,
+                ha='center',
+                va='center',
+                fontsize=10,
+                fontweight='normal',
+                color='black',  # Black number
+                zorder=4
+            )
+        else:
+            label.set_y(y)
+            label.set_text(text)
+            label.set_visible(True)
+        return True
+
+    def update_xtick_labels(self):
+        """
+        Updates the X-axis labels (weekday, date and start time) if they changed.
+
+        Returns True if the labels were changed.
+        """
+        # Wochendaten der angezeigten Woche
+        week_dates = self.week_dates
+
+        # Kalenderwoche in der Navigation anzeigen
+        monday = datetime.strptime(week_dates["Monday"], "%d-%m-%y")
+        year, week, _ = monday.isocalendar()
+        self.week_label.setText(f"KW {week} / {year}")
+
         # Formatted X-axis labels with weekday and start time
         formatted_labels = []
-        for day, time in zip(categories, self.start_times):
-            # Hole das aktuelle Wochendatum aus Config
-            week_dates = Config.get_current_week_dates()
+        for day, time in zip(self.CATEGORIES, self.start_times):
             date_str_raw = week_dates.get(day, "")
-            
+
             # Konvertiere das Datum von "DD-MM-YY" zu "DD.MM."
             if date_str_raw:
                 try:
@@ -166,41 +312,54 @@ class BarChartApp(QWidget):
                     date_str = date_str_raw
             else:
                 date_str = ""
-            
+
             if time.strip() not in ['', ' ']:
                 formatted_labels.append(f"{day}\n{date_str}\n{time}")
             else:
                 formatted_labels.append(f"{day}\n{date_str}")
-        
+
+        today = datetime.today().weekday()  # 0 = Monday, 6 = Sunday
+        label_key = (tuple(formatted_labels), today)
+        if label_key == self.xtick_label_key:
+            return False
+        self.xtick_label_key = label_key
+
         # Anpassen der Schriftart entsprechend dem Haupt-Stylesheet
-        self.ax.set_xticklabels(formatted_labels, fontsize=9, color=text_color, fontfamily='sans-serif')
-        
-        # Darker grid lines
-        self.ax.grid(True, axis='y', linestyle='-', alpha=0.4, color=grid_color, zorder=0)
-        
-        # Display week total
-        week_total = sum(self.total_actual_times)
-        week_goal = sum(target_hours)  # Sum of daily goals
-        percentage = (week_total / week_goal) * 100 if week_goal > 0 else 0
-        
-        # Remove axis lines for a cleaner look
-        self.ax.spines['top'].set_visible(False)
-        self.ax.spines['right'].set_visible(False)
-        self.ax.spines['left'].set_color(grid_color)
-        self.ax.spines['bottom'].set_color(grid_color)
-        
+        self.ax.set_xticklabels(formatted_labels, fontsize=9, color=self.TEXT_COLOR, fontfamily='sans-serif')
+
         # Highlight today
-        today = datetime.today().weekday()  # 0 = Monday, 6 = Sunday
         if 0 <= today <= 6:
-            self.ax.get_xticklabels()[today].set_color(highlight_color)
+            self.ax.get_xticklabels()[today].set_color(self.HIGHLIGHT_COLOR)
             self.ax.get_xticklabels()[today].set_fontweight('extra bold')
-        
-        # Optimize layout
+
+        # Label sizes changed, so the layout has to be recomputed
         self.figure.tight_layout(pad=2.0)
-        self.canvas.draw()
+        return True
+
+    def draw_chart(self):
+        """
+        Updates the retained-mode bar chart with task-specific colors.
+        Static elements are built once in setup_chart; here only the artists
+        of days whose data changed are touched, and the canvas redraw is
+        scheduled with draw_idle instead of being forced.
+        """
+        changed = False
+
+        # Draw bars for each day
+        for day_idx in range(1, 8):  # Index 1-7 for Monday-Sunday
+            specs = self.get_bar_specs(day_idx)
+            changed |= self.update_day_bars(day_idx, specs)
+
+            # Display total time above last bar with a more modern style
+            changed |= self.update_day_label(day_idx, specs)
+
+        changed |= self.update_xtick_labels()
+
+        if changed:
+            self.canvas.draw_idle()
 
     def closeEvent(self, event):
         """Wird aufgerufen, wenn das Fenster geschlossen wird"""
         # Bei Schließen abmelden, um Speicherlecks zu vermeiden
-        Config.unregister_widget(self)
-        super().closeEvent(event)
\ No newline at end of file
+        WeekLoader.instance().week_loaded.disconnect(self.apply_snapshot)
+        super().closeEvent(event)
@@ -7,6 +7,7 @@ from PyQt5.QtGui import QFont, QColor, QPainter, QPen, QBrush
 from data_processing import DataProcessor, DataManager
 from data_models import TodoManager, Config
 from circular_progress import CircularProgressWidget
+from week_loader import WeekLoader
 from datetime import datetime
 
 class WeeklyCircularProgress(CircularProgressWidget):
@@ -39,6 +40,9 @@ class WeeklyCircularProgress(CircularProgressWidget):
         
         # Deaktiviere Sounds für Weekly Goals
         self.play_sounds = False
+        
+        # Hide the ARBEIT/PAUSE text; everything else is drawn by the cached parent paintEvent
+        self.show_status_text = False
     
     def set_progress(self, current, maximum):
         """Set progress as current/maximum values"""
@@ -55,67 +59,8 @@ class WeeklyCircularProgress(CircularProgressWidget):
         # Instead we'll use external labels in the main UI
         self.hours_text = ""
         
-        self.update()
-    
-    def paintEvent(self, event):
-        """Override the paintEvent to customize appearance and hide the ARBEIT/PAUSE text"""
-        # Don't call super().paintEvent() directly to avoid drawing the ARBEIT/PAUSE text
-        # Instead, we'll replicate the parent's paintEvent but skip the status text
-        
-        painter = QPainter(self)
-        painter.setRenderHint(QPainter.Antialiasing)
-        
-        # Get dimensions
-        width = self.width()
-        height = self.height()
-        center_x = width / 2
-        center_y = height / 2
-        diameter = min(width, height) - 40
-        radius = diameter / 2
-        
-        # Draw background circle
-        painter.setPen(Qt.NoPen)
-        painter.setBrush(self.bg_color)
-        painter.drawEllipse(QRectF(center_x - radius, center_y - radius, diameter, diameter))
-        
-        # Determine if we're in break time
-        is_break_time = self.current_time > self.work_time_max
-        
-        if self.current_time > 0:
-            # Draw work time slice
-            work_time_to_draw = min(self.current_time, self.work_time_max)
-            if work_time_to_draw > 0:
-                angle = work_time_to_draw / self.total_time_max * 360
-                painter.setPen(Qt.NoPen)
-                painter.setBrush(QBrush(self.work_color))
-                self.drawPieSlice(painter, center_x, center_y, radius, 90, -angle)
-            
-            # Draw break time slice
-            if is_break_time:
-                break_time = self.current_time - self.work_time_max
-                break_angle = break_time / self.total_time_max * 360
-                work_angle = self.work_time_max / self.total_time_max * 360
-                painter.setPen(Qt.NoPen)
-                painter.setBrush(QBrush(self.break_color))
-                self.drawPieSlice(painter, center_x, center_y, radius, 90 - work_angle, -break_angle)
-        
-        # Draw inner white circle (donut appearance)
-        inner_radius = radius * 0.7
-        painter.setPen(Qt.NoPen)
-        painter.setBrush(QBrush(Qt.white))
-        painter.drawEllipse(QRectF(center_x - inner_radius, center_y - inner_radius, inner_radius * 2, inner_radius * 2))
-        
-        # Draw time text (percentage)
-        painter.setPen(Qt.black)
-        font = QFont("Arial", 24, QFont.Bold)
-        painter.setFont(font)
-        painter.drawText(QRectF(0, 0, width, height), Qt.AlignCenter, self.time_text)
-        
-        # Draw our custom elements
-        
-        # Title not displayed as requested
-        
-        # No longer drawing hours text here - will use standalone labels instead
+        # Only repaint the arc and text regions that actually changed
+        self.invalidate_changes()
 
 
 class WeeklyVisualizationWidget(QWidget):
@@ -126,33 +71,30 @@ class WeeklyVisualizationWidget(QWidget):
         self.hacken_goal_hours = 20  # 20 hours weekly goal
         self.hustle_goal_hours = 10  # 10 hours weekly goal
         
-        # Load the actual data from CSV files
-        self.load_data()
+        # Bis zum ersten Laden im Hintergrund leer anzeigen
+        self.hacken_hustle_data = {category: {"total": 0, "tasks": {}}
+                                   for category in ("hacken", "hustle", "uncategorized")}
         
-        # Registriere bei Config für Datumsaktualisierungen
-        Config.register_widget(self)
+        # Wochendaten (Start, Datumswechsel, geänderte Dateien) kommen im Hintergrund vom WeekLoader
+        WeekLoader.instance().week_loaded.connect(self.apply_snapshot)
         
         # Setup UI
         self.init_ui()
+        self.refresh_data()
     
     def closeEvent(self, event):
         """Wird aufgerufen, wenn das Fenster geschlossen wird"""
         # Bei Schließen abmelden, um Speicherlecks zu vermeiden
-        Config.unregister_widget(self)
+        WeekLoader.instance().week_loaded.disconnect(self.apply_snapshot)
         super().closeEvent(event)
         
-    def load_data(self):
-        """Load real data from CSV files"""
-        # Create data manager to load all CSV data
-        self.data_manager = DataManager()
-        self.data_manager.load_all_data(verbose=False)
-        
-        # The hacken_hustle_data is already calculated in DataManager
-        self.hacken_hustle_data = self.data_manager.hacken_hustle_data
-    
     def refresh_data(self):
-        """Aktualisiert die Daten und die Anzeige"""
-        self.load_data()
+        """Fordert die Daten im Hintergrund an; bis dahin bleibt die bisherige Anzeige stehen"""
+        WeekLoader.instance().request_week()
+    
+    def apply_snapshot(self, snapshot):
+        """Zeigt die vom WeekLoader geladenen Wochendaten an"""
+        self.hacken_hustle_data = snapshot["hacken_hustle_data"]
         self.update_display()
     
     def init_ui(self):
@@ -175,10 +117,20 @@ class WeeklyVisualizationWidget(QWidget):
         self.date_button = QPushButton("Datum ändern")
         self.date_button.clicked.connect(self.show_date_picker)
         
-        # Füge Titel und Button zum Header-Layout hinzu
+        # Buttons zum Blättern in die vorherige / nächste Woche
+        self.prev_week_button = QPushButton("◀")
+        self.prev_week_button.setFixedWidth(40)
+        self.prev_week_button.clicked.connect(lambda: Config.shift_week(-1))
+        self.next_week_button = QPushButton("▶")
+        self.next_week_button.setFixedWidth(40)
+        self.next_week_button.clicked.connect(lambda: Config.shift_week(1))
+        
+        # Füge Titel und Buttons zum Header-Layout hinzu
         header_layout.addWidget(title_label)
         header_layout.addStretch()  # Fügt Abstand zwischen Titel und Button ein
+        header_layout.addWidget(self.prev_week_button)
         header_layout.addWidget(self.date_button)
+        header_layout.addWidget(self.next_week_button)
         
         # Füge das Header-Layout zum Hauptlayout hinzu
         main_layout.addLayout(header_layout)
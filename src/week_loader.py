@@ -0,0 +1,202 @@
+# File: week_loader.py
+# Loads week data in the background so date changes never block the GUI thread
+
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, QTimer, pyqtSignal
+from data_models import Config
+from data_processing import DataManager
+from data_watcher import DataWatcher
+
+
+class WeekLoadSignals(QObject):
+    """Signals of a WeekLoadJob (QRunnable itself cannot emit signals)"""
+
+    # (job, snapshot or None)
+    finished = pyqtSignal(object, object)
+
+
+class WeekLoadJob(QRunnable):
+    """Loads and processes all data of one week on a pool thread"""
+
+    # Pool priorities: requested weeks run before prefetched ones
+    REQUEST_PRIORITY = 1
+    PREFETCH_PRIORITY = 0
+
+    def __init__(self, key, reference_date, signals, prefetch=False):
+        super().__init__()
+        self.key = key
+        self.reference_date = reference_date
+        self.signals = signals
+        self.prefetch = prefetch
+        self.cancelled = False
+
+    def run(self):
+        snapshot = None
+        try:
+            data_manager = DataManager(self.reference_date)
+            # Taken before loading: task info read during the load is at least this recent
+            todo_version = DataManager.get_todo_version(data_manager.base_dir)
+
+            # Only the real current week writes its subtask times back to todo.json
+            is_current_week = self.key[0] == Config.get_week_key(datetime.today())
+
+            result = data_manager.load_all_data(
+                verbose=False,
+                is_cancelled=lambda: self.cancelled,
+                update_todo=is_current_week
+            )
+            if result is not None and not self.cancelled:
+                data_dict, total_actual_times, start_times = result
+                snapshot = {
+                    "week_key": self.key[0],
+                    "data_version": self.key[1],
+                    "todo_version": todo_version,
+                    "week_dates": data_manager.week_dates,
+                    "data_dict": data_dict,
+                    "total_actual_times": total_actual_times,
+                    "start_times": start_times,
+                    "task_totals": data_manager.task_totals,
+                    "subtask_totals": data_manager.subtask_totals,
+                    "hacken_hustle_data": data_manager.hacken_hustle_data,
+                    "task_info": data_manager.task_info,
+                }
+        except Exception as e:
+            print(f"Error loading week {self.key[0]}: {e}")
+        self.signals.finished.emit(self, snapshot)
+
+
+class WeekLoader(QObject):
+    """
+    Process-wide loader for week data.
+
+    Every request gets the key (ISO week, data version), where the data
+    version is the modification stamp of the week's day files. Computed
+    weeks are kept in a bounded LRU cache under that key, so revisiting an
+    unchanged week is answered without loading anything. Changes of
+    todo.json only refresh the task info of a snapshot before it is shown.
+
+    Loads run on a thread pool; a request for another week cancels the
+    loads it supersedes and their results are discarded. Widgets keep
+    showing their last data until week_loaded delivers the new snapshot,
+    which is shared by all of them. After each request the adjacent weeks
+    are prefetched in the background.
+    """
+
+    # Emitted with the snapshot dictionary of the currently requested week
+    week_loaded = pyqtSignal(object)
+
+    _instance = None
+
+    @classmethod
+    def instance(cls):
+        """Returns the loader shared by all widgets"""
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.base_dir = Config.get_base_dir()
+
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(2)
+
+        self.requested_key = None
+        self.jobs = {}  # key -> running WeekLoadJob
+        self.cache = OrderedDict()  # key -> snapshot, least recently used first
+
+        self.signals = WeekLoadSignals(self)
+        self.signals.finished.connect(self.on_job_finished)
+
+        # Reload the displayed week when the data files change
+        DataWatcher.instance().data_changed.connect(self.on_data_changed)
+
+        # Fallback poll in case a file system event was missed
+        self.fallback_timer = QTimer(self)
+        self.fallback_timer.timeout.connect(self.on_data_changed)
+        self.fallback_timer.start(Config.FALLBACK_REFRESH_INTERVAL)
+
+        # Registriere bei Config, damit eine Datumsänderung einen Ladevorgang auslöst
+        Config.register_widget(self)
+
+    def get_key(self, reference_date):
+        """Returns the cache key (ISO week, data version) of the week containing reference_date"""
+        week_dates = Config.get_current_week_dates(reference_date)
+        return (Config.get_week_key(reference_date), DataManager.get_data_version(week_dates, self.base_dir))
+
+    def request_week(self, reference_date=None):
+        """Requests the data of the week containing reference_date (default: displayed week)"""
+        reference_date = Config.get_reference_date(reference_date)
+        key = self.get_key(reference_date)
+        self.requested_key = key
+
+        # Superseded loads are cancelled; they stop after the file they are reading
+        for job_key, job in self.jobs.items():
+            if job_key != key and not job.prefetch:
+                job.cancelled = True
+
+        snapshot = self.cache.get(key)
+        if snapshot is not None:
+            # Computed before and unchanged since: answer immediately
+            snapshot = self.cache[key] = DataManager.refresh_task_info(snapshot, self.base_dir)
+            self.cache.move_to_end(key)
+            self.week_loaded.emit(snapshot)
+            self.prefetch_adjacent(reference_date)
+            return
+
+        # Same week and data already loading (possibly as a prefetch): share the running load
+        if key in self.jobs:
+            self.jobs[key].cancelled = False
+            return
+
+        self.start_job(key, reference_date)
+        self.prefetch_adjacent(reference_date)
+
+    def prefetch_adjacent(self, reference_date):
+        """Loads the previous and next week in the background, unless cached or already loading"""
+        for weeks in (-1, 1):
+            adjacent_date = reference_date + timedelta(weeks=weeks)
+            key = self.get_key(adjacent_date)
+            if key not in self.cache and key not in self.jobs:
+                self.start_job(key, adjacent_date, prefetch=True)
+
+    def start_job(self, key, reference_date, prefetch=False):
+        """Starts a background load for key"""
+        job = WeekLoadJob(key, reference_date, self.signals, prefetch)
+        self.jobs[key] = job
+        self.pool.start(job, WeekLoadJob.PREFETCH_PRIORITY if prefetch else WeekLoadJob.REQUEST_PRIORITY)
+
+    def refresh_data(self):
+        """Called by Config.notify_widgets when the displayed date changes"""
+        self.request_week()
+
+    def on_data_changed(self, paths=None):
+        """Data files changed (or fallback poll): reload the displayed week if its data version changed"""
+        self.request_week()
+
+    def on_job_finished(self, job, snapshot):
+        """Caches the result of a load and delivers it, unless it was superseded in the meantime"""
+        if self.jobs.get(job.key) is job:
+            del self.jobs[job.key]
+
+        if snapshot is None or job.cancelled:
+            return
+
+        if job.key == self.requested_key:
+            # The load of the current week writes its subtask times to todo.json
+            snapshot = DataManager.refresh_task_info(snapshot, self.base_dir)
+
+        # A load that finished after its files changed again is outdated and not cached
+        # (the change triggers a new request); older versions of the same week are
+        # stale, e.g. from before the last tracker row
+        if job.key[1] == DataManager.get_data_version(snapshot["week_dates"], self.base_dir):
+            for key in [key for key in self.cache if key[0] == job.key[0] and key != job.key]:
+                del self.cache[key]
+            self.cache[job.key] = snapshot
+            self.cache.move_to_end(job.key)
+            while len(self.cache) > Config.WEEK_CACHE_SIZE:
+                self.cache.popitem(last=False)
+
+        if job.key == self.requested_key:
+            self.week_loaded.emit(snapshot)
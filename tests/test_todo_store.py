@@ -0,0 +1,56 @@
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from todo_store import TodoLoadError, TodoStore, apply_operation
+
+
+class CorruptTodoFileTest(unittest.TestCase):
+    def test_corrupt_todo_file_survives_get(self):
+        directory = tempfile.mkdtemp()
+        path = os.path.join(directory, "todo.json")
+        journal_path = os.path.join(directory, "todo.journal.jsonl")
+        content = '{"tasks": [{"task": "A", "subtasks": []}]'  # schließende Klammer fehlt
+        with open(path, "w", encoding="utf-8") as file:
+            file.write(content)
+        journal = json.dumps({"op": "set_task", "task": 0, "values": {"color": "#000000"}, "old": {}, "seq": 1}) + "\n"
+        with open(journal_path, "w", encoding="utf-8") as file:
+            file.write(journal)
+
+        store = TodoStore(path)
+        self.assertEqual(store.get(), {"tasks": []})
+        with self.assertRaises(TodoLoadError):
+            store.apply([{"op": "insert_task", "task": 0, "value": {"task": "B", "subtasks": []}}])
+        self.assertEqual(store.get(), {"tasks": []})
+        with self.assertRaises(TodoLoadError):
+            store.save()
+
+        with open(path, encoding="utf-8") as file:
+            self.assertEqual(file.read(), content)
+        with open(journal_path, encoding="utf-8") as file:
+            self.assertEqual(file.read(), journal)
+
+        # Repariert wird die Datei beim nächsten Zugriff normal geladen
+        with open(path, "w", encoding="utf-8") as file:
+            file.write(content + "}")
+        self.assertEqual(store.get()["tasks"][0]["color"], "#000000")
+
+
+class NegativePositionTest(unittest.TestCase):
+    def test_negative_positions_are_rejected(self):
+        document = {"tasks": [{"task": "A", "subtasks": [{"subtask": "a"}]}, {"task": "B", "subtasks": []}]}
+        for op in ({"op": "remove_task", "task": -1},
+                   {"op": "remove_subtask", "task": 0, "subtask": -1},
+                   {"op": "move_subtask", "task": 0, "subtask": 0, "to_task": -1, "to_subtask": 0}):
+            with self.assertRaises(IndexError):
+                apply_operation(document, op)
+        self.assertEqual([task["task"] for task in document["tasks"]], ["A", "B"])
+        self.assertEqual(document["tasks"][0]["subtasks"], [{"subtask": "a"}])
+
+
+if __name__ == "__main__":
+    unittest.main()